@@ -0,0 +1,41 @@
+"""add_doctor_notification_counters
+
+Revision ID: 3e08a04e984c
+Revises: 8bb3d70bfc56
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e08a04e984c'
+down_revision: Union[str, None] = '8bb3d70bfc56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('doctor_notification_counters',
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('total_count', sa.Integer(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('doctor_id')
+    )
+    # Isi counter awal dari notifikasi yang sudah ada
+    op.execute(
+        "INSERT INTO doctor_notification_counters (doctor_id, total_count, unread_count, updated_at) "
+        "SELECT to_doctor_id, COUNT(*), SUM(CASE WHEN status = 'unread' THEN 1 ELSE 0 END), CURRENT_TIMESTAMP "
+        "FROM notifications GROUP BY to_doctor_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('doctor_notification_counters')
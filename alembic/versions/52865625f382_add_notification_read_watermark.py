@@ -0,0 +1,31 @@
+"""add_notification_read_watermark
+
+Revision ID: 52865625f382
+Revises: 3e08a04e984c
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '52865625f382'
+down_revision: Union[str, None] = '3e08a04e984c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('doctor_notification_counters',
+                  sa.Column('read_up_to_id', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_notifications_doctor_id_id', 'notifications', ['to_doctor_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notifications_doctor_id_id', table_name='notifications')
+    op.drop_column('doctor_notification_counters', 'read_up_to_id')
@@ -0,0 +1,53 @@
+"""add_updated_at_for_delta_sync
+
+Revision ID: 6c0632ddc9eb
+Revises: 52865625f382
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c0632ddc9eb'
+down_revision: Union[str, None] = '52865625f382'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite menolak ADD COLUMN dengan default non-konstan pada tabel berisi: tabel dibuat ulang
+    recreate = 'always' if op.get_bind().dialect.name == 'sqlite' else 'auto'
+    for table in ('users', 'patients', 'records', 'notifications'):
+        with op.batch_alter_table(table, recreate=recreate) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                          server_default=sa.text('CURRENT_TIMESTAMP')))
+    # Baris lama: anggap terakhir berubah saat dibuat
+    op.execute("UPDATE users SET updated_at = created_at")
+    op.execute("UPDATE notifications SET updated_at = created_at")
+    op.execute("UPDATE records SET updated_at = COALESCE(end_time, start_time)")
+    # patients tidak punya created_at: pakai waktu registrasi akun pemiliknya
+    op.execute(
+        "UPDATE patients SET updated_at = COALESCE("
+        "(SELECT users.created_at FROM users WHERE users.id = patients.user_id), updated_at)"
+    )
+    op.create_index(op.f('ix_users_updated_at'), 'users', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_patients_updated_at'), 'patients', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_records_updated_at'), 'records', ['updated_at'], unique=False)
+    op.create_index('ix_records_patient_id_updated_at', 'records', ['patient_id', 'updated_at'], unique=False)
+    op.create_index('ix_notifications_doctor_id_updated_at', 'notifications', ['to_doctor_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notifications_doctor_id_updated_at', table_name='notifications')
+    op.drop_index('ix_records_patient_id_updated_at', table_name='records')
+    op.drop_index(op.f('ix_records_updated_at'), table_name='records')
+    op.drop_index(op.f('ix_patients_updated_at'), table_name='patients')
+    op.drop_index(op.f('ix_users_updated_at'), table_name='users')
+    for table in ('notifications', 'records', 'patients', 'users'):
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,49 @@
+"""microsecond_updated_at_on_mysql
+
+Revision ID: a7d4c2e9f013
+Revises: 9f3a61c25e07
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4c2e9f013'
+down_revision: Union[str, None] = '9f3a61c25e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tabel dengan server default CURRENT_TIMESTAMP (lihat 6c0632ddc9eb)
+DEFAULTED_TABLES = ('users', 'patients', 'records', 'notifications')
+
+
+def _alter(fsp: int) -> None:
+    # PostgreSQL/SQLite sudah menyimpan mikrodetik; hanya DATETIME MySQL yang dibulatkan ke detik
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    precise = fsp > 0
+    for table in DEFAULTED_TABLES + ('doctor_notification_counters',):
+        # Presisi default harus sama dengan presisi kolom di MySQL; False = default tidak diubah
+        default = False
+        if table in DEFAULTED_TABLES:
+            default = sa.text('CURRENT_TIMESTAMP(6)' if precise else 'CURRENT_TIMESTAMP')
+        op.alter_column(table, 'updated_at',
+                        existing_type=mysql.DATETIME(fsp=None if precise else 6),
+                        type_=mysql.DATETIME(fsp=fsp or None),
+                        existing_nullable=False,
+                        server_default=default)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _alter(6)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _alter(0)
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core.dependencies import require_admin_principal
+from app.core.principal import Principal
+from app.core.query_stats import query_stats, explain_statement, SORT_KEYS
+from app.core.profiler import profile_store, SORT_KEYS as PROFILE_SORT_KEYS
+from app.core.server_timing import TimedRoute
+from app.core.cache import get_cache
+
+router = APIRouter(prefix="/diagnostics", tags=["Admin"], route_class=TimedRoute)
+
+@router.get("/queries")
+def top_queries(
+    sort: str = Query("total_time", description=f"Urutkan berdasarkan: {', '.join(SORT_KEYS)}"),
+    limit: int = Query(20, ge=1, le=200),
+    admin: Principal = Depends(require_admin_principal)
+):
+    """Fingerprint query teratas (paling lama / paling sering)"""
+    try:
+        data = query_stats.top(sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "success": True,
+        "data": data,
+        "dropped_fingerprints": query_stats.dropped,
+        "message": "Query statistics retrieved successfully"
+    }
+
+@router.get("/queries/slow")
+def slow_queries(limit: int = Query(50, ge=1, le=500), admin: Principal = Depends(require_admin_principal)):
+    """Slow query terbaru di atas SLOW_QUERY_THRESHOLD_MS"""
+    return {"success": True, "data": query_stats.slow_queries(limit), "message": "Slow queries retrieved successfully"}
+
+@router.get("/queries/n-plus-one")
+def n_plus_one_suspects(limit: int = Query(50, ge=1, le=500), admin: Principal = Depends(require_admin_principal)):
+    """Route yang mengeksekusi fingerprint yang sama berulang kali dalam satu request"""
+    return {"success": True, "data": query_stats.n_plus_one(limit), "message": "N+1 suspects retrieved successfully"}
+
+@router.post("/queries/{fingerprint_id}/explain")
+def explain_query(fingerprint_id: str, db: Session = Depends(get_db), admin: Principal = Depends(require_admin_principal)):
+    """EXPLAIN untuk sampel paling lambat dari fingerprint (hanya SELECT, tanpa ANALYZE)"""
+    sample = query_stats.get_sample(fingerprint_id)
+    if sample is None:
+        raise HTTPException(status_code=404, detail="No slow sample captured for this fingerprint")
+    statement, parameters = sample
+    try:
+        plan = explain_statement(db.connection(), statement, parameters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=400, detail=f"EXPLAIN failed: {e.__class__.__name__}")
+    finally:
+        db.rollback()
+    return {
+        "success": True,
+        "data": {"fingerprint_id": fingerprint_id, "statement": statement, "plan": plan},
+        "message": "Query plan retrieved successfully"
+    }
+
+@router.delete("/queries")
+def reset_query_stats(admin: Principal = Depends(require_admin_principal)):
+    query_stats.reset()
+    return {"success": True, "message": "Query statistics reset"}
+
+@router.get("/profiles")
+def list_profiles(admin: Principal = Depends(require_admin_principal)):
+    """Profil request yang tersimpan (terbaru dulu)"""
+    return {"success": True, "data": profile_store.list(), "message": "Profiles retrieved successfully"}
+
+@router.get("/profiles/{request_id}", response_class=PlainTextResponse)
+def get_profile_report(
+    request_id: str,
+    sort: str = Query("cumulative", description=f"Urutkan berdasarkan: {', '.join(PROFILE_SORT_KEYS)}"),
+    limit: int = Query(50, ge=1, le=500),
+    admin: Principal = Depends(require_admin_principal)
+):
+    """Laporan pstats dalam bentuk teks"""
+    try:
+        report = profile_store.render_text(request_id, sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
+
+@router.get("/profiles/{request_id}/download")
+def download_profile(request_id: str, admin: Principal = Depends(require_admin_principal)):
+    """File .pstats mentah (snakeviz, flameprof, gprof2dot)"""
+    path = profile_store.pstats_path(request_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{request_id}.pstats")
+
+@router.get("/cache")
+def cache_stats(admin: Principal = Depends(require_admin_principal)):
+    """Statistik application cache (hit ratio, eviction, ukuran)"""
+    return {"success": True, "data": get_cache().describe(), "message": "Cache statistics retrieved successfully"}
+
+@router.delete("/cache")
+def clear_cache(admin: Principal = Depends(require_admin_principal)):
+    """Kosongkan application cache"""
+    cache = get_cache()
+    cache.clear()
+    cache.stats.reset()
+    return {"success": True, "message": "Cache cleared"}
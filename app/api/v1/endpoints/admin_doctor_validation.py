@@ -4,8 +4,9 @@ from app.db.session import get_db
 from app.models.medical import User
 from app.core.dependencies import get_current_user
 from app.services.admin_doctor_validation_service import AdminDoctorValidationService
+from app.core.server_timing import TimedRoute
 
-router = APIRouter(tags=["Admin"])
+router = APIRouter(tags=["Admin"], route_class=TimedRoute)
 
 def get_current_admin(
     current_user: User = Depends(get_current_user)
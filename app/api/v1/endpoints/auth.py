@@ -5,34 +5,47 @@ from datetime import datetime, timedelta
 
 from app.db.session import get_db
 from app.models.medical import User, Patient
-from app.core.security import verify_password, create_access_token, create_refresh_token
+from app.core.security import verify_and_update_password, create_access_token
 from app.core.config import settings
 from app.schemas.common import LoginRequest, LoginResponse, LoginData, PatientUserData, UserData
+from app.core.server_timing import TimedRoute, server_timing
+from app.core.rate_limit import rate_limit
+from app.services.refresh_token_service import RefreshTokenService
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=TimedRoute)
 
-@router.post("/login", response_model=LoginResponse)
+@router.post("/login", response_model=LoginResponse, dependencies=[Depends(rate_limit("login"))])
 async def login_user(
     request: LoginRequest,
     db: Session = Depends(get_db)
 ):
     """Login user with email and password"""
-    # Find user by email
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user:
+    # Satu query: user + data pasien (outer join) untuk respons login
+    row = db.query(User, Patient).outerjoin(
+        Patient, Patient.user_id == User.id
+    ).filter(User.email == request.email).order_by(Patient.id).first()
+    if not row:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    user, patient = row
     
     # Verify password
-    if not verify_password(request.password, user.password_hash):
+    with server_timing("password"):
+        password_ok, new_hash = verify_and_update_password(request.password, user.password_hash)
+    if not password_ok:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Parameter Argon2 berubah: simpan hash baru (ikut commit login). updated_at
+        # sengaja tidak disentuh karena hash tidak terlihat di profil / delta sync
+        db.query(User).filter(User.id == user.id).update(
+            {User.password_hash: new_hash, User.updated_at: User.updated_at},
+            synchronize_session=False
+        )
     
     # Create tokens
     access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value, "user_id": user.id}
-    )
-    refresh_token = create_refresh_token(
-        data={"sub": user.email, "user_id": user.id}
+        data={"sub": user.email, "role": user.role.value, "user_id": user.id, "epoch": user.token_epoch or 0}
     )
+    refresh_token = RefreshTokenService.start_family(db, user)
     
     # Prepare user data
     user_data = {
@@ -46,7 +59,6 @@ async def login_user(
     
     # Add patient-specific data if user is a patient
     if user.role.value == "patient":
-        patient = db.query(Patient).filter(Patient.user_id == user.id).first()
         if patient:
             user_data.update({
                 "hpht": patient.hpht.isoformat() if patient.hpht else None,
@@ -55,6 +67,9 @@ async def login_user(
                 "medicalNote": patient.medical_note
             })
     
+    RefreshTokenService.purge_expired_if_due(db)
+    db.commit()
+    
     return LoginResponse(
         success=True,
         data={
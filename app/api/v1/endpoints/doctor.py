@@ -1,42 +1,45 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.db.session import get_db
 from app.models.medical import User
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_current_principal
+from app.core.principal import Principal
 from app.schemas.common import DoctorResponse, DoctorUpdateRequest, ProfilePhotoResponse
 from app.services.file_upload_service import FileUploadService
+from app.services.profile_service import ProfileService
+from app.core.server_timing import TimedRoute
+from app.core.etag import conditional_response, make_etag
 
-router = APIRouter(prefix="/doctors", tags=["Doctor"])
+router = APIRouter(prefix="/doctors", tags=["Doctor"], route_class=TimedRoute)
 
 @router.get("/{doctor_id}", response_model=DoctorResponse)
 async def get_doctor(
     doctor_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get doctor by ID"""
-    doctor = db.query(User).filter(
+    # Cek versi dulu; row lengkap hanya dimuat jika ETag tidak cocok
+    updated_at = db.query(User.updated_at).filter(
         User.id == doctor_id,
         User.role == "doctor"
-    ).first()
+    ).scalar()
     
-    if not doctor:
+    if updated_at is None:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
+    not_modified = conditional_response(request, response, make_etag("doctor", doctor_id, updated_at))
+    if not_modified:
+        return not_modified
+    
+    data = ProfileService.get_doctor_profile(db, doctor_id, (updated_at,))
     return DoctorResponse(
         success=True,
-        data={
-            "id": doctor.id,
-            "userId": doctor.id,
-            "name": doctor.name,
-            "email": doctor.email,
-            "specialization": doctor.specialization,
-            "profilePhotoUrl": f"https://dopply.my.id{doctor.photo_url}" if doctor.photo_url else None,
-            "createdAt": doctor.created_at.isoformat() if doctor.created_at else None,
-            "updatedAt": datetime.now().isoformat()
-        },
+        data=data,
         message="Doctor data retrieved successfully"
     )
 
@@ -80,7 +83,7 @@ async def update_doctor(
             "email": doctor.email,
             "specialization": doctor.specialization,
             "profilePhotoUrl": f"https://dopply.my.id{doctor.photo_url}" if doctor.photo_url else None,
-            "updatedAt": datetime.now().isoformat()
+            "updatedAt": doctor.updated_at.isoformat()
         },
         message="Doctor data updated successfully"
     )
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+import ipaddress
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _is_local_client(request: Request) -> bool:
+    # Request lewat reverse proxy berasal dari luar meskipun peer-nya loopback
+    if request.headers.get("x-forwarded-for"):
+        return False
+    host = request.client.host if request.client else None
+    try:
+        address = ipaddress.ip_address(host)
+    except (TypeError, ValueError):
+        return False
+    return address.is_loopback or address.is_private
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """Metrics dalam format teks Prometheus"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.METRICS_LOCAL_ONLY and not _is_local_client(request):
+        raise HTTPException(status_code=403, detail="Metrics are only available from the local network")
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
@@ -6,13 +8,23 @@ import json
 
 from app.db.session import get_db
 from app.models.medical import User, Patient, Record, Notification, DoctorPatientAssociation, UserRole, NotificationStatus
-from app.core.dependencies import get_current_user
+from app.core.config import settings
+from app.core.dependencies import get_current_user, get_current_principal, get_read_db
+from app.core.principal import Principal
+from app.core.server_timing import TimedRoute
+from app.core.rate_limit import rate_limit
+from app.core.etag import conditional_response, make_etag
 from app.services.monitoring_simple import MonitoringService
+from app.services.notification_broker import get_notification_broker, stream_notifications
+from app.services.outbox_dispatcher import OutboxDispatcher, outbox_worker, RECORD_SHARED
+from app.services.notification_counter_service import NotificationCounterService
+from app.services.access_graph import access_graph
 from app.schemas.fetal_monitoring import (
     MonitoringRequest, MonitoringResponse, 
     ShareMonitoringRequest, ShareMonitoringResponse,
     MonitoringHistoryResponse, AddPatientRequest, AddPatientResponse,
     PatientListResponse, NotificationListResponse,
+    NotificationBulkReadRequest, NotificationBulkReadResponse,
     DoctorVerificationRequest, DoctorVerificationResponse,
     ClassifyRequest, ClassifyResponse
 )
@@ -25,7 +37,7 @@ from app.utils.bpm_calculator import (
     is_shared_with_doctor, format_record_for_api
 )
 
-router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"], route_class=TimedRoute)
 
 # ============= CLASSIFICATION & SUBMIT ENDPOINTS =============
 
@@ -36,7 +48,8 @@ async def classify_monitoring(request: ClassifyRequest):
     average_bpm = sum(request.bpm_data) / len(request.bpm_data) if request.bpm_data else 0
     return ClassifyResponse(classification=classification, average_bpm=average_bpm)
 
-@router.post("/submit", response_model=MonitoringResponse)
+@router.post("/submit", response_model=MonitoringResponse,
+             dependencies=[Depends(rate_limit("monitoring_submit", key="device"))])
 async def submit_monitoring(
     request: MonitoringRequest,
     current_user: User = Depends(get_current_user),
@@ -63,13 +76,13 @@ async def save_monitoring_result(
 ):
     """Save monitoring result (frontend requirements endpoint)"""
     # Verify patient exists
-    patient = db.query(Patient).filter(Patient.id == request.patientId).first()
-    if not patient:
+    patient_user_id = access_graph.owner_of(db, request.patientId)
+    if patient_user_id is None:
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Authorization check
     if current_user.role.value == "patient":
-        if patient.user_id != current_user.id:
+        if patient_user_id != current_user.id:
             raise HTTPException(status_code=403, detail="Access denied")
     elif current_user.role.value not in ["doctor", "admin"]:
         raise HTTPException(status_code=403, detail="Access denied")
@@ -125,11 +138,13 @@ async def save_monitoring_result(
 
 @router.get("/history")
 async def get_monitoring_history(
+    request: Request,
+    response: Response,
     patient_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 20,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """Get monitoring history (unified endpoint for both legacy and new frontend)"""
     import logging
@@ -137,6 +152,16 @@ async def get_monitoring_history(
     logger.info(f"Accessed /monitoring/history by user_id={current_user.id}, role={current_user.role.value}, patient_id={patient_id}")
     
     try:
+        version = MonitoringService.get_monitoring_history_version(
+            db, current_user.id, current_user.role.value, patient_id
+        )
+        not_modified = conditional_response(
+            request, response,
+            make_etag("history", current_user.id, patient_id, skip, limit, *version)
+        )
+        if not_modified:
+            return not_modified
+        
         # Use service layer for consistent behavior
         result = MonitoringService.get_monitoring_history(
             db, current_user.id, current_user.role.value, patient_id, skip, limit
@@ -168,6 +193,8 @@ async def get_monitoring_history(
 
 @router.get("/doctor-history", response_model=CommonMonitoringHistoryResponse)
 async def get_doctor_monitoring_history(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 20,
     current_user: User = Depends(get_current_user),
@@ -178,14 +205,22 @@ async def get_doctor_monitoring_history(
         raise HTTPException(status_code=403, detail="Only doctors can access this endpoint")
     
     # Get all patients assigned to this doctor
-    assigned_patients = db.query(DoctorPatientAssociation).filter(
-        DoctorPatientAssociation.doctor_id == current_user.id
-    ).all()
-    
-    patient_ids = [assoc.patient_id for assoc in assigned_patients]
+    patient_ids = sorted(access_graph.assigned_patient_ids(db, current_user.id))
     
     # Get monitoring records for all assigned patients
     query = db.query(Record).filter(Record.patient_id.in_(patient_ids))
+    
+    # Versi halaman (record, nama pasien, nama dokter) dalam satu query agregat
+    version = query.outerjoin(Patient, Patient.id == Record.patient_id).with_entities(
+        func.count(Record.id), func.sum(Record.id), func.max(Record.updated_at), func.max(Patient.updated_at)
+    ).one()
+    not_modified = conditional_response(
+        request, response,
+        make_etag("doctor-history", current_user.id, current_user.updated_at, skip, limit, *version)
+    )
+    if not_modified:
+        return not_modified
+    
     total = query.count()
     records = query.offset(skip).limit(limit).all()
     
@@ -232,8 +267,7 @@ async def share_monitoring(
             
         # Authorization check - hanya patient owner atau doctor yang bisa share
         if current_user.role.value == "patient":
-            patient = db.query(Patient).filter(Patient.id == record.patient_id).first()
-            if not patient or patient.user_id != current_user.id:
+            if access_graph.owner_of(db, record.patient_id) != current_user.id:
                 raise HTTPException(status_code=403, detail="Access denied")
         elif current_user.role.value not in ["doctor", "admin"]:
             raise HTTPException(status_code=403, detail="Access denied")
@@ -246,27 +280,21 @@ async def share_monitoring(
         if not doctor:
             raise HTTPException(status_code=404, detail="Doctor not found")
             
-        # Update record dengan shared_with
+        # Update record dan tulis event outbox dalam satu transaksi;
+        # notifikasi dibuat oleh outbox dispatcher di luar request
         record.shared_with = request.doctor_id
+        OutboxDispatcher.enqueue(db, RECORD_SHARED, {
+            "record_id": record.id,
+            "patient_id": record.patient_id,
+            "doctor_ids": [request.doctor_id],
+            "message_template": "Monitoring result shared by {patient_name}"
+        })
         db.commit()
-        
-        # Buat notifikasi
-        patient = db.query(Patient).filter(Patient.id == record.patient_id).first()
-        notification = Notification(
-            from_patient_id=record.patient_id,
-            to_doctor_id=request.doctor_id,
-            record_id=record.id,
-            message=f"Monitoring result shared by {patient.name if patient else 'Patient'}",
-            status=NotificationStatus.unread
-        )
-        db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        outbox_worker.wake()
         
         return ShareMonitoringResponse(
             success=True,
-            message=f"Monitoring result shared with Dr. {doctor.name}",
-            notification_id=notification.id
+            message=f"Monitoring result shared with Dr. {doctor.name}"
         )
     except HTTPException:
         raise
@@ -280,8 +308,8 @@ async def share_monitoring(
 
 @router.get("/patients", response_model=PatientListResponse)
 async def get_patients(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """Get patient list for doctor"""
     try:
@@ -313,12 +341,18 @@ async def add_patient(
 
 @router.get("/notifications", response_model=NotificationListResponse)
 async def get_notifications(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    skip: int = 0,
+    limit: int = 20,
+    unread_only: bool = False,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """Get notifications for current user"""
+    # Notifikasi & counter hanya milik dokter
+    if current_user.role.value != "doctor":
+        raise HTTPException(status_code=403, detail="Only doctors can access notifications")
     try:
-        result = MonitoringService.get_user_notifications(db, current_user.id)
+        result = MonitoringService.get_doctor_notifications(db, current_user.id, skip, limit, unread_only)
         return NotificationListResponse(**result)
     except Exception as e:
         import logging
@@ -326,6 +360,57 @@ async def get_notifications(
         logger.error(f"Get notifications error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/notifications/count")
+async def get_notification_count(
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Badge count notifikasi (total & unread) dari counter per dokter"""
+    # Counter hanya untuk dokter; role lain akan men-seed baris counter untuk id-nya
+    if current_user.role.value != "doctor":
+        raise HTTPException(status_code=403, detail="Only doctors can access notification counts")
+    counts = NotificationCounterService.get_counts(db, current_user.id)
+    return {"success": True, "data": counts}
+
+@router.get("/notifications/stream")
+async def stream_doctor_notifications(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Stream notifikasi real-time untuk dokter (Server-Sent Events)"""
+    if current_user.role.value != "doctor":
+        raise HTTPException(status_code=403, detail="Only doctors can subscribe to notifications")
+    
+    doctor_id = current_user.id
+    return StreamingResponse(
+        stream_notifications(
+            get_notification_broker(),
+            doctor_id,
+            settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS,
+            request.is_disconnected
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/notifications/read", response_model=NotificationBulkReadResponse)
+async def mark_notifications_read_bulk(
+    request: NotificationBulkReadRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Tandai banyak notifikasi (list id atau watermark up_to_id/up_to_created_at) sebagai sudah dibaca"""
+    try:
+        result = MonitoringService.mark_notifications_read_bulk(
+            db, current_user.id, request.notification_ids, request.up_to_id, request.up_to_created_at
+        )
+        return NotificationBulkReadResponse(**result)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger("monitoring_notification_read")
+        logger.error(f"Bulk mark notification read error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/notifications/read/{notification_id}")
 async def mark_notification_read(
     notification_id: int,
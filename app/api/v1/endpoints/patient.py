@@ -1,57 +1,58 @@
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Response
 from sqlalchemy.orm import Session
-from app.models.medical import User, Patient, DoctorPatientAssociation
+from app.models.medical import User, Patient
 from app.db.session import get_db
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_current_principal
+from app.core.principal import Principal
 from app.schemas.common import PatientResponse, PatientUpdateRequest, ProfilePhotoResponse
 from app.services.file_upload_service import FileUploadService
+from app.services.profile_service import ProfileService
+from app.services.access_graph import access_graph
 from typing import Optional
 from datetime import datetime
+from app.core.server_timing import TimedRoute
+from app.core.etag import conditional_response, make_etag
 
-router = APIRouter(prefix="/patients", tags=["Patient"])
+router = APIRouter(prefix="/patients", tags=["Patient"], route_class=TimedRoute)
 
 @router.get("/{patient_id}", response_model=PatientResponse)
 async def get_patient(
     patient_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get patient by ID"""
-    # Check authorization - patient can only access their own data, doctor can access assigned patients
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    if not patient:
+    # Versi baris saja dulu; row lengkap hanya dimuat jika ETag tidak cocok
+    version = db.query(Patient.user_id, Patient.updated_at, User.updated_at).join(
+        User, User.id == Patient.user_id
+    ).filter(Patient.id == patient_id).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Patient not found")
+    patient_user_id, patient_updated_at, user_updated_at = version
     
     # Authorization check
     if current_user.role.value == "patient":
         # Patient can only access their own data
-        if patient.user_id != current_user.id:
+        if patient_user_id != current_user.id:
             raise HTTPException(status_code=403, detail="Access denied")
     elif current_user.role.value == "doctor":
         # Doctor can access assigned patients
-        association = db.query(DoctorPatientAssociation).filter(
-            DoctorPatientAssociation.doctor_id == current_user.id,
-            DoctorPatientAssociation.patient_id == patient_id
-        ).first()
-        if not association:
+        if not access_graph.is_assigned(db, current_user.id, patient_id):
             raise HTTPException(status_code=403, detail="Access denied - patient not assigned")
     
+    not_modified = conditional_response(
+        request, response, make_etag("patient", patient_id, patient_updated_at, user_updated_at)
+    )
+    if not_modified:
+        return not_modified
+    
+    data = ProfileService.get_patient_profile(db, patient_id, (patient_updated_at, user_updated_at))
     return PatientResponse(
         success=True,
-        data={
-            "id": patient.id,
-            "userId": patient.user_id,
-            "name": patient.name,
-            "email": patient.email,
-            "hpht": patient.hpht.isoformat() if patient.hpht else None,
-            "birthDate": patient.birth_date.isoformat() if patient.birth_date else None,
-            "address": patient.address,
-            "medicalNote": patient.medical_note,
-            "profilePhotoUrl": f"https://dopply.my.id{patient.user.photo_url}" if patient.user and patient.user.photo_url else None,
-            "createdAt": patient.user.created_at.isoformat() if patient.user else None,
-            "updatedAt": datetime.now().isoformat()
-        },
+        data=data,
         message="Patient data retrieved successfully"
     )
 
@@ -106,7 +107,7 @@ async def update_patient(
             "address": patient.address,
             "medicalNote": patient.medical_note,
             "profilePhotoUrl": f"https://dopply.my.id{patient.user.photo_url}" if patient.user and patient.user.photo_url else None,
-            "updatedAt": datetime.now().isoformat()
+            "updatedAt": max(patient.updated_at, patient.user.updated_at).isoformat()
         },
         message="Patient data updated successfully"
     )
@@ -157,7 +158,7 @@ async def upload_patient_profile_photo(
 @router.get("/legacy/{id}", summary="Get biodata pasien (legacy)")
 def get_patient_biodata_legacy(
     id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     if current_user.role.value != "patient":
@@ -3,22 +3,33 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.schemas.refresh import RefreshTokenRequest, RefreshTokenResponse, ErrorResponse
-from app.db.session import SessionLocal
+from app.db.session import get_db
 from app.core.security import verify_refresh_token, create_access_token, create_refresh_token
+from app.core.server_timing import TimedRoute
+from app.core.rate_limit import rate_limit
+from app.services.refresh_token_service import RefreshTokenService, revocation_filter
+import logging
 
-router = APIRouter(tags=["Authentication"])
+logger = logging.getLogger("refresh_tokens")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(tags=["Authentication"], route_class=TimedRoute)
+
+def _reject_reuse(db: Session, family_id: str, user_email: str):
+    """Token yang sudah dirotasi dipakai lagi: cabut seluruh family (pemilik harus login ulang)"""
+    RefreshTokenService.revoke_family(db, family_id)
+    db.commit()
+    revocation_filter.add_family(family_id)
+    logger.warning(f"Refresh token reuse detected for {user_email}, family {family_id} revoked")
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token invalid or expired"
+    )
 
 @router.post("/refresh", 
             response_model=RefreshTokenResponse, 
+            dependencies=[Depends(rate_limit("refresh"))],
             summary="Refresh Token",
-            description="Exchange a valid refresh token for a new access token and optionally a new refresh token",
+            description="Exchange a valid refresh token for a new access token and a new (rotated) refresh token",
             responses={
                 200: {
                     "description": "Successfully refreshed tokens",
@@ -50,11 +61,13 @@ def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
     
     - **refresh_token**: Valid refresh token obtained from login
     
-    Returns new access token and optionally a new refresh token.
+    Returns new access token and a new refresh token; the old refresh token
+    cannot be used again (reuse revokes the whole token family).
     """
     try:
         # Verify refresh token
         payload = verify_refresh_token(request.refresh_token)
+        user_id = payload.get("user_id") or payload.get("id")
         user_email = payload.get("sub")
         
         if not user_email:
@@ -63,23 +76,47 @@ def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
                 detail="Invalid token payload"
             )
         
+        jti, family_id = payload.get("jti"), payload.get("fid")
+        if jti and family_id and RefreshTokenService.is_revoked(db, jti, family_id):
+            _reject_reuse(db, family_id, user_email)
+        
         # Get user from database
-        from app.models.medical import User
-        user = db.query(User).filter(User.email == user_email).first()
-        if not user:
+        from app.models.medical import User, RevokedRefreshToken
+        user = db.get(User, user_id) if user_id else db.query(User).filter(User.email == user_email).first()
+        if not user or user.email != user_email:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
+        if payload.get("epoch", 0) != (user.token_epoch or 0):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token revoked"
+            )
+        
+        # Rotasi: token lama ditandai terpakai, klien menerima refresh token baru.
+        # Token lama (sebelum rotasi ada) tidak punya family: ditukar sekali ke family baru.
+        if jti and family_id:
+            new_refresh_token = RefreshTokenService.rotate(db, user, payload)
+            if new_refresh_token is None:
+                _reject_reuse(db, family_id, user_email)
+        else:
+            jti = RefreshTokenService.legacy_jti(request.refresh_token)
+            new_refresh_token = RefreshTokenService.exchange_legacy(db, user, request.refresh_token, payload)
+            if new_refresh_token is None:
+                used = db.get(RevokedRefreshToken, jti)
+                _reject_reuse(db, used.family_id, user_email)
         
         # Build JWT payload with full user data
         role_value = user.role.value if hasattr(user.role, 'value') else str(user.role)
         jwt_payload = {
             "sub": user.email,
             "id": user.id,
+            "user_id": user.id,
             "email": user.email,
             "role": role_value,
             "name": user.name,
+            "epoch": user.token_epoch or 0,
         }
         
         if hasattr(user, "photo_url") and user.photo_url:
@@ -92,14 +129,13 @@ def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
         
         # Create new access token
         access_token = create_access_token(jwt_payload)
-        
-        # Optionally create new refresh token (for token rotation security)
-        # For now, we'll return the same refresh token
-        # In production, you might want to implement token rotation
+        db.commit()
+        if jti:
+            revocation_filter.add_token(jti)
         
         return RefreshTokenResponse(
             access_token=access_token,
-            refresh_token=request.refresh_token,  # Return same refresh token
+            refresh_token=new_refresh_token,
             token_type="bearer"
         )
         
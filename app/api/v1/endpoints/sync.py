@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import time
+
+from app.db.session import get_db
+from app.core.config import settings
+from app.core.dependencies import get_current_principal
+from app.core.principal import Principal
+from app.services.sync_service import SyncService
+from app.core.server_timing import TimedRoute
+
+router = APIRouter(prefix="/sync", tags=["Sync"], route_class=TimedRoute)
+
+def _has_changes(result: dict) -> bool:
+    return bool(result["records"] or result["notifications"] or result["patients"] or result["profile"])
+
+def _poll(db: Session, user_id: int, user_role: str, since_dt, limit: Optional[int]) -> dict:
+    try:
+        return SyncService.get_changes(db, user_id, user_role, since_dt, limit)
+    finally:
+        # Akhiri transaksi agar koneksi kembali ke pool selama menunggu dan
+        # snapshot (REPEATABLE READ) tidak menahan perubahan baru
+        db.rollback()
+
+@router.get("")
+async def sync_changes(
+    since: Optional[str] = None,
+    wait: int = Query(0, ge=0, description="Long-poll: tunggu maksimal N detik sampai ada perubahan"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Delta sync: record, notifikasi, roster dan profil yang berubah setelah change token `since`"""
+    try:
+        since_dt = SyncService.decode_token(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    user_id = current_user.id
+    user_role = current_user.role.value
+    deadline = time.monotonic() + min(wait, settings.SYNC_MAX_WAIT_SECONDS)
+    while True:
+        # Query DB blocking: jalankan di thread pool agar event loop tetap melayani request lain
+        result = await run_in_threadpool(_poll, db, user_id, user_role, since_dt, limit)
+        if _has_changes(result) or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(min(settings.SYNC_POLL_INTERVAL_SECONDS, max(deadline - time.monotonic(), 0)))
+    
+    return {
+        "success": True,
+        "data": {
+            "records": result["records"],
+            "notifications": result["notifications"],
+            "patients": result["patients"],
+            "profile": result["profile"]
+        },
+        "nextToken": SyncService.encode_token(result["next_since"]),
+        "hasMore": result["has_more"],
+        "message": "Sync changes retrieved successfully"
+    }
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.medical import User
 from app.core.dependencies import get_current_user
+from app.core.server_timing import TimedRoute
 
-router = APIRouter(tags=["Authentication"])
+router = APIRouter(tags=["Authentication"], route_class=TimedRoute)
 
 @router.get("/token/verify")
 def verify_token(current_user: User = Depends(get_current_user)):
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from pydantic import BaseModel
 
 from app.db.session import get_db
-from app.models.medical import User, Patient
-from app.core.dependencies import get_current_user
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.models.medical import User, UserRole, Patient
+from app.core.dependencies import get_current_user, get_current_principal, get_read_db
+from app.core.principal import Principal
+from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token, verify_refresh_token
 from app.services.file_upload_service import FileUploadService
 from app.schemas.user import UserRegister, UserOut
-from app.schemas.refresh import LoginResponse
+from app.schemas.refresh import LoginResponse, RefreshTokenRequest
+from app.services.refresh_token_service import RefreshTokenService, revocation_filter
 from app.schemas.common import ProfilePhotoResponse, DoctorData
+from app.core.server_timing import TimedRoute, server_timing
+from app.core.rate_limit import rate_limit
+from app.core.config import settings
+from app.core.etag import CACHE_CONTROL, etag_matches, make_etag
+from app.services.doctor_directory import doctor_directory, dump_json
 
-router = APIRouter(tags=["User Management"])
+router = APIRouter(tags=["User Management"], route_class=TimedRoute)
 
 class DoctorProfileUpdateRequest(BaseModel):
     name: Optional[str] = None
@@ -126,73 +134,88 @@ async def get_doctor_profile(
     }
 
 # Register user (keep existing endpoint)
-@router.post("/register", status_code=201, response_model=UserOut)
+@router.post("/register", status_code=201, response_model=UserOut, dependencies=[Depends(rate_limit("register"))])
 async def register_user(
     user: UserRegister,
     db: Session = Depends(get_db)
 ):
     """Register new user"""
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        role = UserRole(user.role)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid role")
+    
+    # Hash Argon2 dihitung sebelum menyentuh DB agar transaksi tetap singkat
+    with server_timing("password"):
+        password_hash = get_password_hash(user.password)
     
-    # Create new user
-    password_hash = get_password_hash(user.password)
     new_user = User(
         name=user.name,
         email=user.email,
         password_hash=password_hash,
-        role=user.role
+        role=role
     )
-    
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # If user is patient, create patient record
-    if user.role == "patient":
-        patient = Patient(
-            user_id=new_user.id,
-            name=user.name,
-            email=user.email
-        )
-        db.add(patient)
-        db.commit()
+    try:
+        # Satu transaksi: flush memberi id user untuk baris pasien, lalu satu commit.
+        # Email duplikat ditangkap dari unique constraint (tanpa SELECT cek terpisah
+        # yang juga rawan race)
+        db.flush()
+        if role == UserRole.patient:
+            db.add(Patient(user_id=new_user.id, name=user.name, email=user.email))
+            db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     
-    return UserOut(
+    # Dibentuk sebelum commit: atribut belum di-expire sehingga tidak perlu refresh
+    result = UserOut(
         id=new_user.id,
         name=new_user.name,
         email=new_user.email,
         role=new_user.role.value,
         created_at=new_user.created_at
     )
+    db.commit()
+    return result
 
-# Logout (frontend only)
+# Logout
 @router.post("/auth/logout")
-async def logout_user():
-    """Logout user (frontend handles token removal)"""
+async def logout_user(request: Optional[RefreshTokenRequest] = None, db: Session = Depends(get_db)):
+    """Logout user (frontend menghapus token); refresh token yang dikirim dicabut beserta family-nya"""
+    if request is not None:
+        try:
+            payload = verify_refresh_token(request.refresh_token)
+        except Exception:
+            payload = {}
+        if payload.get("fid"):
+            RefreshTokenService.revoke_family(db, payload["fid"])
+            db.commit()
+            revocation_filter.add_family(payload["fid"])
     return {"status": "success", "message": "Logout successful"}
 
 # Get all doctors
 @router.get("/user/all-doctors", response_model=List[DoctorData])
 async def get_all_doctors(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    q: Optional[str] = Query(None, max_length=100, description="Filter nama dokter (substring)"),
+    specialization: Optional[str] = Query(None, max_length=100),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=settings.DOCTOR_DIRECTORY_MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all doctors in the system"""
-    doctors = db.query(User).filter(User.role == "doctor").all()
-    
-    return [
-        DoctorData(
-            id=doctor.id,
-            userId=doctor.id,
-            name=doctor.name,
-            email=doctor.email,
-            specialization=doctor.specialization,
-            profilePhotoUrl=f"https://dopply.my.id{doctor.photo_url}" if doctor.photo_url else None,
-            createdAt=doctor.created_at.isoformat() if doctor.created_at else None,
-            updatedAt=doctor.updated_at.isoformat() if doctor.updated_at else None
-        )
-        for doctor in doctors
-    ]
\ No newline at end of file
+    """Get all doctors in the system (dari direktori ter-cache)"""
+    directory = doctor_directory.get(db)
+    filtered = q or specialization or skip or limit is not None
+    etag = make_etag(directory.etag, q, specialization, skip, limit) if filtered else directory.etag
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if not filtered:
+        # Body sudah diserialisasi saat snapshot dibuat
+        return Response(content=directory.body, media_type="application/json", headers=headers)
+
+    entries, total = directory.search(q, specialization, skip, limit)
+    headers["X-Total-Count"] = str(total)
+    return Response(content=dump_json(entries), media_type="application/json", headers=headers)
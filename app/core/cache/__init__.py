@@ -0,0 +1,12 @@
+"""
+Application cache
+Backend in-process (LRU/TTL, dibatasi jumlah entri & byte) atau Redis, dengan
+decorator @cached untuk service dan invalidasi berbasis tag dari write path ORM.
+"""
+from app.core.cache.base import MISSING, CacheBackend, CacheStats
+from app.core.cache.decorators import cached
+from app.core.cache.invalidation import invalidate_tags, on_invalidate, register_model_tags
+from app.core.cache.memory import MemoryCache
+from app.core.cache.redis_backend import RedisCache
+from app.core.cache.store import get_cache, set_cache
+
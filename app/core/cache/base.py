@@ -0,0 +1,87 @@
+"""
+Interface backend cache
+Nilai disimpan sebagai JSON (bytes) sehingga backend in-process dan Redis
+berperilaku sama: pemanggil selalu menerima salinan, ukuran entri bisa
+dihitung, dan tidak ada pickle yang dibaca dari jaringan.
+"""
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+# Penanda cache miss (None adalah nilai yang valid)
+MISSING: Any = _Missing()
+
+
+def dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+class CacheStats:
+    """Counter per proses; thread-safe"""
+    FIELDS = ("hits", "misses", "sets", "evictions", "expirations", "invalidations", "errors")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data: Dict[str, Any] = dict(self._counts)
+        lookups = data["hits"] + data["misses"]
+        data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else None
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = {field: 0 for field in self.FIELDS}
+
+
+class CacheBackend(ABC):
+    """Interface bersama; key berupa string, nilai harus JSON-serializable"""
+
+    name = "base"
+
+    def __init__(self, default_ttl: Optional[float] = None):
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Nilai tersimpan atau MISSING"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Hapus semua entri yang memiliki salah satu tag; return jumlah entri yang dihapus"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def describe(self) -> Dict[str, Any]:
+        """Statistik + info ukuran untuk diagnostics"""
+        return {"backend": self.name, **self.stats.snapshot()}
@@ -0,0 +1,78 @@
+"""
+Decorator @cached untuk fungsi service
+Key dibentuk dari namespace + argumen (kecuali session DB). Hasil None tidak
+di-cache agar lookup negatif tidak menutupi data yang baru dibuat.
+"""
+import functools
+import inspect
+import logging
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from app.core.cache.base import MISSING
+from app.core.config import settings
+
+logger = logging.getLogger("cache")
+
+
+def cached(namespace: str, ttl: Optional[float] = None,
+           tags: Optional[Callable[..., Iterable[str]]] = None,
+           exclude: Sequence[str] = ("db",)) -> Callable:
+    """
+    Usage:
+        class ProfileService:
+            @staticmethod
+            @cached("doctor_profile", tags=lambda result, doctor_id, **_: [f"user:{doctor_id}"])
+            def get_doctor_profile(db: Session, doctor_id: int) -> Optional[dict]: ...
+
+    `tags` dipanggil dengan (result, **argumen) dan mengembalikan tag entri.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def make_key(params: dict) -> str:
+            return namespace + ":" + ":".join(repr(value) for value in params.values())
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            if not settings.CACHE_ENABLED:
+                return func(*args, **kwargs)
+            from app.core.cache.store import get_cache
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name not in exclude}
+            key = make_key(params)
+            cache = get_cache()
+            try:
+                value = cache.get(key)
+            except Exception as e:
+                # Cache bermasalah tidak boleh menjatuhkan request
+                cache.stats.incr("errors")
+                logger.error(f"Cache get failed for {key}: {e}")
+                return func(*args, **kwargs)
+            if value is not MISSING:
+                return value
+
+            value = func(*args, **kwargs)
+            if value is not None:
+                try:
+                    cache.set(key, value, ttl, tags(value, **params) if tags else ())
+                except Exception as e:
+                    cache.stats.incr("errors")
+                    logger.error(f"Cache set failed for {key}: {e}")
+            return value
+
+        def invalidate(**kwargs) -> None:
+            """Hapus entri untuk argumen tertentu (keyword saja, tanpa session DB)"""
+            from app.core.cache.store import get_cache
+            params = {
+                name: kwargs[name] if name in kwargs or parameter.default is inspect.Parameter.empty
+                else parameter.default
+                for name, parameter in signature.parameters.items() if name not in exclude
+            }
+            get_cache().delete(make_key(params))
+
+        wrapper.cache_namespace = namespace
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
@@ -0,0 +1,93 @@
+"""
+Invalidasi cache berbasis tag yang dipicu dari write path ORM
+Service mendaftarkan fungsi model -> tag; setiap flush mengumpulkan tag dari
+objek yang dibuat/diubah/dihapus, dan setelah commit tag tersebut di-invalidate
+di cache default serta diteruskan ke listener (mis. snapshot in-process).
+Rollback tidak meng-invalidate apa pun.
+"""
+import itertools
+import logging
+from typing import Callable, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("cache")
+
+_SESSION_TAGS = "cache_invalidation_tags"
+
+ALL_CHANGES = ("new", "dirty", "deleted")
+
+# model -> [(tagger, jenis perubahan yang dipantau)]
+_model_taggers: Dict[type, List[Tuple[Callable[[object], Iterable[str]], FrozenSet[str]]]] = {}
+_listeners: List[Callable[[Set[str]], None]] = []
+
+
+def register_model_tags(model: type, tagger: Callable[[object], Iterable[str]],
+                        changes: Sequence[str] = ALL_CHANGES) -> None:
+    """
+    Tag yang di-invalidate saat instance `model` berubah.
+    `changes` membatasi jenis perubahan (new / dirty / deleted) yang memicu tag.
+    """
+    _model_taggers.setdefault(model, []).append((tagger, frozenset(changes)))
+
+
+def on_invalidate(listener: Callable[[Set[str]], None]) -> None:
+    """Dipanggil dengan set tag setiap kali commit meng-invalidate sesuatu"""
+    _listeners.append(listener)
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    """Invalidasi manual (mis. setelah bulk UPDATE yang tidak lewat ORM)"""
+    from app.core.cache.store import get_cache
+    tags = set(tags)
+    if not tags:
+        return
+    try:
+        get_cache().invalidate_tags(tags)
+    except Exception as e:
+        # Backend bermasalah: entri tetap hilang sendiri setelah TTL
+        logger.error(f"Cache invalidation failed for {sorted(tags)}: {e}")
+    for listener in _listeners:
+        listener(tags)
+
+
+def _tags_for(obj: object, change: str) -> Iterable[str]:
+    for tagger, changes in _model_taggers.get(type(obj), ()):
+        if change in changes:
+            yield from tagger(obj)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tags(session, flush_context):
+    if not _model_taggers:
+        return
+    pending = None
+    changed = itertools.chain(
+        ((obj, "new") for obj in session.new),
+        ((obj, "dirty") for obj in session.dirty),
+        ((obj, "deleted") for obj in session.deleted),
+    )
+    for obj, change in changed:
+        for tag in _tags_for(obj, change):
+            if pending is None:
+                pending = session.info.setdefault(_SESSION_TAGS, set())
+            pending.add(tag)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    # after_commit juga terpanggil saat savepoint di-release; tunggu commit sebenarnya
+    if session.in_nested_transaction():
+        return
+    tags = session.info.pop(_SESSION_TAGS, None)
+    if tags:
+        invalidate_tags(tags)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session, previous_transaction):
+    # Hanya rollback transaksi paling luar yang membuang tag; rollback savepoint
+    # menyisakan tag ekstra yang hanya menyebabkan invalidasi berlebih (aman)
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_TAGS, None)
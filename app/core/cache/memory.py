@@ -0,0 +1,119 @@
+"""
+Cache in-process: LRU dengan TTL per entri, batas jumlah entri dan total byte
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.cache.base import MISSING, CacheBackend, dumps, loads
+
+
+class _Entry:
+    __slots__ = ("data", "expires_at", "tags")
+
+    def __init__(self, data: bytes, expires_at: Optional[float], tags: Tuple[str, ...]):
+        self.data = data
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class MemoryCache(CacheBackend):
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str) -> Optional[_Entry]:
+        """Hapus entri beserta indeks tag-nya; lock harus sudah dipegang"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.size_bytes -= len(entry.data)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return entry
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= self.clock():
+                self._remove(key)
+                self.stats.incr("expirations")
+                entry = None
+            if entry is None:
+                self.stats.incr("misses")
+                return MISSING
+            self._entries.move_to_end(key)
+            data = entry.data
+        self.stats.incr("hits")
+        return loads(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        data = dumps(value)
+        if len(data) > self.max_bytes:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl else None
+        tags = tuple(tags)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(data, expires_at, tags)
+            self.size_bytes += len(data)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        self.stats.incr("sets")
+        if evicted:
+            self.stats.incr("evictions", evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    if self._remove(key) is not None:
+                        removed += 1
+        if removed:
+            self.stats.incr("invalidations", removed)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            info = {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "tags": len(self._tags),
+            }
+        return {
+            **super().describe(), **info,
+            "max_entries": self.max_entries, "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,73 @@
+"""
+Backend cache Redis (dibagi antar worker)
+Client cukup kompatibel dengan redis-py: get, set(ex=), delete, sadd, expire,
+smembers, scan_iter. Tag disimpan sebagai set berisi key yang memakainya.
+"""
+import math
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.cache.base import MISSING, CacheBackend, dumps, loads
+
+
+class RedisCache(CacheBackend):
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "dopply:cache:", default_ttl: Optional[float] = None):
+        super().__init__(default_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        import redis  # dependency opsional, hanya dibutuhkan untuk backend ini
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _tag_key(self, tag: str) -> str:
+        return self.prefix + "tag:" + tag
+
+    def get(self, key: str) -> Any:
+        data = self.client.get(self._key(key))
+        if data is None:
+            self.stats.incr("misses")
+            return MISSING
+        self.stats.incr("hits")
+        return loads(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expire = max(1, math.ceil(ttl)) if ttl else None
+        full_key = self._key(key)
+        self.client.set(full_key, dumps(value), ex=expire)
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            self.client.sadd(tag_key, full_key)
+            # Set tag hidup paling tidak selama entri terlama yang memakainya
+            if expire:
+                self.client.expire(tag_key, expire)
+        self.stats.incr("sets")
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._key(key))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = list(self.client.smembers(tag_key))
+            if keys:
+                removed += self.client.delete(*keys)
+            self.client.delete(tag_key)
+        if removed:
+            self.stats.incr("invalidations", removed)
+        return removed
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def describe(self) -> Dict[str, Any]:
+        return {**super().describe(), "prefix": self.prefix}
@@ -0,0 +1,48 @@
+"""
+Cache default aplikasi, dibangun dari settings saat pertama dipakai
+"""
+import threading
+from typing import Optional
+
+from app.core.cache.base import CacheBackend
+from app.core.cache.memory import MemoryCache
+from app.core.cache.redis_backend import RedisCache
+from app.core.config import settings
+from app.core.metrics import metrics
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> CacheBackend:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if settings.CACHE_BACKEND == "redis":
+                    if not settings.CACHE_REDIS_URL:
+                        raise RuntimeError("CACHE_REDIS_URL is required for the redis cache backend")
+                    _cache = RedisCache.from_url(settings.CACHE_REDIS_URL,
+                                                 default_ttl=settings.CACHE_DEFAULT_TTL_SECONDS)
+                else:
+                    _cache = MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES,
+                                         default_ttl=settings.CACHE_DEFAULT_TTL_SECONDS)
+    return _cache
+
+
+def set_cache(cache: Optional[CacheBackend]) -> None:
+    """Ganti backend (testing / konfigurasi manual); None = bangun ulang dari settings"""
+    global _cache
+    _cache = cache
+
+
+def _stat(field: str):
+    return lambda: get_cache().stats.snapshot()[field]
+
+
+for _field in ("hits", "misses", "evictions", "invalidations"):
+    metrics.register_gauge(f"dopply_cache_{_field}", f"Application cache {_field} since startup", _stat(_field))
+metrics.register_gauge(
+    "dopply_cache_size_bytes", "Bytes held by the in-process application cache",
+    lambda: getattr(get_cache(), "size_bytes", None)
+)
@@ -0,0 +1,200 @@
+"""
+Response compression
+Middleware ASGI murni yang mengompres response (zstd / br / gzip, sesuai
+Accept-Encoding dan library yang terpasang). Response kecil dibiarkan apa
+adanya, hanya content-type tekstual yang dikompres, dan response streaming
+dikompres per chunk (sync flush) sehingga tidak ada body yang di-buffer.
+"""
+import logging
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("compression")
+
+try:
+    import brotli  # dependency opsional
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # dependency opsional
+except ImportError:
+    zstandard = None
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits 16+MAX_WBITS = format gzip (header + trailer)
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Kompres chunk dan flush agar klien bisa langsung mendekode"""
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.process(data) + self._obj.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+def available_encoders() -> Dict[str, type]:
+    """Encoding yang bisa dipakai, urut preferensi server (rasio terbaik dulu)"""
+    encoders: Dict[str, type] = {}
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    encoders["gzip"] = GzipEncoder
+    return encoders
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}"""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header: str, preferred: Sequence[str]) -> Optional[str]:
+    """Pilih encoding dengan q tertinggi; jika seri, ikuti urutan preferensi server"""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in preferred:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: Optional[int] = None,
+                 content_types: Optional[Sequence[str]] = None,
+                 levels: Optional[Dict[str, int]] = None,
+                 encoders: Optional[Dict[str, type]] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.content_types = tuple(content_types or settings.COMPRESSION_CONTENT_TYPES)
+        self.levels = levels or settings.COMPRESSION_LEVELS
+        self.encoders = encoders or available_encoders()
+
+    def _compressible(self, start: dict) -> bool:
+        headers = start.get("headers", [])
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+        if not content_type.startswith(self.content_types):
+            return False
+        length = _header(headers, b"content-length")
+        if length is not None and length.isdigit() and int(length) < self.minimum_size:
+            return False
+        return True
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = (_header(scope.get("headers", []), b"accept-encoding") or b"").decode("latin-1")
+        encoding = negotiate_encoding(accept, list(self.encoders)) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        encoder = None
+        passthrough = False
+
+        def compressed_headers(content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+            headers = [
+                (k, v) for k, v in start_message.get("headers", [])
+                if k.lower() not in (b"content-length", b"content-encoding")
+            ]
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            vary = _header(headers, b"vary")
+            if vary is None:
+                headers.append((b"vary", b"Accept-Encoding"))
+            elif b"accept-encoding" not in vary.lower():
+                headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+                headers.append((b"vary", vary + b", Accept-Encoding"))
+            if content_length is not None:
+                headers.append((b"content-length", str(content_length).encode("latin-1")))
+            return headers
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                if self._compressible(message):
+                    # Tunda start sampai chunk pertama agar ukuran body bisa dinilai
+                    start_message = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body:
+                    # Response utuh dalam satu pesan: kompres sekaligus jika cukup besar
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start_message)
+                        await send(message)
+                        return
+                    data = self.encoders[encoding](self.levels.get(encoding, 6)).finish(body)
+                    await send({**start_message, "headers": compressed_headers(len(data))})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                # Streaming: panjang total tidak diketahui, kompres per chunk
+                encoder = self.encoders[encoding](self.levels.get(encoding, 6))
+                await send({**start_message, "headers": compressed_headers(None)})
+            data = encoder.finish(body) if not more_body else encoder.compress(body)
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
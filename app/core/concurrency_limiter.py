@@ -0,0 +1,198 @@
+"""
+Adaptive concurrency limiter
+Membatasi jumlah request yang diproses bersamaan per worker. Limit diatur
+secara AIMD berdasarkan gradien latency per route: naik perlahan selama
+latency jangka pendek mendekati baseline-nya, turun multiplikatif saat latency
+melonjak. Hanya response 2xx yang dipakai sebagai sampel (401/422 cepat di
+route berat tidak boleh jadi baseline). Setiap prioritas hanya boleh memakai sebagian dari limit, sehingga
+request prioritas rendah (history browsing) ditolak lebih dulu daripada
+ingest dan auth. Request yang ditolak menerima 503 + Retry-After.
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.request_context import route_label
+
+logger = logging.getLogger("concurrency_limiter")
+
+PRIORITY_CRITICAL = "critical"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+PRIORITY_EXEMPT = "exempt"
+
+# Long-poll menghabiskan sebagian besar waktunya untuk tidur, jadi tidak dihitung
+LONG_POLL_PATHS = ("/api/v1/sync",)
+
+
+class RouteLatency:
+    __slots__ = ("short", "baseline")
+
+    def __init__(self, sample: float):
+        self.short = sample
+        self.baseline = sample
+
+
+class AdaptiveConcurrencyLimiter:
+    """Tidak thread-safe: hanya dipakai dari event loop (satu per worker)"""
+
+    SHORT_ALPHA = 0.3
+    BASELINE_ALPHA = 0.01
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int,
+                 latency_tolerance: float, backoff_ratio: float,
+                 priority_shares: Dict[str, float], decrease_cooldown: float = 1.0):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.priority_shares = priority_shares
+        self.decrease_cooldown = decrease_cooldown
+        self.inflight = 0
+        self.rejected: Dict[str, int] = {}
+        self._routes: Dict[str, RouteLatency] = {}
+        self._last_decrease = 0.0
+
+    def try_acquire(self, priority: str) -> bool:
+        allowed = max(1.0, self.limit * self.priority_shares.get(priority, 1.0))
+        if self.inflight >= allowed:
+            self.rejected[priority] = self.rejected.get(priority, 0) + 1
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, route: Optional[str], latency: Optional[float], now: Optional[float] = None) -> None:
+        """Lepas slot; latency None berarti sampel tidak dipakai untuk adaptasi"""
+        utilization = self.inflight / self.limit
+        self.inflight -= 1
+        if route is None or latency is None:
+            return
+
+        stats = self._routes.get(route)
+        if stats is None:
+            self._routes[route] = RouteLatency(latency)
+            return
+        stats.short += self.SHORT_ALPHA * (latency - stats.short)
+        gradient = stats.short / stats.baseline if stats.baseline > 0 else 1.0
+
+        # Baseline (EWMA lambat) selalu mengikuti latency, termasuk saat overload:
+        # kenaikan latency yang menetap akhirnya menjadi baseline baru sehingga
+        # limit tidak terus dipangkas sampai min_limit tanpa pernah pulih
+        stats.baseline += self.BASELINE_ALPHA * (latency - stats.baseline)
+
+        if gradient > self.latency_tolerance:
+            now = time.monotonic() if now is None else now
+            # Satu penurunan per cooldown agar satu lonjakan tidak memangkas limit berkali-kali
+            if now - self._last_decrease >= self.decrease_cooldown:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+                self._last_decrease = now
+        elif utilization >= 0.5:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"limit": round(self.limit, 2), "inflight": self.inflight, "rejected": dict(self.rejected)}
+
+
+def _is_long_poll(scope: Dict[str, Any]) -> bool:
+    if scope["path"] not in LONG_POLL_PATHS:
+        return False
+    wait = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("wait", ["0"])[0]
+    return wait not in ("", "0")
+
+
+def classify_request(scope: Dict[str, Any], priorities: Dict[str, str]) -> str:
+    """Prioritas berdasarkan prefix path terpanjang; default normal"""
+    if _is_long_poll(scope):
+        return PRIORITY_EXEMPT
+    path = scope["path"]
+    best, best_len = PRIORITY_NORMAL, -1
+    for prefix, priority in priorities.items():
+        if path.startswith(prefix) and len(prefix) > best_len:
+            best, best_len = priority, len(prefix)
+    return best
+
+
+def overload_response_body() -> bytes:
+    return json.dumps({
+        "status": "error",
+        "code": 503,
+        "error_code": "service_unavailable",
+        "message": "Server is busy, please retry shortly",
+        "error_type": "ConcurrencyLimitExceeded",
+        "detail": None
+    }).encode("utf-8")
+
+
+class ConcurrencyLimitMiddleware:
+    def __init__(self, app, limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 priorities: Optional[Dict[str, str]] = None, retry_after: Optional[int] = None):
+        self.app = app
+        self.limiter = limiter or AdaptiveConcurrencyLimiter(
+            settings.CONCURRENCY_INITIAL_LIMIT,
+            settings.CONCURRENCY_MIN_LIMIT,
+            settings.CONCURRENCY_MAX_LIMIT,
+            settings.CONCURRENCY_LATENCY_TOLERANCE,
+            settings.CONCURRENCY_BACKOFF_RATIO,
+            settings.CONCURRENCY_PRIORITY_SHARES
+        )
+        self.priorities = priorities if priorities is not None else settings.CONCURRENCY_ROUTE_PRIORITIES
+        self.retry_after = retry_after or settings.CONCURRENCY_RETRY_AFTER_SECONDS
+        metrics.register_gauge("dopply_concurrency_limit", "Current adaptive concurrency limit",
+                               lambda: self.limiter.limit)
+        metrics.register_gauge("dopply_concurrency_inflight", "Requests currently admitted by the limiter",
+                               lambda: self.limiter.inflight)
+        metrics.register_gauge("dopply_concurrency_rejected", "Requests shed since startup",
+                               lambda: sum(self.limiter.rejected.values()))
+
+    async def _reject(self, send) -> None:
+        body = overload_response_body()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        priority = classify_request(scope, self.priorities)
+        if priority == PRIORITY_EXEMPT:
+            await self.app(scope, receive, send)
+            return
+        if not self.limiter.try_acquire(priority):
+            logger.warning(f"Load shed ({priority}): {scope['method']} {scope['path']} {self.limiter.snapshot()}")
+            await self._reject(send)
+            return
+
+        start = time.perf_counter()
+        streaming = False
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal streaming, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                streaming = any(
+                    key.lower() == b"content-type" and value.startswith(b"text/event-stream")
+                    for key, value in message.get("headers", [])
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Error dan streaming tidak mencerminkan kapasitas: bukan sampel latency
+            sampled = not streaming and 200 <= status_code < 300
+            latency = time.perf_counter() - start if sampled else None
+            self.limiter.release(route_label(scope), latency)
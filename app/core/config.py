@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -13,6 +13,149 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7  # Refresh tokens last 7 days
     REFRESH_SECRET_KEY: Optional[str] = None  # Will use SECRET_KEY if not provided
+    # Parameter Argon2 hash password (hasil scripts/benchmarks/calibrate_argon2.py).
+    # Hash lama dengan parameter berbeda di-rehash otomatis saat login berhasil
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    # Filter pencabutan refresh token (Bloom filter per worker, dimuat ulang berkala dari DB)
+    REFRESH_REVOCATION_FILTER_CAPACITY: int = 100000
+    REFRESH_REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    REFRESH_REVOCATION_RELOAD_SECONDS: float = 300.0
+    # Cache payload access token terverifikasi (per worker, sampai exp)
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_MAX_ENTRIES: int = 10000
+
+    # Cek revisi Alembic saat startup: strict (gagal start) | warn (log error) | off
+    SCHEMA_CHECK_MODE: str = "warn"
+
+    # Connection pool per worker (lihat app/db/pool.py dan scripts/benchmarks/bench_pool.py)
+    DB_POOL_SIZE: int = 5
+    DB_POOL_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Batas tunggu checkout sebelum TimeoutError
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Tutup koneksi lebih tua dari ini; -1 = tidak pernah
+    DB_POOL_PRE_PING: str = "idle"  # always | idle | off
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30.0
+
+    # Read replica untuk endpoint baca berat (lihat app/db/replicas.py); kosong = semua ke primary
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    # Dialect tanpa pengukuran lag (selain PostgreSQL/MySQL) dianggap tertinggal kecuali True
+    REPLICA_ASSUME_UNMEASURED_FRESH: bool = False
+    # Baca user ke primary selama ini setelah ia menulis; sebaiknya >= MAX_LAG + LAG_CHECK
+    REPLICA_STICKY_SECONDS: float = 15.0
+
+    # Real-time notification stream (SSE)
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: int = 15
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 100
+
+    # Transactional outbox dispatcher
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 5
+
+    # Delta sync (/sync)
+    SYNC_PAGE_SIZE: int = 200
+    SYNC_MAX_WAIT_SECONDS: int = 25
+    SYNC_POLL_INTERVAL_SECONDS: float = 2.0
+    SYNC_SETTLE_SECONDS: float = 1.0  # Baris lebih baru dari ini ditunda agar transaksi yang belum commit tidak terlewat
+
+    # Metrics (/metrics, format Prometheus)
+    METRICS_ENABLED: bool = True
+    METRICS_LOCAL_ONLY: bool = True  # Hanya bisa di-scrape dari loopback / jaringan internal
+
+    # Header Server-Timing (auth, password, pool, db, logic, handler, serialization).
+    # Default off: header terlihat oleh semua klien (termasuk timing Argon2 saat login);
+    # aktifkan hanya untuk debugging / staging
+    SERVER_TIMING_ENABLED: bool = False
+
+    # Profiler on-demand untuk admin (header X-Profile: 1); default off
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: Optional[str] = None  # Default: <tmp>/dopply_profiles_<uid>, dibuat dengan mode 0700
+    PROFILE_MAX_ENTRIES: int = 50
+
+    # Query instrumentation (slow query & N+1)
+    QUERY_STATS_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_LOG_SIZE: int = 200
+    QUERY_STATS_MAX_FINGERPRINTS: int = 1000
+    N_PLUS_ONE_THRESHOLD: int = 10  # Fingerprint yang sama >= N kali dalam satu request
+
+    # Adaptive concurrency limiter (load shedding per worker)
+    CONCURRENCY_LIMIT_ENABLED: bool = True
+    CONCURRENCY_INITIAL_LIMIT: int = 20
+    CONCURRENCY_MIN_LIMIT: int = 4
+    CONCURRENCY_MAX_LIMIT: int = 200
+    CONCURRENCY_LATENCY_TOLERANCE: float = 2.0  # Latency jangka pendek > 2x baseline route = overload
+    CONCURRENCY_BACKOFF_RATIO: float = 0.9
+    CONCURRENCY_RETRY_AFTER_SECONDS: int = 1
+    # Porsi limit yang boleh dipakai tiap prioritas; prioritas rendah ditolak lebih dulu
+    CONCURRENCY_PRIORITY_SHARES: Dict[str, float] = {"critical": 1.0, "normal": 0.85, "low": 0.6}
+    # Prefix path -> prioritas (prefix terpanjang menang, default normal)
+    CONCURRENCY_ROUTE_PRIORITIES: Dict[str, str] = {
+        "/api/v1/monitoring/submit": "critical",
+        "/api/v1/monitoring/results": "critical",
+        "/api/v1/auth/login": "critical",
+        "/api/v1/auth/refresh": "critical",
+        "/api/v1/register": "critical",
+        "/api/v1/monitoring/history": "low",
+        "/api/v1/monitoring/doctor-history": "low",
+        "/api/v1/user/all-doctors": "low",
+        "/api/v1/sync": "low",
+        "/api/v1/admin/diagnostics": "low",
+        "/api/v1/monitoring/notifications/stream": "exempt",
+        "/metrics": "exempt",
+        "/static": "exempt",
+    }
+
+    # Rate limiting (token bucket per client); format budget: "<jumlah>/<second|minute|hour|day>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, str] = {
+        "login": "10/minute",
+        "register": "5/minute",
+        "refresh": "30/minute",
+        "monitoring_submit": "30/minute",
+    }
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | redis (dibagi antar worker)
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # Aktifkan jika di belakang reverse proxy tepercaya
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Limit key="device": budget agregat per user = N x budget per device
+    RATE_LIMIT_DEVICES_PER_USER: int = 3
+
+    # Application cache (app/core/cache)
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"  # memory | redis (dibagi antar worker)
+    CACHE_REDIS_URL: Optional[str] = None
+    CACHE_DEFAULT_TTL_SECONDS: float = 300.0
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Cache (role, token_epoch) per user untuk auth berbasis klaim; TTL = batas basi antar worker
+    AUTH_STATE_TTL_SECONDS: float = 5.0
+    AUTH_STATE_MAX_ENTRIES: int = 100000
+
+    # Graf otorisasi dokter-pasien di memori; TTL = batas basi antar worker
+    ACCESS_GRAPH_TTL_SECONDS: float = 10.0
+
+    # Direktori dokter ter-cache (/user/all-doctors); TTL = batas basi antar worker
+    DOCTOR_DIRECTORY_TTL_SECONDS: float = 30.0
+    DOCTOR_DIRECTORY_MAX_PAGE_SIZE: int = 200
+
+    # Kompresi response (zstd/br dipakai jika library-nya terpasang, gzip selalu tersedia)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Byte; response lebih kecil dikirim apa adanya
+    # Prefix content-type yang dikompres; text/event-stream sengaja tidak termasuk
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json",
+        "text/plain",
+        "text/csv",
+        "text/html",
+        "application/javascript",
+    ]
+    COMPRESSION_LEVELS: Dict[str, int] = {"gzip": 6, "br": 4, "zstd": 3}
 
     model_config = {
         "env_file": ".env",
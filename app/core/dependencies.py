@@ -1,9 +1,12 @@
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_db, get_read_session, SessionLocal
 from app.models.medical import User
 from app.core.security import verify_jwt_token
+from app.core.request_context import get_request_stats
+from app.core.server_timing import server_timing
+from app.core.principal import Principal, auth_state, check_principal, load_auth_state
 
 # Global security instance - avoid duplication
 security = HTTPBearer()
@@ -16,18 +19,74 @@ def get_current_user(
     Global dependency to get current authenticated user.
     Used across all endpoints to avoid code duplication.
     """
-    token = credentials.credentials
-    payload = verify_jwt_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    user_email = payload.get("sub")
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    with server_timing("auth"):
+        token = credentials.credentials
+        payload = verify_jwt_token(token)
+        if not payload:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        user_email = payload.get("sub")
+        user = db.query(User).filter(User.email == user_email).first()
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        if payload.get("epoch", 0) != (user.token_epoch or 0):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
     
+    _remember_user(user.id)
     return user
 
+def _remember_user(user_id: int) -> None:
+    # Commit berikutnya di request ini menandai user sebagai penulis (read-your-writes)
+    stats = get_request_stats()
+    if stats is not None:
+        stats.user_id = user_id
+
+def _load_auth_state(user_id: int):
+    # Session hanya dibuka saat cache auth state miss
+    db = SessionLocal()
+    try:
+        return load_auth_state(db, user_id)
+    finally:
+        db.close()
+
+def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """
+    Principal dari klaim token tanpa memuat User.
+    Untuk endpoint yang hanya butuh id & role; gunakan get_current_user jika
+    butuh field lain (nama, email terbaru, is_verified, ...).
+    """
+    with server_timing("auth"):
+        try:
+            principal = Principal.from_claims(verify_jwt_token(credentials.credentials))
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        reason = check_principal(principal, auth_state.get(principal.id, _load_auth_state))
+        if reason:
+            raise HTTPException(status_code=401, detail=reason)
+    
+    _remember_user(principal.id)
+    return principal
+
+def get_read_db(principal: Principal = Depends(get_current_principal)):
+    """
+    Session read-only untuk endpoint baca berat; diarahkan ke read replica
+    kecuali principal baru saja menulis atau replica tertinggal (lihat app/db/replicas.py).
+    """
+    db = get_read_session(principal.id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def require_admin_principal(principal: Principal = Depends(get_current_principal)) -> Principal:
+    """Seperti require_admin, tanpa memuat User"""
+    if principal.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return principal
+
 def require_role(allowed_roles: list[str]):
     """
     Decorator factory to check user roles.
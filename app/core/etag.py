@@ -0,0 +1,53 @@
+"""
+ETag & conditional GET
+ETag dihitung dari versi baris (id, updated_at, count) yang diambil dengan query
+ringan, bukan dari body response, sehingga request dengan If-None-Match yang
+cocok bisa dijawab 304 sebelum row lengkap dimuat dan diserialisasi.
+updated_at berpresisi mikrodetik (DATETIME(6) di MySQL) agar dua update dalam
+detik yang sama menghasilkan ETag berbeda.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Naikkan jika format response berubah agar ETag lama tidak dianggap valid
+ETAG_VERSION = "1"
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag (body bisa dikompres ulang) dari komponen versi"""
+    raw = "|".join(str(part.isoformat() if hasattr(part, "isoformat") else part) for part in (ETAG_VERSION,) + parts)
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Perbandingan weak sesuai RFC 9110: prefix W/ diabaikan"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(candidate) == target for candidate in if_none_match.split(","))
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Kembalikan response 304 jika If-None-Match cocok; jika tidak, pasang ETag
+    pada response yang akan dikirim endpoint dan kembalikan None.
+    Usage:
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,269 @@
+"""
+Metrics
+Histogram per-route (latency, waktu DB, jumlah query, ukuran response) dan gauge
+connection pool, diekspos di /metrics dalam format teks Prometheus.
+
+Histogram di-shard per thread: observe() hanya menulis ke shard milik thread
+pemanggil sehingga tidak perlu lock di hot path; shard digabung saat scrape.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.request_context import begin_request, end_request, get_request_stats
+from app.core.server_timing import format_server_timing
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RESPONSE_BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_ID_HEADER = b"x-request-id"
+SERVER_TIMING_HEADER = b"server-timing"
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, ...], list]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Tuple[str, ...], list]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            # Lock hanya sekali per thread, saat shard pertama kali dibuat
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # [hitungan per bucket (+Inf di akhir), sum, count]
+            series = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        """Gabungkan semua shard; bucket dikembalikan kumulatif"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: Dict[Tuple[str, ...], list] = {}
+        for shard in shards:
+            for labels, (counts, total, count) in tuple(shard.items()):
+                target = merged.get(labels)
+                if target is None:
+                    target = merged[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                for i, c in enumerate(counts):
+                    target[0][i] += c
+                target[1] += total
+                target[2] += count
+
+        result = {}
+        for labels, (counts, total, count) in merged.items():
+            cumulative, running = [], 0
+            for c in counts:
+                running += c
+                cumulative.append(running)
+            result[labels] = (cumulative, total, count)
+        return result
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (cumulative, total, count) in sorted(self.snapshot().items()):
+            bounds = [_format_value(float(b)) for b in self.buckets] + ["+Inf"]
+            for bound, value in zip(bounds, cumulative):
+                bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {value}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+    def reset(self) -> None:
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+class CallbackGauge:
+    """Gauge yang nilainya dibaca saat scrape"""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Optional[float]]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            value = self.callback()
+        except Exception:
+            value = None
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.request_latency = Histogram(
+            "dopply_http_request_duration_seconds", "HTTP request latency per route",
+            ("method", "route", "status"), LATENCY_BUCKETS
+        )
+        self.request_db_time = Histogram(
+            "dopply_http_request_db_seconds", "Time spent in database queries per request",
+            ("method", "route"), LATENCY_BUCKETS
+        )
+        self.request_queries = Histogram(
+            "dopply_http_request_queries", "Database queries executed per request",
+            ("method", "route"), QUERY_COUNT_BUCKETS
+        )
+        self.response_bytes = Histogram(
+            "dopply_http_response_size_bytes", "HTTP response body size per route",
+            ("method", "route"), RESPONSE_BYTES_BUCKETS
+        )
+        self.pool_checkout_wait = Histogram(
+            "dopply_db_pool_checkout_wait_seconds", "Time waiting to check out a pooled connection",
+            ("pool",), POOL_WAIT_BUCKETS
+        )
+        self._histograms = [self.request_latency, self.request_db_time, self.request_queries, self.response_bytes,
+                            self.pool_checkout_wait]
+        self._gauges: Dict[str, CallbackGauge] = {}
+
+    def register_gauge(self, name: str, documentation: str, callback: Callable[[], Optional[float]]) -> None:
+        self._gauges[name] = CallbackGauge(name, documentation, callback)
+
+    def register_pool_gauges(self, engine, prefix: str = "dopply_db_pool") -> None:
+        """Gauge dari engine.pool; method yang tidak dimiliki pool (mis. StaticPool) dilewati"""
+        def reader(method_name: str) -> Callable[[], Optional[float]]:
+            def read() -> Optional[float]:
+                method = getattr(engine.pool, method_name, None)
+                return method() if callable(method) else None
+            return read
+
+        self.register_gauge(f"{prefix}_size", "Configured connection pool size", reader("size"))
+        self.register_gauge(f"{prefix}_checked_out", "Connections currently checked out", reader("checkedout"))
+        self.register_gauge(f"{prefix}_checked_in", "Idle connections in the pool", reader("checkedin"))
+        self.register_gauge(f"{prefix}_overflow", "Connections opened beyond pool_size", reader("overflow"))
+        self.register_gauge(f"{prefix}_checkout_timeouts", "Checkouts that hit the pool timeout",
+                            lambda: getattr(engine.pool, "timeouts", None))
+
+    def observe_request(self, method: str, route: str, status: int, duration: Optional[float],
+                        db_time: float, query_count: int, response_bytes: int) -> None:
+        if duration is not None:
+            self.request_latency.observe((method, route, str(status)), duration)
+        self.request_db_time.observe((method, route), db_time)
+        self.request_queries.observe((method, route), query_count)
+        self.response_bytes.observe((method, route), response_bytes)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for gauge in self._gauges.values():
+            lines.extend(gauge.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for histogram in self._histograms:
+            histogram.reset()
+
+
+metrics = MetricsRegistry()
+
+
+def _incoming_request_id(scope: Dict[str, Any]) -> Optional[str]:
+    """Pakai X-Request-ID dari proxy/klien jika formatnya wajar"""
+    for key, value in scope.get("headers", []):
+        if key == REQUEST_ID_HEADER:
+            candidate = value.decode("latin-1")
+            if 0 < len(candidate) <= 64 and all(c.isalnum() or c in "-_" for c in candidate):
+                return candidate
+            return None
+    return None
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI murni yang membuka konteks request (request id, statistik DB),
+    menambahkan header X-Request-ID / Server-Timing dan mencatat metrics;
+    tidak mem-buffer body sehingga aman untuk streaming.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = metrics, collector=None,
+                 server_timing: bool = False):
+        self.app = app
+        # registry None = histogram tidak dicatat, konteks request tetap dibuka
+        self.registry = registry
+        self.server_timing = server_timing
+        if collector is None:
+            from app.core.query_stats import query_stats as collector
+        self.collector = collector
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        token = begin_request(scope, _incoming_request_id(scope))
+        stats = get_request_stats()
+        request_id_header = (REQUEST_ID_HEADER, stats.request_id.encode("latin-1"))
+        status_code = 500
+        response_bytes = 0
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                extra_headers = [request_id_header]
+                if self.server_timing:
+                    value = format_server_timing(stats, time.perf_counter() - start)
+                    extra_headers.append((SERVER_TIMING_HEADER, value.encode("latin-1")))
+                message["headers"] = list(message.get("headers", [])) + extra_headers
+                for key, value in message.get("headers", []):
+                    if key.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request(token)
+            self.collector.finish_request(stats)
+            # Durasi koneksi SSE bukan latency, jangan merusak histogram
+            duration = None if streaming else time.perf_counter() - start
+            if self.registry is not None:
+                self.registry.observe_request(
+                    scope["method"], stats.route, status_code, duration,
+                    stats.db_time, stats.query_count, response_bytes
+                )
@@ -0,0 +1,153 @@
+"""
+Principal ringan dari klaim JWT
+Endpoint yang hanya butuh id & role tidak perlu memuat row User. Satu-satunya
+state server yang dicek adalah (role, token_epoch) per user, di-cache dengan
+TTL pendek: token dengan role lama atau epoch lama (setelah revoke) ditolak.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import on_invalidate, register_model_tags
+from app.core.config import settings
+from app.models.medical import User, UserRole
+
+AUTH_TAG_PREFIX = "auth:"
+
+# Perubahan atribut ini mencabut semua token user (email = klaim sub, role = klaim role)
+CREDENTIAL_ATTRS = ("email", "password_hash", "role")
+
+# (role, token_epoch) user saat ini; None = user tidak ada
+AuthState = Optional[Tuple[UserRole, int]]
+
+
+class Principal:
+    """User terautentikasi menurut klaim token (bukan ORM object)"""
+    __slots__ = ("id", "email", "role", "epoch")
+
+    def __init__(self, id: int, email: str, role: UserRole, epoch: int = 0):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.epoch = epoch
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> "Principal":
+        """ValueError jika klaim wajib tidak ada / tidak valid"""
+        # Token dari /auth/login memakai user_id, token lama dari /refresh memakai id
+        user_id = payload.get("user_id", payload.get("id"))
+        if user_id is None or not payload.get("sub") or not payload.get("role"):
+            raise ValueError("Token is missing required claims")
+        return cls(int(user_id), payload["sub"], UserRole(payload["role"]), int(payload.get("epoch", 0)))
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, role={self.role.value})"
+
+
+class AuthStateCache:
+    """
+    user id -> (role, token_epoch) dengan TTL pendek dan batas jumlah entri (LRU).
+    Perubahan di worker ini langsung meng-invalidate entri lewat tag auth:{id};
+    perubahan dari worker lain terlihat paling lambat setelah TTL.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = settings.AUTH_STATE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.AUTH_STATE_MAX_ENTRIES if max_entries is None else max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[int, Tuple[AuthState, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, load: Callable[[int], AuthState]) -> AuthState:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        state = load(user_id)
+        with self._lock:
+            self._entries[user_id] = (state, now + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return state
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+auth_state = AuthStateCache()
+
+
+def load_auth_state(db, user_id: int) -> AuthState:
+    row = db.query(User.role, User.token_epoch).filter(User.id == user_id).first()
+    return (row.role, row.token_epoch or 0) if row else None
+
+
+def check_principal(principal: Principal, state: AuthState) -> Optional[str]:
+    """Alasan penolakan, None jika token masih berlaku"""
+    if state is None:
+        return "User not found"
+    role, epoch = state
+    if principal.epoch != epoch:
+        return "Token has been revoked"
+    if principal.role != role:
+        return "Token role is outdated"
+    return None
+
+
+def revoke_user_tokens(user: User) -> None:
+    """Tolak semua access token user yang sudah terbit (berlaku setelah commit)"""
+    user.token_epoch = (user.token_epoch or 0) + 1
+
+
+def _value_changed(history) -> bool:
+    if not history.added:
+        return False
+    # Set ke nilai yang sama tidak dihitung; nilai lama tidak dimuat = anggap berubah
+    return not history.deleted or history.added[0] != history.deleted[0]
+
+
+def credentials_changed(user: User) -> bool:
+    attrs = inspect(user).attrs
+    return any(_value_changed(getattr(attrs, name).history) for name in CREDENTIAL_ATTRS)
+
+
+@event.listens_for(Session, "before_flush")
+def _revoke_on_credential_change(session, flush_context, instances):
+    # Semua jalur ubah email / password / role (endpoint, admin, script) lewat sini
+    for obj in session.dirty:
+        if isinstance(obj, User) and credentials_changed(obj) \
+                and not _value_changed(inspect(obj).attrs.token_epoch.history):
+            revoke_user_tokens(obj)
+
+
+def _auth_state_changed(user: User):
+    attrs = inspect(user).attrs
+    if attrs.role.history.has_changes() or attrs.token_epoch.history.has_changes():
+        yield f"{AUTH_TAG_PREFIX}{user.id}"
+
+
+def _drop_auth_state(tags) -> None:
+    for tag in tags:
+        if tag.startswith(AUTH_TAG_PREFIX):
+            auth_state.invalidate(int(tag[len(AUTH_TAG_PREFIX):]))
+
+
+register_model_tags(User, _auth_state_changed, changes=("dirty",))
+register_model_tags(User, lambda user: [f"{AUTH_TAG_PREFIX}{user.id}"], changes=("deleted",))
+on_invalidate(_drop_auth_state)
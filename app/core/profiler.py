@@ -0,0 +1,226 @@
+"""
+On-demand profiler
+Request dengan header `X-Profile: 1` (atau query `_profile=1`) dari token admin
+(dicek seperti get_current_principal: epoch & role terkini) dijalankan di bawah
+cProfile; hasil pstats disimpan di ring buffer on-disk (direktori privat 0700)
+dengan key request id. Request lain hanya melewati satu pengecekan header.
+
+Catatan: cProfile di thread event loop juga merekam kode async request lain
+yang berjalan bersamaan di worker yang sama; endpoint sync diprofil di thread
+pool-nya sendiri lalu digabung.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.request_context import get_request_stats
+from app.core.time_utils import get_local_naive_now
+
+logger = logging.getLogger("profiler")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Profil thread pool yang dikumpulkan untuk request yang sedang diprofil
+_request_profiles: ContextVar[Optional[List[cProfile.Profile]]] = ContextVar("request_profiles", default=None)
+
+
+def call_profiled(func: Callable, *args, **kwargs):
+    """Panggil fungsi sync; diprofil hanya jika request aktif sedang diprofil"""
+    profiles = _request_profiles.get()
+    if profiles is None:
+        return func(*args, **kwargs)
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func, *args, **kwargs)
+    finally:
+        profiles.append(profile)
+
+
+class ProfileStore:
+    """Ring buffer file .pstats + metadata .json; file tertua dihapus saat penuh"""
+
+    def __init__(self, directory: Optional[str] = None, max_entries: Optional[int] = None):
+        self.directory = directory or settings.PROFILE_DIR or os.path.join(
+            tempfile.gettempdir(), f"dopply_profiles_{os.getuid()}"
+        )
+        self.max_entries = max_entries or settings.PROFILE_MAX_ENTRIES
+        self._lock = threading.Lock()
+
+    def _path(self, request_id: str, ext: str) -> str:
+        if not _REQUEST_ID_RE.match(request_id):
+            raise ValueError("Invalid request id")
+        return os.path.join(self.directory, f"{request_id}.{ext}")
+
+    def _ensure_private_directory(self) -> None:
+        """Profil berisi path & nama fungsi internal: hanya user proses yang boleh membaca"""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        info = os.lstat(self.directory)
+        if not os.path.isdir(self.directory) or os.path.islink(self.directory) or info.st_uid != os.getuid():
+            raise PermissionError(f"Profile directory {self.directory} is not a private directory of this user")
+        if info.st_mode & 0o077:
+            os.chmod(self.directory, 0o700)
+
+    def save(self, request_id: str, stats: pstats.Stats, meta: Dict[str, Any]) -> None:
+        with self._lock:
+            self._ensure_private_directory()
+            stats.dump_stats(self._path(request_id, "pstats"))
+            with open(self._path(request_id, "json"), "w", encoding="utf-8") as f:
+                json.dump({**meta, "request_id": request_id}, f)
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(
+            (os.path.getmtime(os.path.join(self.directory, name)), name[:-len(".json")])
+            for name in os.listdir(self.directory) if name.endswith(".json")
+        )
+        for _, request_id in entries[:max(0, len(entries) - self.max_entries)]:
+            for ext in ("json", "pstats"):
+                try:
+                    os.remove(self._path(request_id, ext))
+                except (OSError, ValueError):
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    result.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(result, key=lambda m: m.get("created_at", ""), reverse=True)
+
+    def pstats_path(self, request_id: str) -> Optional[str]:
+        try:
+            path = self._path(request_id, "pstats")
+        except ValueError:
+            return None
+        return path if os.path.exists(path) else None
+
+    def render_text(self, request_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Laporan pstats dalam bentuk teks"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        path = self.pstats_path(request_id)
+        if path is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+profile_store = ProfileStore()
+
+
+def _profile_requested(scope: Dict[str, Any]) -> bool:
+    for key, value in scope.get("headers", []):
+        if key == PROFILE_HEADER:
+            return value.strip() not in (b"", b"0", b"false")
+    query = scope.get("query_string", b"")
+    if PROFILE_QUERY_PARAM.encode() in query:
+        values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY_PARAM, [])
+        return bool(values) and values[0] not in ("", "0", "false")
+    return False
+
+
+def _is_admin(scope: Dict[str, Any]) -> bool:
+    """Sama dengan require_admin_principal: token valid, epoch & role sesuai auth state"""
+    from app.core.dependencies import _load_auth_state
+    from app.core.principal import Principal, auth_state, check_principal
+    from app.core.security import verify_access_token
+    from app.models.medical import UserRole
+    for key, value in scope.get("headers", []):
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            try:
+                principal = Principal.from_claims(verify_access_token(token))
+            except Exception:
+                return False
+            if principal.role != UserRole.admin:
+                return False
+            return check_principal(principal, auth_state.get(principal.id, _load_auth_state)) is None
+    return False
+
+
+class ProfilerMiddleware:
+    """Harus berada di dalam MetricsMiddleware agar request id sudah tersedia"""
+
+    def __init__(self, app, store: Optional[ProfileStore] = None):
+        self.app = app
+        self.store = store or profile_store
+        # cProfile tidak bisa dijalankan bertumpuk di satu thread: satu request per proses
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        # Cek auth state bisa query DB (cache miss): jalankan di thread pool
+        if scope["type"] != "http" or not _profile_requested(scope) or not await run_in_threadpool(_is_admin, scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            logger.info("Profiling skipped: another request is being profiled")
+            await self.app(scope, receive, send)
+            return
+
+        stats = get_request_stats()
+        request_id = stats.request_id if stats is not None else os.urandom(8).hex()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        profiles: List[cProfile.Profile] = []
+        token = _request_profiles.set(profiles)
+        main_profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            main_profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                main_profile.disable()
+        finally:
+            _request_profiles.reset(token)
+            self._busy.release()
+            duration = time.perf_counter() - start
+            try:
+                merged = pstats.Stats(main_profile)
+                for profile in profiles:
+                    merged.add(profile)
+                self.store.save(request_id, merged, {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": stats.route if stats is not None else None,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "created_at": get_local_naive_now().isoformat()
+                })
+                logger.info(f"Stored profile {request_id} for {scope['method']} {scope['path']}")
+            except Exception as e:
+                logger.error(f"Failed to store profile {request_id}: {e}")
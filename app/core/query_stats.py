@@ -0,0 +1,204 @@
+"""
+Query stats
+Fingerprint statement SQL (literal & parameter dinormalisasi), agregasi per
+fingerprint, capture slow query dan deteksi pola N+1 per request.
+Parameter hanya disimpan untuk sampel slow query (untuk EXPLAIN) dan tidak
+pernah dikembalikan lewat API.
+"""
+import hashlib
+import logging
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.request_context import RequestStats
+from app.core.time_utils import get_local_naive_now
+
+logger = logging.getLogger("query_stats")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Placeholder psycopg2 (%(name)s, %s), sqlite (?), named (:name, bukan cast ::type) dan $1
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+|\$\d+")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+SORT_KEYS = ("total_time", "count", "max_time", "mean_time")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """Return (fingerprint_id, fingerprint) untuk statement SQL"""
+    text = _STRING_RE.sub("?", statement)
+    text = _PARAM_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("IN (?)", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12], text
+
+
+class FingerprintStats:
+    __slots__ = ("fingerprint_id", "fingerprint", "count", "total_time", "max_time", "slow_count",
+                 "routes", "sample_statement", "sample_parameters", "sample_duration")
+
+    def __init__(self, fingerprint_id: str, text: str):
+        self.fingerprint_id = fingerprint_id
+        self.fingerprint = text
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.slow_count = 0
+        self.routes: Dict[str, int] = {}
+        self.sample_statement: Optional[str] = None
+        self.sample_parameters: Any = None
+        self.sample_duration = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint_id": self.fingerprint_id,
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_time_ms": round(self.total_time * 1000, 3),
+            "mean_time_ms": round(self.total_time * 1000 / self.count, 3) if self.count else 0.0,
+            "max_time_ms": round(self.max_time * 1000, 3),
+            "slow_count": self.slow_count,
+            "routes": dict(sorted(self.routes.items(), key=lambda item: -item[1])[:10]),
+            "explainable": self.sample_statement is not None
+        }
+
+
+class QueryStatsCollector:
+    MAX_ROUTES_PER_FINGERPRINT = 50
+
+    def __init__(self, slow_threshold_ms: Optional[float] = None, max_fingerprints: Optional[int] = None,
+                 slow_log_size: Optional[int] = None, n_plus_one_threshold: Optional[int] = None):
+        self.slow_threshold = (slow_threshold_ms if slow_threshold_ms is not None
+                               else settings.SLOW_QUERY_THRESHOLD_MS) / 1000
+        self.max_fingerprints = max_fingerprints or settings.QUERY_STATS_MAX_FINGERPRINTS
+        self.n_plus_one_threshold = n_plus_one_threshold or settings.N_PLUS_ONE_THRESHOLD
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[str, FingerprintStats] = {}
+        self._slow_log: deque = deque(maxlen=slow_log_size or settings.SLOW_QUERY_LOG_SIZE)
+        self._n_plus_one: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.dropped = 0
+
+    def record(self, statement: str, parameters: Any, duration: float,
+               stats: Optional[RequestStats] = None) -> str:
+        """Catat satu eksekusi statement; return fingerprint_id"""
+        fingerprint_id, text = fingerprint(statement)
+        route = stats.route if stats is not None else None
+        slow = duration >= self.slow_threshold
+
+        with self._lock:
+            entry = self._fingerprints.get(fingerprint_id)
+            if entry is None:
+                if len(self._fingerprints) >= self.max_fingerprints:
+                    # Batas memori: fingerprint baru diabaikan, tapi tetap dihitung
+                    self.dropped += 1
+                    return fingerprint_id
+                entry = self._fingerprints[fingerprint_id] = FingerprintStats(fingerprint_id, text)
+            entry.count += 1
+            entry.total_time += duration
+            if duration > entry.max_time:
+                entry.max_time = duration
+            if route is not None and (route in entry.routes or len(entry.routes) < self.MAX_ROUTES_PER_FINGERPRINT):
+                entry.routes[route] = entry.routes.get(route, 0) + 1
+            if slow:
+                entry.slow_count += 1
+                if duration >= entry.sample_duration:
+                    entry.sample_statement = statement
+                    entry.sample_parameters = parameters
+                    entry.sample_duration = duration
+                self._slow_log.append({
+                    "fingerprint_id": fingerprint_id,
+                    "statement": statement,
+                    "duration_ms": round(duration * 1000, 3),
+                    "route": route,
+                    "request_id": stats.request_id if stats is not None else None,
+                    "at": get_local_naive_now().isoformat()
+                })
+
+        if slow:
+            logger.warning(f"Slow query {duration * 1000:.1f} ms [{fingerprint_id}] route={route}: {text[:200]}")
+        return fingerprint_id
+
+    def finish_request(self, stats: RequestStats) -> None:
+        """Tandai fingerprint yang dieksekusi berulang kali dalam satu request sebagai kandidat N+1"""
+        suspects = [(fid, n) for fid, n in stats.fingerprint_counts.items() if n >= self.n_plus_one_threshold]
+        if not suspects:
+            return
+        route = stats.route
+        with self._lock:
+            for fingerprint_id, executions in suspects:
+                key = (route, fingerprint_id)
+                entry = self._n_plus_one.get(key)
+                if entry is None:
+                    if len(self._n_plus_one) >= self.max_fingerprints:
+                        continue
+                    known = self._fingerprints.get(fingerprint_id)
+                    entry = self._n_plus_one[key] = {
+                        "route": route,
+                        "fingerprint_id": fingerprint_id,
+                        "fingerprint": known.fingerprint if known else None,
+                        "requests": 0,
+                        "max_per_request": 0
+                    }
+                entry["requests"] += 1
+                entry["max_per_request"] = max(entry["max_per_request"], executions)
+                entry["last_request_id"] = stats.request_id
+        for fingerprint_id, executions in suspects:
+            logger.warning(f"Possible N+1: [{fingerprint_id}] executed {executions}x in {stats.method} {route}")
+
+    def top(self, sort: str = "total_time", limit: int = 20) -> List[Dict[str, Any]]:
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        with self._lock:
+            entries = list(self._fingerprints.values())
+        if sort == "mean_time":
+            key = lambda e: e.total_time / e.count if e.count else 0.0
+        else:
+            key = lambda e: getattr(e, sort)
+        return [e.to_dict() for e in sorted(entries, key=key, reverse=True)[:limit]]
+
+    def slow_queries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._slow_log)
+        return list(reversed(entries))[:limit]
+
+    def n_plus_one(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [dict(e) for e in self._n_plus_one.values()]
+        return sorted(entries, key=lambda e: (-e["requests"], -e["max_per_request"]))[:limit]
+
+    def get_sample(self, fingerprint_id: str) -> Optional[Tuple[str, Any]]:
+        """(statement, parameters) dari eksekusi paling lambat, untuk EXPLAIN"""
+        with self._lock:
+            entry = self._fingerprints.get(fingerprint_id)
+            if entry is None or entry.sample_statement is None:
+                return None
+            return entry.sample_statement, entry.sample_parameters
+
+    def reset(self) -> None:
+        with self._lock:
+            self._fingerprints.clear()
+            self._slow_log.clear()
+            self._n_plus_one.clear()
+            self.dropped = 0
+
+
+def explain_statement(connection, statement: str, parameters: Any) -> List[str]:
+    """Jalankan EXPLAIN (tanpa ANALYZE) untuk statement SELECT"""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        raise ValueError("Only SELECT statements can be explained")
+    if connection.dialect.name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        prefix = "EXPLAIN "
+    rows = connection.exec_driver_sql(prefix + statement, parameters or ()).fetchall()
+    return [" | ".join(str(value) for value in row) for row in rows]
+
+
+query_stats = QueryStatsCollector()
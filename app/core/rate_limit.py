@@ -0,0 +1,235 @@
+"""
+Rate limiting
+Token bucket per client (IP, user id atau device id) dengan budget per route
+dari `settings.RATE_LIMITS`. Budget per device selalu berada di dalam bucket
+agregat per user, karena X-Device-ID dikontrol client. Backend default in-process; untuk deployment
+multi-worker gunakan backend Redis agar bucket dibagi antar worker.
+"""
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+logger = logging.getLogger("rate_limit")
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# (allowed, retry_after_seconds, remaining_tokens)
+ConsumeResult = Tuple[bool, float, float]
+
+# (key bucket, kelipatan budget route)
+BucketSpec = Tuple[str, int]
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """'10/minute' -> (capacity=10, refill=10/60 token per detik)"""
+    try:
+        count, period = rate.strip().split("/", 1)
+        capacity = int(count)
+        seconds = PERIODS[period.strip().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit '{rate}', expected '<count>/<second|minute|hour|day>'")
+    if capacity <= 0:
+        raise ValueError(f"Invalid rate limit '{rate}', count must be positive")
+    return capacity, capacity / seconds
+
+
+class RateLimitBackend(ABC):
+    """Interface backend token bucket"""
+
+    @abstractmethod
+    def consume(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> ConsumeResult:
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Bucket per proses; key paling lama tidak dipakai dibuang saat melebihi max_keys"""
+
+    def __init__(self, max_keys: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self.clock = clock
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> ConsumeResult:
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(capacity), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(capacity), bucket[0] + (now - bucket[1]) * refill_rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, 0.0, bucket[0]
+            return False, (cost - bucket[0]) / refill_rate, bucket[0]
+
+
+# Refill + consume atomik di Redis; waktu diambil dari server Redis agar konsisten antar worker
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after), tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Bucket bersama antar worker; client kompatibel redis-py (eval)"""
+
+    def __init__(self, client, prefix: str = "dopply:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        import redis  # dependency opsional, hanya dibutuhkan untuk backend ini
+        return cls(redis.Redis.from_url(url))
+
+    def consume(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> ConsumeResult:
+        allowed, retry_after, remaining = self.client.eval(
+            TOKEN_BUCKET_SCRIPT, 1, self.prefix + key, capacity, refill_rate, cost
+        )
+        return bool(int(allowed)), float(retry_after), float(remaining)
+
+
+_backend: Optional[RateLimitBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.RATE_LIMIT_BACKEND == "redis":
+                    if not settings.RATE_LIMIT_REDIS_URL:
+                        raise RuntimeError("RATE_LIMIT_REDIS_URL is required for the redis rate limit backend")
+                    _backend = RedisRateLimitBackend.from_url(settings.RATE_LIMIT_REDIS_URL)
+                else:
+                    _backend = InMemoryRateLimitBackend()
+    return _backend
+
+
+def set_rate_limit_backend(backend: Optional[RateLimitBackend]) -> None:
+    """Ganti backend (testing / konfigurasi manual); None = bangun ulang dari settings"""
+    global _backend
+    _backend = backend
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _token_user_id(request: Request) -> Optional[str]:
+    from app.core.security import verify_access_token
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = verify_access_token(token)
+    except Exception:
+        return None
+    user_id = payload.get("user_id") or payload.get("id") or payload.get("sub")
+    return str(user_id) if user_id is not None else None
+
+
+def key_by_ip(request: Request) -> str:
+    return f"ip:{client_ip(request)}"
+
+
+def key_by_user(request: Request) -> str:
+    """User id dari token terverifikasi; request tanpa token jatuh ke IP"""
+    user_id = _token_user_id(request)
+    return f"user:{user_id}" if user_id else key_by_ip(request)
+
+
+def key_by_device(request: Request) -> List[BucketSpec]:
+    """
+    Bucket per X-Device-ID agar satu device tidak menghabiskan budget device lain,
+    ditambah bucket agregat user (RATE_LIMIT_DEVICES_PER_USER x budget) sehingga
+    mengganti-ganti device id tidak menambah budget tanpa batas.
+    """
+    base = key_by_user(request)
+    device_id = request.headers.get("x-device-id", "").strip()[:64] or "-"
+    return [(f"{base}:device:{device_id}", 1), (base, settings.RATE_LIMIT_DEVICES_PER_USER)]
+
+
+KEY_FUNCS: Dict[str, Callable[[Request], List[BucketSpec]]] = {
+    "ip": lambda request: [(key_by_ip(request), 1)],
+    "user": lambda request: [(key_by_user(request), 1)],
+    "device": key_by_device,
+}
+
+
+def rate_limit(name: str, key: str = "ip", cost: float = 1.0) -> Callable:
+    """
+    Dependency FastAPI: konsumsi token dari bucket `name` (budget di settings.RATE_LIMITS).
+    Usage: @router.post("/login", dependencies=[Depends(rate_limit("login"))])
+    """
+    key_func = KEY_FUNCS[key]
+
+    def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        rate = settings.RATE_LIMITS.get(name)
+        if not rate:
+            return
+        capacity, refill_rate = parse_rate(rate)
+        # Bucket paling sempit dulu: jika ditolak, bucket agregat tidak ikut terpotong
+        for key_suffix, scale in key_func(request):
+            bucket_key = f"{name}:{key_suffix}"
+            try:
+                allowed, retry_after, _ = get_rate_limit_backend().consume(
+                    bucket_key, capacity * scale, refill_rate * scale, cost
+                )
+            except Exception as e:
+                # Backend bermasalah (mis. Redis down) tidak boleh menjatuhkan endpoint
+                logger.error(f"Rate limit backend error for {bucket_key}: {e}")
+                return
+            if not allowed:
+                logger.warning(f"Rate limit exceeded: {bucket_key} ({rate} x{scale})")
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests, please retry later",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )
+
+    return dependency
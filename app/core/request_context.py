@@ -0,0 +1,66 @@
+"""
+Request context
+Statistik per-request (waktu DB, jumlah query) yang disimpan di ContextVar,
+sehingga hook SQLAlchemy di thread pool tetap tercatat ke request yang benar.
+"""
+import uuid
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Template path route (bukan path aktual) agar kardinalitas label tetap kecil"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestStats:
+    __slots__ = ("request_id", "method", "scope", "db_time", "query_count", "fingerprint_counts",
+                 "timings", "endpoint_end", "user_id")
+
+    def __init__(self, scope: Optional[Dict[str, Any]] = None, request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.scope = scope or {}
+        self.method = self.scope.get("method")
+        self.db_time = 0.0
+        self.query_count = 0
+        # fingerprint -> jumlah eksekusi dalam request ini (untuk deteksi N+1)
+        self.fingerprint_counts: Dict[str, int] = {}
+        # Durasi per bagian (auth, logic, serialization, ...) untuk Server-Timing
+        self.timings: Dict[str, float] = {}
+        self.endpoint_end: Optional[float] = None
+        # Diisi dependency auth; dipakai routing replica (read-your-writes)
+        self.user_id: Optional[int] = None
+
+    @property
+    def route(self) -> str:
+        # Route baru diketahui setelah routing, jadi dibaca saat dibutuhkan
+        return route_label(self.scope)
+
+    def record_query(self, duration: float, fingerprint_id: Optional[str] = None) -> None:
+        self.db_time += duration
+        self.query_count += 1
+        if fingerprint_id is not None:
+            self.fingerprint_counts[fingerprint_id] = self.fingerprint_counts.get(fingerprint_id, 0) + 1
+
+    def add_timing(self, name: str, duration: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def begin_request(scope: Optional[Dict[str, Any]] = None, request_id: Optional[str] = None) -> Token:
+    """Mulai statistik baru untuk request aktif; kembalikan token untuk end_request"""
+    return _current_stats.set(RequestStats(scope, request_id))
+
+
+def end_request(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+def get_request_stats() -> Optional[RequestStats]:
+    """Statistik request aktif, None jika dipanggil di luar request (worker, script)"""
+    return _current_stats.get()
@@ -1,18 +1,45 @@
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from uuid import uuid4
 from app.core.config import settings
-from typing import Dict, Any
+from app.core.token_cache import verified_tokens
+from typing import Dict, Any, Optional, Tuple
+import logging
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# jose dan passlib di-import saat pertama dipakai, bukan saat boot worker
+# (lihat scripts/benchmarks/bench_imports.py)
+
+logger = logging.getLogger("security")
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__rounds=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM,
+    )
+
+def __getattr__(name):
+    # Kompatibilitas: `from app.core.security import pwd_context`
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """(valid, hash baru) - hash baru terisi jika parameter hash lama berbeda dari settings"""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -23,6 +50,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 def create_refresh_token(data: dict, expires_delta: timedelta = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -33,8 +61,12 @@ def create_refresh_token(data: dict, expires_delta: timedelta = None):
     refresh_data = {
         "sub": data.get("sub"),
         "id": data.get("id"),
+        "user_id": data.get("user_id"),
         "email": data.get("email"),
         "role": data.get("role"),
+        "epoch": data.get("epoch", 0),
+        "fid": data.get("fid"),  # Family rotasi (lihat RefreshTokenService)
+        "jti": uuid4().hex,
         "exp": expire,
         "type": "refresh"
     }
@@ -42,21 +74,25 @@ def create_refresh_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 def verify_access_token(token: str) -> Dict[str, Any]:
-    import logging
-    logger = logging.getLogger("jwt_debug")
-    logger.info(f"Raw JWT token: {token}")
+    if settings.JWT_CACHE_ENABLED:
+        payload = verified_tokens.get(token)
+        if payload is not None:
+            return payload
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        logger.info(f"Decoded JWT payload: {payload}")
         if payload.get("type") != "access":
-            logger.error(f"JWT 'type' field is not 'access': {payload.get('type')}")
             raise JWTError("Invalid token type")
-        return payload
-    except Exception as e:
-        logger.error(f"JWT decode error: {e}")
+    except JWTError as e:
+        # Jangan log token mentah / payload (kredensial & data pribadi)
+        logger.warning(f"Invalid access token: {e}")
         raise Exception(f"Invalid access token: {e}")
+    if settings.JWT_CACHE_ENABLED:
+        verified_tokens.put(token, payload)
+    return payload
 
 def verify_refresh_token(token: str) -> Dict[str, Any]:
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.refresh_secret_key, algorithms=[settings.ALGORITHM])
         if payload.get("type") != "refresh":
@@ -0,0 +1,120 @@
+"""
+Server-Timing
+Timer berbasis request context untuk memecah durasi request menjadi auth,
+password (hash Argon2), pool (tunggu koneksi), db, logic (statistik/klasifikasi), handler dan serialization, lalu dikirim
+sebagai header Server-Timing sehingga terlihat di network inspector.
+"""
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from fastapi.routing import APIRoute
+
+from app.core.profiler import call_profiled
+from app.core.request_context import RequestStats, get_request_stats
+
+# Urutan entry di header; entry lain (jika ada) ditambahkan setelahnya
+TIMING_ORDER = ("auth", "password", "pool", "db", "logic", "handler", "serialization")
+
+
+@contextmanager
+def server_timing(name: str) -> Iterator[None]:
+    """Catat durasi blok ke request aktif; no-op di luar request"""
+    stats = get_request_stats()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_timing(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """Decorator untuk fungsi sync yang durasinya masuk ke entry `name`"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with server_timing(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _mark_endpoint(start: float) -> None:
+    stats = get_request_stats()
+    if stats is not None:
+        stats.endpoint_end = time.perf_counter()
+        stats.add_timing("handler", stats.endpoint_end - start)
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    # include_router membuat ulang route dengan endpoint yang sudah dibungkus
+    if getattr(endpoint, "_server_timing_wrapped", False):
+        return endpoint
+    # functools.wraps menjaga signature agar dependency injection FastAPI tetap sama
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint(start)
+        async_wrapper._server_timing_wrapped = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            # Endpoint sync berjalan di thread pool; ikut diprofil jika request sedang diprofil
+            return call_profiled(endpoint, *args, **kwargs)
+        finally:
+            _mark_endpoint(start)
+    sync_wrapper._server_timing_wrapped = True
+    return sync_wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Route yang mengukur durasi endpoint (handler) dan waktu setelah endpoint
+    selesai sampai response siap: validasi response_model, jsonable_encoder
+    dan render JSON (serialization).
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        original_handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await original_handler(request)
+            stats = get_request_stats()
+            if stats is not None and stats.endpoint_end is not None:
+                stats.add_timing("serialization", time.perf_counter() - stats.endpoint_end)
+            return response
+
+        return timed_handler
+
+
+def format_server_timing(stats: RequestStats, total: Optional[float] = None) -> str:
+    """Format header Server-Timing (durasi dalam milidetik)"""
+    timings = dict(stats.timings)
+    if stats.query_count:
+        timings["db"] = stats.db_time
+    entries = []
+    for name in TIMING_ORDER + tuple(n for n in timings if n not in TIMING_ORDER):
+        if name not in timings:
+            continue
+        entry = f"{name};dur={timings[name] * 1000:.2f}"
+        if name == "db":
+            entry += f';desc="{stats.query_count} queries"'
+        entries.append(entry)
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
@@ -0,0 +1,80 @@
+"""
+Cache payload JWT yang sudah diverifikasi
+Klien yang sama mengirim token yang sama puluhan kali selama masa berlakunya;
+verifikasi HMAC + decode JSON cukup dilakukan sekali. Key = SHA-256 token
+(token mentah tidak disimpan), entri berlaku sampai klaim `exp`.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class VerifiedTokenCache:
+    """LRU terbatas; get/put/eviction O(1) dan aman dipakai banyak thread"""
+
+    def __init__(self, max_entries: Optional[int] = None, clock: Callable[[], float] = time.time):
+        self.max_entries = settings.JWT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Salinan: pemanggil boleh mengubah payload tanpa merusak cache
+        return dict(payload)
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        expires_at = payload.get("exp")
+        # Token tanpa exp tidak di-cache (tidak ada batas kapan harus diverifikasi ulang)
+        if not isinstance(expires_at, (int, float)) or expires_at <= self._clock() or self.max_entries <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (dict(payload), float(expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+verified_tokens = VerifiedTokenCache()
+
+for _field in ("hits", "misses", "evictions", "expirations"):
+    metrics.register_gauge(
+        f"dopply_jwt_cache_{_field}", f"Verified JWT cache {_field} since startup",
+        (lambda field: lambda: getattr(verified_tokens, field))(_field)
+    )
+metrics.register_gauge("dopply_jwt_cache_entries", "Verified JWT payloads currently cached", lambda: len(verified_tokens))
@@ -0,0 +1,66 @@
+"""
+Cek revisi skema saat startup
+Skema dibuat dan diubah hanya lewat Alembic (`alembic upgrade head`); worker
+cukup membandingkan isi tabel alembic_version dengan head di alembic/versions
+(satu query kecil, tanpa refleksi tabel seperti create_all).
+"""
+import logging
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("migrations")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = PROJECT_ROOT / "alembic.ini"
+SCHEMA_CHECK_MODES = ("strict", "warn", "off")
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+class SchemaStatus(NamedTuple):
+    current: Tuple[str, ...]
+    heads: Tuple[str, ...]
+
+    @property
+    def up_to_date(self) -> bool:
+        return self.current == self.heads
+
+
+def alembic_heads() -> Tuple[str, ...]:
+    # Import di sini: alembic hanya dibutuhkan sekali saat startup
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    return tuple(sorted(ScriptDirectory.from_config(config).get_heads()))
+
+
+def get_schema_status(engine) -> SchemaStatus:
+    from alembic.runtime.migration import MigrationContext
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_heads()
+    return SchemaStatus(tuple(sorted(current)), alembic_heads())
+
+
+def verify_schema(engine, mode: str = "strict") -> Optional[SchemaStatus]:
+    """
+    strict: gagal startup jika revisi DB bukan head; warn: hanya log error; off: lewati.
+    """
+    if mode not in SCHEMA_CHECK_MODES:
+        raise ValueError(f"Unknown schema check mode {mode!r}, expected one of {SCHEMA_CHECK_MODES}")
+    if mode == "off":
+        return None
+    status = get_schema_status(engine)
+    if status.up_to_date:
+        logger.info(f"Database schema at Alembic head {', '.join(status.heads)}")
+        return status
+    message = (
+        f"Database schema revision {', '.join(status.current) or '<none>'} does not match "
+        f"Alembic head {', '.join(status.heads)}; run `alembic upgrade head`"
+    )
+    if mode == "strict":
+        raise SchemaOutOfDate(message)
+    logger.error(message)
+    return status
@@ -0,0 +1,101 @@
+"""
+Connection pool
+Ukuran pool, recycle, timeout dan strategi pre-ping diatur lewat Settings (DB_POOL_*).
+Lama menunggu checkout dicatat ke histogram metrics dan entry "pool" di Server-Timing.
+
+Strategi pre-ping:
+  always : ping setiap checkout (pool_pre_ping bawaan SQLAlchemy, +1 round trip)
+  idle   : ping hanya jika koneksi menganggur >= DB_POOL_PRE_PING_IDLE_SECONDS
+  off    : tanpa ping; andalkan pool_recycle dan retry di sisi klien
+"""
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.request_context import get_request_stats
+
+PRE_PING_STRATEGIES = ("always", "idle", "off")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool yang mengukur waktu checkout (antri + membuka koneksi baru jika perlu)"""
+
+    label = "primary"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            metrics.pool_checkout_wait.observe((self.label,), wait)
+            stats = get_request_stats()
+            if stats is not None:
+                stats.add_timing("pool", wait)
+
+    def recreate(self) -> "TimedQueuePool":
+        # engine.dispose() membuat pool baru; label & hitungan timeout dibawa
+        pool = super().recreate()
+        pool.label = self.label
+        pool.timeouts = self.timeouts
+        return pool
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def pool_options(database_url: str) -> Dict[str, Any]:
+    """Argumen create_engine untuk pool sesuai Settings"""
+    strategy = settings.DB_POOL_PRE_PING
+    if strategy not in PRE_PING_STRATEGIES:
+        raise ValueError(f"Unknown DB_POOL_PRE_PING {strategy!r}, expected one of {PRE_PING_STRATEGIES}")
+    if _is_memory_sqlite(make_url(database_url)):
+        # SQLite in-memory: satu database per koneksi, pool bawaan dialect dipertahankan
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": strategy == "always",
+    }
+
+
+def configure_pool(engine, label: str = "primary") -> None:
+    """Pasang label metrics dan ping koneksi menganggur (strategi idle)"""
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.label = label
+    if settings.DB_POOL_PRE_PING != "idle":
+        return
+    idle_seconds = settings.DB_POOL_PRE_PING_IDLE_SECONDS
+
+    @event.listens_for(engine, "checkin")
+    def _mark_idle(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            alive = engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError(f"Idle connection failed pre-ping: {e}") from e
+        if not alive:
+            # Pool membuang koneksi ini dan mencoba checkout lagi
+            raise exc.DisconnectionError("Idle connection failed pre-ping")
@@ -0,0 +1,190 @@
+"""
+Read replica
+Dependency baca (riwayat, roster, notifikasi, direktori dokter) diarahkan ke
+replica agar tidak bersaing dengan ingest ESP32 di primary. Kembali ke primary jika:
+  - user baru saja menulis (read-your-writes, penanda di cache aplikasi
+    selama REPLICA_STICKY_SECONDS sehingga berlaku lintas worker dengan Redis)
+  - lag replica > REPLICA_MAX_LAG_SECONDS, atau replica tidak bisa dihubungi
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.orm import Session
+
+from app.core.cache import MISSING, get_cache
+from app.core.config import settings
+from app.core.request_context import get_request_stats
+
+logger = logging.getLogger("replicas")
+
+_SESSION_WROTE = "replica_routing_wrote"
+READ_ONLY = "read_only"
+
+# 0 jika replica sudah me-replay semua WAL yang diterima; primary (bukan recovery) selalu 0
+_POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def _mysql_lag(connection) -> Optional[float]:
+    try:
+        row = connection.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+    except exc.DBAPIError:
+        # MySQL < 8.0.22 / MariaDB lama
+        row = connection.exec_driver_sql("SHOW SLAVE STATUS").mappings().first()
+    if row is None:
+        # Server bukan replica (tidak ada channel replikasi): datanya sama dengan primary
+        return 0.0
+    lag = row["Seconds_Behind_Source"] if "Seconds_Behind_Source" in row else row.get("Seconds_Behind_Master")
+    # NULL = SQL/IO thread berhenti atau belum tersambung
+    return None if lag is None else float(lag)
+
+
+def probe_lag(connection) -> Optional[float]:
+    """Lag replica dalam detik; None = tidak diketahui (dianggap tertinggal)"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        lag = connection.execute(_POSTGRES_LAG_SQL).scalar()
+        return None if lag is None else float(lag)
+    if dialect in ("mysql", "mariadb"):
+        return _mysql_lag(connection)
+    # Dialect lain tidak punya sinyal lag: hanya dipakai jika diizinkan eksplisit
+    # (mis. salinan SQLite lokal untuk development)
+    return 0.0 if settings.REPLICA_ASSUME_UNMEASURED_FRESH else None
+
+
+class _Replica:
+    __slots__ = ("engine", "label", "lag", "healthy", "checked_at", "lock")
+
+    def __init__(self, engine, label: str):
+        self.engine = engine
+        self.label = label
+        self.lag = float("inf")
+        self.healthy = False
+        self.checked_at = float("-inf")
+        self.lock = threading.Lock()
+
+
+class ReplicaSet:
+    """Round-robin antar replica yang sehat; lag dicek ulang paling sering tiap check interval"""
+
+    def __init__(self, engines: Sequence[Any], max_lag_seconds: Optional[float] = None,
+                 check_interval_seconds: Optional[float] = None,
+                 lag_probe: Callable[[Any], Optional[float]] = probe_lag,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_lag_seconds = settings.REPLICA_MAX_LAG_SECONDS if max_lag_seconds is None else max_lag_seconds
+        self.check_interval_seconds = (settings.REPLICA_LAG_CHECK_SECONDS
+                                       if check_interval_seconds is None else check_interval_seconds)
+        self.lag_probe = lag_probe
+        self.clock = clock
+        self._replicas = [
+            _Replica(engine, getattr(engine.pool, "label", f"replica{i}")) for i, engine in enumerate(engines, 1)
+        ]
+        self._next = itertools.count()
+        self.fallbacks = 0
+        for replica in self._replicas:
+            event.listen(replica.engine, "handle_error", self._error_listener(replica))
+
+    def __len__(self) -> int:
+        return len(self._replicas)
+
+    def _error_listener(self, replica: _Replica):
+        def on_error(exception_context):
+            # Koneksi putus di tengah request: keluarkan replica sampai cek berikutnya
+            if exception_context.is_disconnect:
+                replica.healthy = False
+        return on_error
+
+    def _refresh(self, replica: _Replica, now: float) -> None:
+        # Thread lain sedang mengecek replica ini: pakai status terakhir
+        if not replica.lock.acquire(blocking=False):
+            return
+        try:
+            try:
+                with replica.engine.connect() as connection:
+                    lag = self.lag_probe(connection)
+                replica.lag = float("inf") if lag is None else lag
+                replica.healthy = True
+            except Exception as e:
+                replica.healthy = False
+                logger.warning(f"Read replica {replica.label} unavailable: {e}")
+            replica.checked_at = now
+        finally:
+            replica.lock.release()
+
+    def choose(self):
+        """Engine replica untuk dibaca, atau None jika harus ke primary"""
+        if not self._replicas:
+            return None
+        now = self.clock()
+        start = next(self._next)
+        for i in range(len(self._replicas)):
+            replica = self._replicas[(start + i) % len(self._replicas)]
+            if now - replica.checked_at >= self.check_interval_seconds:
+                self._refresh(replica, now)
+            if replica.healthy and replica.lag <= self.max_lag_seconds:
+                return replica.engine
+        self.fallbacks += 1
+        return None
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [{"label": r.label, "healthy": r.healthy, "lag_seconds": r.lag} for r in self._replicas]
+
+
+def _sticky_key(user_id: int) -> str:
+    return f"rw:{user_id}"
+
+
+def mark_recent_write(user_id: int) -> None:
+    try:
+        get_cache().set(_sticky_key(user_id), 1, ttl=settings.REPLICA_STICKY_SECONDS)
+    except Exception as e:
+        logger.error(f"Failed to mark recent write for user {user_id}: {e}")
+
+
+def has_recent_write(user_id: int) -> bool:
+    try:
+        return get_cache().get(_sticky_key(user_id)) is not MISSING
+    except Exception:
+        # Status tidak diketahui: baca dari primary agar tetap konsisten
+        return True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info[_SESSION_WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_SESSION_WROTE] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_read_only_flush(session, flush_context, instances):
+    if session.info.get(READ_ONLY) and (session.new or session.dirty or session.deleted):
+        raise RuntimeError("Read-only session (get_read_db) cannot write; use get_db")
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_writer_after_commit(session):
+    if session.in_nested_transaction() or not session.info.pop(_SESSION_WROTE, False):
+        return
+    if not settings.DATABASE_REPLICA_URLS:
+        return
+    stats = get_request_stats()
+    if stats is not None and stats.user_id is not None:
+        mark_recent_write(stats.user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_WROTE, None)
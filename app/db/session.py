@@ -1,11 +1,69 @@
-from sqlalchemy import create_engine
+import time
+from typing import Optional
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.query_stats import query_stats
+from app.core.request_context import get_request_stats
+from app.db.pool import configure_pool, pool_options
+from app.db.replicas import READ_ONLY, ReplicaSet, has_recent_write
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = get_request_stats()
+    fingerprint_id = None
+    if settings.QUERY_STATS_ENABLED:
+        fingerprint_id = query_stats.record(statement, parameters, duration, stats)
+    if stats is not None:
+        stats.record_query(duration, fingerprint_id)
+
+def _handle_error(exception_context):
+    # Query gagal tidak memanggil after_cursor_execute; buang waktu mulai yang tersisa
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def instrument_engine(engine) -> None:
+    """Catat waktu, jumlah & fingerprint query ke statistik request aktif dan query stats"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def create_app_engine(database_url: str, label: str = "primary"):
+    """Engine dengan pool dari Settings, instrumentasi query dan metrics pool"""
+    engine = create_engine(database_url, **pool_options(database_url))
+    configure_pool(engine, label)
+    instrument_engine(engine)
+    return engine
+
+engine = create_app_engine(settings.DATABASE_URL)
+metrics.register_pool_gauges(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engines = [
+    create_app_engine(url, f"replica{i}") for i, url in enumerate(settings.DATABASE_REPLICA_URLS, 1)
+]
+for _replica in replica_engines:
+    metrics.register_pool_gauges(_replica, prefix=f"dopply_db_{_replica.pool.label}_pool")
+read_replicas = ReplicaSet(replica_engines)
+metrics.register_gauge("dopply_db_replica_fallbacks", "Reads routed to the primary because no replica was usable",
+                       lambda: read_replicas.fallbacks if len(read_replicas) else None)
+
+def get_read_session(user_id: Optional[int] = None) -> Session:
+    """Session read-only: replica kecuali user baru saja menulis atau semua replica tertinggal"""
+    bind = None
+    if len(read_replicas) and (user_id is None or not has_recent_write(user_id)):
+        bind = read_replicas.choose()
+    db = SessionLocal(bind=bind) if bind is not None else SessionLocal()
+    db.info[READ_ONLY] = True
+    return db
+
 # Dependency untuk mendapatkan DB session  
 def get_db():
     db = SessionLocal()
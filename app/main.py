@@ -1,19 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 import logging
 from app.api.v1.endpoints import user
 from app.api.v1.endpoints import admin_doctor_validation
+from app.api.v1.endpoints import admin_diagnostics
 from app.api.v1.endpoints import token_verify
 from app.api.v1.endpoints import refresh
 from app.api.v1.endpoints import patient
+from app.api.v1.endpoints import sync
+from app.api.v1.endpoints import metrics as metrics_endpoint
 from app.core.config import settings
 from app.db.session import engine
-from app.db.base import Base
+from app.db.migrations import verify_schema
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.profiler import ProfilerMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.concurrency_limiter import ConcurrencyLimitMiddleware
+from app.services.outbox_dispatcher import outbox_worker
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 from http import HTTPStatus
 import time
-from starlette.responses import StreamingResponse
+from starlette.responses import Response
 import json
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
@@ -21,11 +31,27 @@ from sqlalchemy.exc import IntegrityError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.status import HTTP_408_REQUEST_TIMEOUT, HTTP_429_TOO_MANY_REQUESTS, HTTP_502_BAD_GATEWAY, HTTP_503_SERVICE_UNAVAILABLE, HTTP_504_GATEWAY_TIMEOUT
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup hanya memverifikasi revisi Alembic; tabel dibuat lewat migrasi
+    (`alembic upgrade head`), bukan create_all di setiap worker.
+    """
+    logger.info("Application startup")
+    print("Application startup")
+    app.state.schema_status = await run_in_threadpool(verify_schema, engine, settings.SCHEMA_CHECK_MODE)
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_worker.start()
+    try:
+        yield
+    finally:
+        await outbox_worker.stop()
+        logger.info("Application shutdown")
+        print("Application shutdown")
 
 # Initialize FastAPI app with clean metadata
 app = FastAPI(
+    lifespan=lifespan,
     title="🩺 Dopply Backend API",
     description="""
 ## Fetal Heart Rate Monitoring System
@@ -78,9 +104,12 @@ from app.api.v1.endpoints import monitoring
 app.include_router(monitoring.router, prefix="/api/v1")
 
 app.include_router(admin_doctor_validation.router, prefix="/api/v1/admin")
+app.include_router(admin_diagnostics.router, prefix="/api/v1/admin")
 app.include_router(token_verify.router, prefix="/api/v1")
 app.include_router(refresh.router, prefix="/api/v1/auth")
 app.include_router(patient.router, prefix="/api/v1")
+app.include_router(sync.router, prefix="/api/v1")
+app.include_router(metrics_endpoint.router)
 
 # Other endpoint routers
 from app.api.v1.endpoints import doctor, auth
@@ -109,16 +138,10 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type"],
 )
 
-# Middleware (e.g., CORS)
-@app.on_event("startup")
-def startup_event():
-    logger.info("Application startup")
-    print("Application startup")
-
-@app.on_event("shutdown")
-def shutdown_event():
-    logger.info("Application shutdown")
-    print("Application shutdown")
+@app.get("/health", include_in_schema=False)
+async def health():
+    """Liveness/readiness: tidak menyentuh DB (revisi skema sudah dicek saat startup)"""
+    return {"status": "ok"}
 
 SENSITIVE_FIELDS = {"password", "token", "access_token", "refresh_token", "authorization"}
 MAX_LOG_BODY_SIZE = 10 * 1024  # 10 KB
@@ -155,28 +178,57 @@ async def log_requests(request: Request, call_next):
     try:
         response = await call_next(request)
         process_time = (time.time() - start_time) * 1000
-        # Log response body jika JSON dan kecil
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            # Stream SSE tidak boleh di-buffer
+            logger.info(f"Response: {request.method} {request.url} - {response.status_code} (stream) from {client_host}")
+            return response
+        # Log response body hanya jika JSON dan kecil (content-length diketahui);
+        # response besar / streaming diteruskan tanpa di-buffer
+        content_length = response.headers.get("content-length", "")
+        if not (response.headers.get("content-type", "").startswith("application/json")
+                and content_length.isdigit() and int(content_length) < MAX_LOG_BODY_SIZE):
+            logger.info(f"Response: {request.method} {request.url} - {response.status_code} ({process_time:.2f} ms) from {client_host} resp=<{content_length or 'streamed'} bytes>")
+            return response
         resp_body = b""
         if hasattr(response, "body_iterator"):
             resp_body = b"".join([chunk async for chunk in response.body_iterator])
-            response.body_iterator = iter([resp_body])
         elif hasattr(response, "body"):
             resp_body = response.body
         log_resp = None
-        if response.headers.get("content-type", "").startswith("application/json") and resp_body and len(resp_body) < MAX_LOG_BODY_SIZE:
+        if resp_body:
             try:
                 resp_json = json.loads(resp_body.decode("utf-8", errors="ignore"))
                 log_resp = mask_sensitive(resp_json)
             except Exception:
                 log_resp = "<invalid json>"
         logger.info(f"Response: {request.method} {request.url} - {response.status_code} ({process_time:.2f} ms) from {client_host} resp={log_resp}")
-        if resp_body and hasattr(response, "body_iterator"):
-            return StreamingResponse(iter([resp_body]), status_code=response.status_code, headers=dict(response.headers))
+        if hasattr(response, "body_iterator"):
+            return Response(content=resp_body, status_code=response.status_code, headers=dict(response.headers))
         return response
     except Exception as exc:
         logger.error(f"Exception during request: {request.method} {request.url} from {client_host} - {exc}")
         raise
 
+# Kompresi di luar log_requests agar log tetap melihat body asli, dan di dalam
+# MetricsMiddleware agar ukuran response yang tercatat adalah byte di jaringan
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Profiler on-demand (admin) di dalam MetricsMiddleware agar request id sudah ada
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+# Load shedding sebelum body dibaca/di-log, tapi tetap tercatat di metrics
+if settings.CONCURRENCY_LIMIT_ENABLED:
+    app.add_middleware(ConcurrencyLimitMiddleware)
+
+# Konteks request & metrics paling luar agar latency mencakup seluruh middleware lain
+app.add_middleware(
+    MetricsMiddleware,
+    registry=metrics if settings.METRICS_ENABLED else None,
+    server_timing=settings.SERVER_TIMING_ENABLED
+)
+
 def get_error_code(status_code: int) -> str:
     mapping = {
         400: "bad_request",
@@ -185,7 +237,9 @@ def get_error_code(status_code: int) -> str:
         404: "not_found",
         409: "conflict",
         422: "validation_error",
+        429: "too_many_requests",
         500: "internal_error",
+        503: "service_unavailable",
     }
     return mapping.get(status_code, "unknown_error")
 
@@ -194,6 +248,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     logger.warning(f"HTTPException: {request.method} {request.url} - {exc.status_code} - {exc.detail}")
     return JSONResponse(
         status_code=exc.status_code,
+        headers=getattr(exc, "headers", None),
         content={
             "status": "error",
             "code": exc.status_code,
@@ -287,6 +342,7 @@ async def starlette_http_exception_handler(request: Request, exc: StarletteHTTPE
     logger.warning(f"StarletteHTTPException: {request.method} {request.url} - {exc.status_code} - {msg}")
     return JSONResponse(
         status_code=exc.status_code,
+        headers=getattr(exc, "headers", None),
         content={
             "status": "error",
             "code": exc.status_code,
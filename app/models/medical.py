@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Enum, Date, Text, ForeignKey, DateTime, JSON, Boolean, Float
+from sqlalchemy import Column, Integer, String, Enum, Date, Text, ForeignKey, DateTime, JSON, Boolean, Float, Index
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
 from datetime import datetime
 from app.core.time_utils import get_local_naive_now
 
+# updated_at dipakai sebagai versi (ETag, cache key profil, token sync): DATETIME MySQL
+# default hanya presisi detik sehingga dua update dalam satu detik tidak terbedakan
+PreciseDateTime = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
 class UserRole(enum.Enum):
     admin = "admin"
     doctor = "doctor"
@@ -19,11 +24,15 @@ class User(Base):
     role = Column(Enum(UserRole), nullable=False)
     photo_url = Column(String(255), nullable=True)
     created_at = Column(DateTime, nullable=False, default=get_local_naive_now)
+    updated_at = Column(PreciseDateTime, nullable=False, default=get_local_naive_now, onupdate=get_local_naive_now, index=True)
     
     # For doctors only
     specialization = Column(String(255), nullable=True)
     is_verified = Column(Boolean, default=False)
     
+    # Dinaikkan untuk mencabut semua access token yang sudah terbit
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Relationships
     patients = relationship("Patient", back_populates="user")
     records_as_doctor = relationship("Record", back_populates="doctor", foreign_keys="Record.doctor_id")
@@ -48,6 +57,7 @@ class Patient(Base):
     birth_date = Column(Date, nullable=True)
     address = Column(String(255), nullable=True)
     medical_note = Column(Text, nullable=True)
+    updated_at = Column(PreciseDateTime, nullable=False, default=get_local_naive_now, onupdate=get_local_naive_now, index=True)
     
     user = relationship("User", back_populates="patients", foreign_keys=[user_id])
     doctor_patient_associations = relationship("DoctorPatientAssociation", back_populates="patient")
@@ -69,6 +79,11 @@ class Record(Base):
     monitoring_duration = Column(Float, nullable=True)  # Durasi monitoring dalam menit
     shared_with = Column(Integer, ForeignKey("users.id"), nullable=True)  # Dokter yang dibagikan
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)  # User yang membuat record
+    updated_at = Column(PreciseDateTime, nullable=False, default=get_local_naive_now, onupdate=get_local_naive_now, index=True)
+    
+    __table_args__ = (
+        Index("ix_records_patient_id_updated_at", "patient_id", "updated_at"),
+    )
     
     # Relationships
     patient = relationship("Patient", back_populates="records", foreign_keys="Record.patient_id")
@@ -88,8 +103,50 @@ class Notification(Base):
     message = Column(Text, nullable=False)  # Pesan notifikasi
     status = Column(Enum(NotificationStatus), nullable=False, default=NotificationStatus.unread)
     created_at = Column(DateTime, nullable=False, default=get_local_naive_now)
+    updated_at = Column(PreciseDateTime, nullable=False, default=get_local_naive_now, onupdate=get_local_naive_now)
+    
+    __table_args__ = (
+        Index("ix_notifications_doctor_id_id", "to_doctor_id", "id"),
+        Index("ix_notifications_doctor_id_updated_at", "to_doctor_id", "updated_at"),
+    )
     
     # Relationships
     record = relationship("Record", back_populates="notifications", foreign_keys="Notification.record_id")
     from_patient = relationship("Patient", foreign_keys=[from_patient_id])
     to_doctor = relationship("User", back_populates="notifications", foreign_keys="Notification.to_doctor_id")
+
+class OutboxEvent(Base):
+    """Event yang ditulis dalam transaksi yang sama dengan perubahan data, diproses oleh dispatcher"""
+    __tablename__ = "outbox_events"
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=get_local_naive_now)
+    processed_at = Column(DateTime, nullable=True, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+class DoctorNotificationCounter(Base):
+    """Counter notifikasi per dokter (denormalisasi) agar badge count tidak perlu COUNT(*)"""
+    __tablename__ = "doctor_notification_counters"
+    doctor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_count = Column(Integer, nullable=False, default=0)
+    unread_count = Column(Integer, nullable=False, default=0)
+    read_up_to_id = Column(Integer, nullable=False, default=0)  # Watermark: semua notifikasi dengan id <= ini sudah dibaca
+    updated_at = Column(PreciseDateTime, nullable=False, default=get_local_naive_now, onupdate=get_local_naive_now)
+
+class RefreshTokenFamily(Base):
+    """Satu rantai refresh token hasil rotasi, dimulai dari satu login"""
+    __tablename__ = "refresh_token_families"
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=get_local_naive_now)
+    revoked_at = Column(DateTime, nullable=True, index=True)
+
+class RevokedRefreshToken(Base):
+    """Refresh token yang sudah dirotasi / dicabut; baris boleh dihapus setelah expires_at"""
+    __tablename__ = "revoked_refresh_tokens"
+    jti = Column(String(32), primary_key=True)
+    family_id = Column(String(32), ForeignKey("refresh_token_families.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # UTC, sama dengan klaim exp token
+    revoked_at = Column(DateTime, nullable=False, default=get_local_naive_now)
@@ -139,3 +139,18 @@ class NotificationListResponse(BaseModel):
     
     notifications: List[NotificationItem]
     unread_count: int
+    total_count: Optional[int] = None
+
+# Request untuk tandai banyak notifikasi sebagai sudah dibaca
+class NotificationBulkReadRequest(BaseModel):
+    notification_ids: Optional[List[int]] = None
+    up_to_id: Optional[int] = None  # Watermark: tandai semua notifikasi dengan id <= up_to_id
+    up_to_created_at: Optional[datetime] = None  # Watermark berdasarkan waktu dibuat
+
+# Response bulk mark-as-read
+class NotificationBulkReadResponse(BaseModel):
+    success: bool
+    message: str
+    updated_count: int
+    unread_count: int
+    read_up_to_id: int
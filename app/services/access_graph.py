@@ -0,0 +1,162 @@
+# Graf otorisasi dokter-pasien di memori (siapa boleh mengakses pasien mana)
+import logging
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import on_invalidate, register_model_tags
+from app.core.config import settings
+from app.models.medical import Patient, DoctorPatientAssociation
+
+logger = logging.getLogger("access_graph")
+
+ACCESS_GRAPH_TAG = "access_graph"
+EMPTY: FrozenSet[int] = frozenset()
+
+
+class AccessSnapshot:
+    """
+    Isi graf pada satu waktu; tidak diubah setelah dibuat sehingga bisa dibaca
+    dari banyak thread tanpa lock.
+    - patient_owner: patient id -> user id pemilik
+    - user_patient: user id pasien -> patient id
+    - doctor_patients: doctor id -> frozenset patient id
+    """
+    __slots__ = ("patient_owner", "user_patient", "doctor_patients", "version", "checked_at")
+
+    def __init__(self, patient_owner: Dict[int, int], user_patient: Dict[int, int],
+                 doctor_patients: Dict[int, FrozenSet[int]], version: Tuple, checked_at: float):
+        self.patient_owner = patient_owner
+        self.user_patient = user_patient
+        self.doctor_patients = doctor_patients
+        self.version = version
+        self.checked_at = checked_at
+
+    def owner_of(self, patient_id: int) -> Optional[int]:
+        return self.patient_owner.get(patient_id)
+
+
+class AccessGraph:
+    """
+    Dimuat sekali per worker lalu dijaga koheren lewat tag "access_graph"
+    (assignment baru/dihapus, pasien baru). Perubahan dari worker lain
+    terdeteksi setelah TTL lewat query versi; jawaban "tidak" untuk relasi
+    yang belum dikenal dicek ulang ke DB agar assignment baru tidak ditolak.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = settings.ACCESS_GRAPH_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._snapshot: Optional[AccessSnapshot] = None
+        self._generation = 0
+        self.loads = 0
+
+    @staticmethod
+    def _version(db: Session) -> Tuple:
+        patients = db.query(func.count(Patient.id), func.max(Patient.id)).one()
+        associations = db.query(
+            func.count(DoctorPatientAssociation.patient_id),
+            func.sum(DoctorPatientAssociation.patient_id),
+            func.sum(DoctorPatientAssociation.doctor_id),
+            func.max(DoctorPatientAssociation.assigned_at)
+        ).one()
+        return tuple(patients) + tuple(associations)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    def _load(self, db: Session, version: Tuple, now: float) -> AccessSnapshot:
+        generation = self._generation
+        rows = db.query(Patient.id, Patient.user_id).all()
+        # Dict, bukan array per id: id pasien bisa jarang/besar (auto-increment, data lama dihapus)
+        patient_owner: Dict[int, int] = {}
+        user_patient: Dict[int, int] = {}
+        for patient_id, user_id in rows:
+            patient_owner[patient_id] = user_id
+            user_patient.setdefault(user_id, patient_id)
+
+        grouped: Dict[int, set] = {}
+        for doctor_id, patient_id in db.query(DoctorPatientAssociation.doctor_id, DoctorPatientAssociation.patient_id):
+            grouped.setdefault(doctor_id, set()).add(patient_id)
+        doctor_patients = {doctor_id: frozenset(ids) for doctor_id, ids in grouped.items()}
+
+        snapshot = AccessSnapshot(patient_owner, user_patient, doctor_patients, version, now)
+        self.loads += 1
+        # Jangan simpan snapshot jika ada invalidasi selama load
+        if generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self, db: Session) -> AccessSnapshot:
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - snapshot.checked_at < self.ttl_seconds:
+            return snapshot
+        version = self._version(db)
+        if snapshot is not None and snapshot.version == version:
+            snapshot.checked_at = now
+            return snapshot
+        return self._load(db, version, now)
+
+    def _refresh_if_stale(self, found: bool) -> bool:
+        """Relasi ada di DB tapi belum di snapshot: muat ulang graf"""
+        if found:
+            logger.info("Access graph is stale, reloading")
+            self.invalidate()
+        return found
+
+    def owner_of(self, db: Session, patient_id: int) -> Optional[int]:
+        """User id pemilik pasien, None jika pasien tidak ada"""
+        owner = self.snapshot(db).owner_of(patient_id)
+        if owner is None:
+            owner = db.query(Patient.user_id).filter(Patient.id == patient_id).scalar()
+            self._refresh_if_stale(owner is not None)
+        return owner
+
+    def patient_id_for_user(self, db: Session, user_id: int) -> Optional[int]:
+        patient_id = self.snapshot(db).user_patient.get(user_id)
+        if patient_id is None:
+            patient_id = db.query(Patient.id).filter(Patient.user_id == user_id).order_by(Patient.id).limit(1).scalar()
+            self._refresh_if_stale(patient_id is not None)
+        return patient_id
+
+    def assigned_patient_ids(self, db: Session, doctor_id: int) -> FrozenSet[int]:
+        patient_ids = self.snapshot(db).doctor_patients.get(doctor_id)
+        if patient_ids is None:
+            # Dokter belum dikenal snapshot (mis. assignment pertama dibuat di worker lain)
+            patient_ids = frozenset(
+                patient_id for (patient_id,) in db.query(DoctorPatientAssociation.patient_id).filter(
+                    DoctorPatientAssociation.doctor_id == doctor_id
+                )
+            )
+            self._refresh_if_stale(bool(patient_ids))
+        return patient_ids
+
+    def is_assigned(self, db: Session, doctor_id: int, patient_id: int) -> bool:
+        if patient_id in self.snapshot(db).doctor_patients.get(doctor_id, EMPTY):
+            return True
+        found = db.query(DoctorPatientAssociation.patient_id).filter(
+            DoctorPatientAssociation.doctor_id == doctor_id,
+            DoctorPatientAssociation.patient_id == patient_id
+        ).first() is not None
+        return self._refresh_if_stale(found)
+
+    def can_access_patient(self, db: Session, user_id: int, role: str, patient_id: int) -> bool:
+        """Admin: semua; pasien: datanya sendiri; dokter: pasien yang ditugaskan"""
+        if role == "admin":
+            return True
+        if role == "patient":
+            return self.owner_of(db, patient_id) == user_id
+        if role == "doctor":
+            return self.is_assigned(db, user_id, patient_id)
+        return False
+
+
+access_graph = AccessGraph()
+
+register_model_tags(DoctorPatientAssociation, lambda association: [ACCESS_GRAPH_TAG])
+# user_id pasien tidak pernah berubah; hanya pasien baru/dihapus yang mengubah graf
+register_model_tags(Patient, lambda patient: [ACCESS_GRAPH_TAG], changes=("new", "deleted"))
+on_invalidate(lambda tags: access_graph.invalidate() if ACCESS_GRAPH_TAG in tags else None)
@@ -0,0 +1,116 @@
+# Direktori dokter ter-cache di memori untuk /user/all-doctors
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import on_invalidate, register_model_tags
+from app.core.config import settings
+from app.core.etag import make_etag
+from app.models.medical import User, UserRole
+
+DIRECTORY_TAG = "doctors"
+
+
+def format_doctor(doctor: User) -> Dict[str, Any]:
+    """Bentuk sama dengan schema DoctorData"""
+    return {
+        "id": doctor.id,
+        "userId": doctor.id,
+        "name": doctor.name,
+        "email": doctor.email,
+        "specialization": doctor.specialization,
+        "profilePhotoUrl": f"https://dopply.my.id{doctor.photo_url}" if doctor.photo_url else None,
+        "createdAt": doctor.created_at.isoformat() if doctor.created_at else None,
+        "updatedAt": doctor.updated_at.isoformat() if doctor.updated_at else None
+    }
+
+
+def dump_json(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class DirectorySnapshot:
+    """Daftar dokter yang sudah diserialisasi; isinya tidak diubah setelah dibuat"""
+    __slots__ = ("entries", "body", "etag", "version", "checked_at", "_index")
+
+    def __init__(self, entries: List[Dict[str, Any]], version: Tuple, checked_at: float):
+        self.entries = entries
+        self.body = dump_json(entries)
+        self.version = version
+        self.etag = make_etag("doctor-directory", *version)
+        self.checked_at = checked_at
+        self._index = [
+            ((entry["name"] or "").lower(), (entry["specialization"] or "").lower())
+            for entry in entries
+        ]
+
+    def search(self, q: Optional[str] = None, specialization: Optional[str] = None,
+               skip: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Filter nama (substring) dan spesialisasi (case-insensitive). Returns: (halaman, total)"""
+        q = q.strip().lower() if q else None
+        specialization = specialization.strip().lower() if specialization else None
+        matches = [
+            entry for entry, (name, spec) in zip(self.entries, self._index)
+            if (not q or q in name) and (not specialization or spec == specialization)
+        ]
+        end = None if limit is None else skip + limit
+        return matches[skip:end], len(matches)
+
+
+class DoctorDirectory:
+    """
+    Snapshot direktori di-cache per worker. Perubahan dokter di worker ini
+    langsung meng-invalidate (tag "doctors" dari write path ORM); perubahan
+    dari worker lain terdeteksi paling lambat setelah TTL lewat query versi
+    yang ringan.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = settings.DOCTOR_DIRECTORY_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._snapshot: Optional[DirectorySnapshot] = None
+        self._generation = 0
+        self.loads = 0
+
+    @staticmethod
+    def _version(db: Session) -> Tuple:
+        # count + sum(id) menangkap hapus+tambah, max(updated_at) menangkap update
+        return tuple(db.query(
+            func.count(User.id), func.sum(User.id), func.max(User.updated_at)
+        ).filter(User.role == UserRole.doctor).one())
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    def get(self, db: Session) -> DirectorySnapshot:
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - snapshot.checked_at < self.ttl_seconds:
+            return snapshot
+
+        version = self._version(db)
+        if snapshot is not None and snapshot.version == version:
+            snapshot.checked_at = now
+            return snapshot
+
+        generation = self._generation
+        doctors = db.query(User).filter(User.role == UserRole.doctor).order_by(User.id).all()
+        snapshot = DirectorySnapshot([format_doctor(doctor) for doctor in doctors], version, now)
+        self.loads += 1
+        # Jangan simpan snapshot jika ada invalidasi selama load
+        if generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+
+
+doctor_directory = DoctorDirectory()
+
+
+# role bisa masih berupa string jika baru di-set dari request (register)
+register_model_tags(
+    User, lambda user: [DIRECTORY_TAG] if user.role in (UserRole.doctor, UserRole.doctor.value) else []
+)
+on_invalidate(lambda tags: doctor_directory.invalidate() if DIRECTORY_TAG in tags else None)
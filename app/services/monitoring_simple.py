@@ -1,10 +1,17 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from app.models.medical import User, Patient, Record, Notification, DoctorPatientAssociation, NotificationStatus, UserRole
 from app.core.time_utils import get_local_now
+from app.core.server_timing import server_timing, timed
+from app.services.outbox_dispatcher import OutboxDispatcher, outbox_worker, RECORD_SHARED
+from app.services.notification_counter_service import NotificationCounterService
+from app.services.access_graph import access_graph
 import json
 
+MAX_BULK_NOTIFICATION_IDS = 1000
+
 class MonitoringService:
     @staticmethod
     def save_monitoring_record(db: Session, request, user_id: int) -> Dict[str, Any]:
@@ -49,6 +56,7 @@ class MonitoringService:
     """Service sederhana untuk monitoring sesuai FIX.md"""
     
     @staticmethod
+    @timed("logic")
     def classify_bpm(bpm_data: List[int], gestational_age: int) -> str:
         """Klasifikasi sederhana BPM berdasarkan rata-rata"""
         if not bpm_data:
@@ -82,33 +90,57 @@ class MonitoringService:
             doctor_email = None
         # ...existing code...
     @staticmethod
-    def get_monitoring_history(db: Session, user_id: int, user_role: str, 
-                              patient_id: Optional[int] = None, 
-                              skip: int = 0, limit: int = 20) -> Dict[str, Any]:
-        """Ambil riwayat monitoring berdasarkan role"""
-        
+    def _history_query(db: Session, user_id: int, user_role: str, patient_id: Optional[int] = None):
+        """Query record yang boleh dilihat user; None jika pasien belum punya data"""
         query = db.query(Record).join(Patient)
         
         if user_role == "patient":
             # Pasien hanya bisa lihat recordnya sendiri
-            patient = db.query(Patient).filter(Patient.user_id == user_id).first()
-            if not patient:
-                return {"records": [], "total_count": 0}
-            query = query.filter(Record.patient_id == patient.id)
+            own_patient_id = access_graph.patient_id_for_user(db, user_id)
+            if own_patient_id is None:
+                return None
+            query = query.filter(Record.patient_id == own_patient_id)
             
         elif user_role == "doctor":
             # Dokter bisa lihat record pasien yang ditugaskan atau yang dia buat
             if patient_id:
                 query = query.filter(Record.patient_id == patient_id)
             else:
-                # Ambil semua pasien yang ditugaskan ke dokter ini
-                assigned_patient_ids = db.query(DoctorPatientAssociation.patient_id).filter(
-                    DoctorPatientAssociation.doctor_id == user_id
-                ).subquery()
+                # Pasien yang ditugaskan ke dokter ini (dari graf otorisasi, tanpa subquery)
+                assigned_patient_ids = sorted(access_graph.assigned_patient_ids(db, user_id))
                 query = query.filter(
                     (Record.patient_id.in_(assigned_patient_ids)) | 
                     (Record.created_by == user_id)
                 )
+        return query
+
+    @staticmethod
+    def get_monitoring_history_version(db: Session, user_id: int, user_role: str,
+                                       patient_id: Optional[int] = None) -> tuple:
+        """
+        Versi riwayat untuk ETag dalam satu query agregat: jumlah & id record,
+        updated_at terbaru dari record, pasien dan dokter yang ikut ditampilkan
+        """
+        query = MonitoringService._history_query(db, user_id, user_role, patient_id)
+        if query is None:
+            return (0,)
+        doctor = aliased(User)
+        return tuple(query.outerjoin(
+            doctor, doctor.id == func.coalesce(Record.shared_with, Record.doctor_id)
+        ).with_entities(
+            func.count(Record.id), func.sum(Record.id), func.max(Record.updated_at),
+            func.max(Patient.updated_at), func.max(doctor.updated_at)
+        ).one())
+
+    @staticmethod
+    def get_monitoring_history(db: Session, user_id: int, user_role: str, 
+                              patient_id: Optional[int] = None, 
+                              skip: int = 0, limit: int = 20) -> Dict[str, Any]:
+        """Ambil riwayat monitoring berdasarkan role"""
+        
+        query = MonitoringService._history_query(db, user_id, user_role, patient_id)
+        if query is None:
+            return {"records": [], "total_count": 0}
         
         total_count = query.count()
         records = query.order_by(Record.start_time.desc()).offset(skip).limit(limit).all()
@@ -120,14 +152,15 @@ class MonitoringService:
             # Hitung average BPM
             average_bpm = 0.0
             if record.bpm_data:
-                try:
-                    bpm_data = record.bpm_data
-                    if isinstance(bpm_data, str):
-                        bpm_data = json.loads(bpm_data)
-                    if isinstance(bpm_data, list) and bpm_data:
-                        average_bpm = sum(bpm_data) / len(bpm_data)
-                except:
-                    pass
+                with server_timing("logic"):
+                    try:
+                        bpm_data = record.bpm_data
+                        if isinstance(bpm_data, str):
+                            bpm_data = json.loads(bpm_data)
+                        if isinstance(bpm_data, list) and bpm_data:
+                            average_bpm = sum(bpm_data) / len(bpm_data)
+                    except:
+                        pass
             
             # Ambil info dokter jika record sudah dibagikan ke dokter
             doctor_id = getattr(record, "doctor_id", None)
@@ -177,25 +210,20 @@ class MonitoringService:
         
         record.shared_with = doctor_id
         
-        # Buat notifikasi untuk dokter
-        patient = db.query(Patient).filter(Patient.id == patient_id).first()
-        message = f"Pasien {patient.name} membagikan hasil monitoring. {notes or ''}"
-        
-        notification = Notification(
-            from_patient_id=patient_id,
-            to_doctor_id=doctor_id,
-            record_id=record_id,
-            message=message,
-            status=NotificationStatus.unread
-        )
-        
-        db.add(notification)
+        # Notifikasi untuk dokter dibuat oleh outbox dispatcher setelah commit
+        OutboxDispatcher.enqueue(db, RECORD_SHARED, {
+            "record_id": record_id,
+            "patient_id": patient_id,
+            "doctor_ids": [doctor_id],
+            "message_template": "Pasien {patient_name} membagikan hasil monitoring. "
+                                + (notes or "").replace("{", "{{").replace("}", "}}")
+        })
         db.commit()
+        outbox_worker.wake()
         
         return {
             "message": "Hasil monitoring berhasil dibagikan ke dokter",
-            "shared_at": get_local_now(),
-            "notification_id": notification.id
+            "shared_at": get_local_now()
         }
     
     @staticmethod
@@ -271,13 +299,21 @@ class MonitoringService:
         }
     
     @staticmethod
-    def get_doctor_notifications(db: Session, doctor_id: int, skip: int = 0, limit: int = 20) -> Dict[str, Any]:
+    def get_doctor_notifications(db: Session, doctor_id: int, skip: int = 0, limit: int = 20,
+                                 unread_only: bool = False) -> Dict[str, Any]:
         """Ambil notifikasi dokter"""
         
         query = db.query(Notification).filter(Notification.to_doctor_id == doctor_id)
         
-        total_count = query.count()
-        unread_count = query.filter(Notification.status == NotificationStatus.unread).count()
+        # Badge count dari counter denormalisasi (O(1)), bukan COUNT(*) atas riwayat notifikasi
+        counts = NotificationCounterService.get_counts(db, doctor_id)
+        
+        if unread_only:
+            # Semua id <= watermark sudah dibaca, jadi scan index cukup dimulai setelah watermark
+            query = query.filter(
+                Notification.id > counts["read_up_to_id"],
+                Notification.status == NotificationStatus.unread
+            )
         
         notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
         
@@ -296,27 +332,83 @@ class MonitoringService:
         
         return {
             "notifications": notification_list,
-            "unread_count": unread_count
+            "unread_count": counts["unread_count"],
+            "total_count": counts["total_count"]
         }
     
     @staticmethod
     def mark_notification_read(db: Session, notification_id: int, doctor_id: int) -> Dict[str, Any]:
         """Tandai notifikasi sebagai sudah dibaca"""
         
-        notification = db.query(Notification).filter(
+        # UPDATE bersyarat: dua request bersamaan hanya satu yang mengubah baris,
+        # sehingga counter unread hanya dikurangi sekali
+        updated = db.query(Notification).filter(
+            Notification.id == notification_id,
+            Notification.to_doctor_id == doctor_id,
+            Notification.status == NotificationStatus.unread
+        ).update({Notification.status: NotificationStatus.read}, synchronize_session=False)
+        
+        if updated:
+            NotificationCounterService.decrement_unread(db, doctor_id, updated)
+            db.commit()
+        elif not db.query(Notification.id).filter(
             Notification.id == notification_id,
             Notification.to_doctor_id == doctor_id
-        ).first()
-        
-        if not notification:
+        ).first():
             raise ValueError("Notifikasi tidak ditemukan")
         
-        notification.status = NotificationStatus.read
+        return {
+            "success": True,
+            "message": "Notifikasi ditandai sebagai sudah dibaca"
+        }
+    
+    @staticmethod
+    def mark_notifications_read_bulk(db: Session, doctor_id: int,
+                                     notification_ids: Optional[List[int]] = None,
+                                     up_to_id: Optional[int] = None,
+                                     up_to_created_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """Tandai banyak notifikasi sebagai sudah dibaca dengan satu UPDATE"""
+        
+        if notification_ids:
+            if up_to_id is not None or up_to_created_at is not None:
+                raise ValueError("Gunakan notification_ids atau watermark, tidak keduanya")
+            if len(notification_ids) > MAX_BULK_NOTIFICATION_IDS:
+                raise ValueError(f"Maksimal {MAX_BULK_NOTIFICATION_IDS} notifikasi per request")
+        elif up_to_id is None and up_to_created_at is None:
+            raise ValueError("notification_ids, up_to_id atau up_to_created_at wajib diisi")
+        
+        query = db.query(Notification).filter(
+            Notification.to_doctor_id == doctor_id,
+            Notification.status == NotificationStatus.unread
+        )
+        
+        watermark = None
+        if notification_ids:
+            query = query.filter(Notification.id.in_(notification_ids))
+        else:
+            # Watermark = id notifikasi terakhir milik dokter yang sudah ada, agar watermark
+            # tidak melampaui notifikasi yang belum dibuat (notifikasi baru tetap unread)
+            watermark_query = db.query(func.max(Notification.id)).filter(Notification.to_doctor_id == doctor_id)
+            if up_to_id is not None:
+                watermark_query = watermark_query.filter(Notification.id <= up_to_id)
+            if up_to_created_at is not None:
+                watermark_query = watermark_query.filter(Notification.created_at <= up_to_created_at)
+            watermark = watermark_query.scalar() or 0
+            query = query.filter(Notification.id <= watermark)
+        
+        updated = query.update({Notification.status: NotificationStatus.read}, synchronize_session=False)
+        NotificationCounterService.decrement_unread(db, doctor_id, updated)
+        if watermark:
+            NotificationCounterService.advance_watermark(db, doctor_id, watermark)
         db.commit()
         
+        counts = NotificationCounterService.get_counts(db, doctor_id)
         return {
             "success": True,
-            "message": "Notifikasi ditandai sebagai sudah dibaca"
+            "message": f"{updated} notifikasi ditandai sebagai sudah dibaca",
+            "updated_count": updated,
+            "unread_count": counts["unread_count"],
+            "read_up_to_id": counts["read_up_to_id"]
         }
     
     @staticmethod
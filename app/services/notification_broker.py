@@ -0,0 +1,162 @@
+"""
+Notification broker
+Pub/sub in-process untuk push notifikasi real-time ke dokter (SSE).
+Implementasi default menyimpan subscriber di memori worker; ganti dengan
+broker eksternal (Redis pub/sub, dsb.) lewat set_notification_broker().
+"""
+import asyncio
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger("notification_broker")
+
+
+class NotificationBroker(ABC):
+    """Interface broker notifikasi per dokter"""
+
+    @abstractmethod
+    def publish(self, doctor_id: int, event: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, doctor_id: int) -> "NotificationSubscription":
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription: "NotificationSubscription") -> None:
+        ...
+
+
+class NotificationSubscription:
+    """Antrian event milik satu koneksi stream"""
+
+    def __init__(self, doctor_id: int, loop: asyncio.AbstractEventLoop, max_queue_size: int = 100):
+        self.doctor_id = doctor_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+
+    def put_nowait(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client terlalu lambat; buang event paling lama agar tidak memblokir publisher
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Ambil event berikutnya, None jika timeout (dipakai untuk heartbeat)"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InMemoryNotificationBroker(NotificationBroker):
+    """Broker in-process; aman dipanggil dari event loop maupun threadpool"""
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[int, Set[NotificationSubscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, doctor_id: int) -> NotificationSubscription:
+        subscription = NotificationSubscription(doctor_id, asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(doctor_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: NotificationSubscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.doctor_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.doctor_id]
+
+    def subscriber_count(self, doctor_id: Optional[int] = None) -> int:
+        with self._lock:
+            if doctor_id is not None:
+                return len(self._subscribers.get(doctor_id, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def publish(self, doctor_id: int, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(doctor_id, ()))
+        for subscription in subscribers:
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is subscription.loop:
+                subscription.put_nowait(event)
+            else:
+                # Dipanggil dari thread lain (endpoint sync / background worker)
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.put_nowait, event)
+                except RuntimeError:
+                    logger.warning(f"Dropping notification for doctor_id={doctor_id}: event loop closed")
+
+
+def format_sse_event(event: Dict[str, Any], event_name: str = "notification") -> str:
+    """Serialisasi event ke format text/event-stream"""
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event_name}")
+    lines.append(f"data: {json.dumps(event, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream_notifications(
+    broker: NotificationBroker,
+    doctor_id: int,
+    heartbeat_seconds: float,
+    is_disconnected=None,
+) -> AsyncIterator[str]:
+    """Generator SSE untuk satu dokter, mengirim komentar heartbeat saat idle"""
+    subscription = broker.subscribe(doctor_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            event = await subscription.get(timeout=heartbeat_seconds)
+            if is_disconnected is not None and await is_disconnected():
+                break
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield format_sse_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+_broker: NotificationBroker = InMemoryNotificationBroker(settings.NOTIFICATION_STREAM_QUEUE_SIZE)
+
+
+def get_notification_broker() -> NotificationBroker:
+    return _broker
+
+
+def set_notification_broker(broker: NotificationBroker) -> None:
+    """Ganti broker global (mis. broker eksternal untuk deployment multi-worker)"""
+    global _broker
+    _broker = broker
+
+
+def build_notification_event(notification, patient_name: Optional[str]) -> Dict[str, Any]:
+    """Payload event dengan bentuk yang sama seperti item di /monitoring/notifications"""
+    return {
+        "id": notification.id,
+        "from_patient_name": patient_name or "Unknown",
+        "record_id": notification.record_id,
+        "message": notification.message,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        "is_read": False,
+    }
@@ -0,0 +1,136 @@
+# Service layer untuk counter notifikasi dokter (total & unread)
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict, Optional, Tuple
+
+from app.db.replicas import READ_ONLY
+from app.models.medical import DoctorNotificationCounter, Notification, NotificationStatus
+
+
+class NotificationCounterService:
+    @staticmethod
+    def _count_from_notifications(db: Session, doctor_id: int) -> Dict[str, int]:
+        total, unread = db.query(
+            func.count(Notification.id),
+            func.coalesce(func.sum(case((Notification.status == NotificationStatus.unread, 1), else_=0)), 0)
+        ).filter(Notification.to_doctor_id == doctor_id).one()
+        return {"total_count": int(total or 0), "unread_count": int(unread or 0)}
+
+    @staticmethod
+    def _seed_counter(db: Session, doctor_id: int) -> Tuple[DoctorNotificationCounter, bool]:
+        """
+        Buat baris counter dari isi tabel notifications (termasuk baris yang sudah di-flush).
+        Returns: (counter, created)
+        """
+        counts = NotificationCounterService._count_from_notifications(db, doctor_id)
+        counter = DoctorNotificationCounter(doctor_id=doctor_id, read_up_to_id=0, **counts)
+        try:
+            with db.begin_nested():
+                db.add(counter)
+        except IntegrityError:
+            # Worker lain sudah membuat baris yang sama
+            return db.get(DoctorNotificationCounter, doctor_id), False
+        return counter, True
+
+    @staticmethod
+    def _apply_increment(db: Session, doctor_id: int, total: int, unread: int) -> int:
+        return db.query(DoctorNotificationCounter).filter(
+            DoctorNotificationCounter.doctor_id == doctor_id
+        ).update({
+            DoctorNotificationCounter.total_count: DoctorNotificationCounter.total_count + total,
+            DoctorNotificationCounter.unread_count: DoctorNotificationCounter.unread_count + unread
+        }, synchronize_session=False)
+
+    @staticmethod
+    def increment(db: Session, doctor_id: int, total: int = 1, unread: int = 1) -> None:
+        """Update atomik saat notifikasi baru dibuat; dipanggil dalam transaksi insert notifikasi"""
+        if NotificationCounterService._apply_increment(db, doctor_id, total, unread):
+            return
+        # Belum ada counter: hitung dari tabel, notifikasi baru sudah ikut terhitung
+        _, created = NotificationCounterService._seed_counter(db, doctor_id)
+        if not created:
+            NotificationCounterService._apply_increment(db, doctor_id, total, unread)
+
+    @staticmethod
+    def decrement_unread(db: Session, doctor_id: int, count: int = 1) -> None:
+        """Kurangi unread secara atomik (tidak pernah di bawah nol)"""
+        if count <= 0:
+            return
+        db.query(DoctorNotificationCounter).filter(
+            DoctorNotificationCounter.doctor_id == doctor_id
+        ).update({
+            DoctorNotificationCounter.unread_count: case(
+                (DoctorNotificationCounter.unread_count >= count, DoctorNotificationCounter.unread_count - count),
+                else_=0
+            )
+        }, synchronize_session=False)
+
+    @staticmethod
+    def advance_watermark(db: Session, doctor_id: int, up_to_id: int) -> None:
+        """Majukan watermark read-up-to (tidak pernah mundur)"""
+        updated = db.query(DoctorNotificationCounter).filter(
+            DoctorNotificationCounter.doctor_id == doctor_id
+        ).update({
+            DoctorNotificationCounter.read_up_to_id: case(
+                (DoctorNotificationCounter.read_up_to_id < up_to_id, up_to_id),
+                else_=DoctorNotificationCounter.read_up_to_id
+            )
+        }, synchronize_session=False)
+        if not updated:
+            counter, created = NotificationCounterService._seed_counter(db, doctor_id)
+            if created:
+                counter.read_up_to_id = up_to_id
+            else:
+                NotificationCounterService.advance_watermark(db, doctor_id, up_to_id)
+
+    @staticmethod
+    def get_counts(db: Session, doctor_id: int) -> Dict[str, int]:
+        """Baca counter dengan satu lookup primary key"""
+        counter = db.get(DoctorNotificationCounter, doctor_id)
+        if counter is None:
+            if db.info.get(READ_ONLY):
+                # Session baca (replica): hitung tanpa menyimpan; baris counter dibuat
+                # oleh jalur tulis berikutnya (notifikasi baru / mark as read)
+                return {**NotificationCounterService._count_from_notifications(db, doctor_id), "read_up_to_id": 0}
+            counter, _ = NotificationCounterService._seed_counter(db, doctor_id)
+            db.commit()
+        return {
+            "total_count": counter.total_count,
+            "unread_count": counter.unread_count,
+            "read_up_to_id": counter.read_up_to_id or 0
+        }
+
+    @staticmethod
+    def reconcile(db: Session, doctor_id: Optional[int] = None) -> int:
+        """Hitung ulang counter dari tabel notifications, return jumlah counter yang dikoreksi"""
+        query = db.query(
+            Notification.to_doctor_id,
+            func.count(Notification.id),
+            func.coalesce(func.sum(case((Notification.status == NotificationStatus.unread, 1), else_=0)), 0)
+        )
+        if doctor_id is not None:
+            query = query.filter(Notification.to_doctor_id == doctor_id)
+        actual = {
+            row[0]: {"total_count": int(row[1]), "unread_count": int(row[2])}
+            for row in query.group_by(Notification.to_doctor_id).all()
+        }
+
+        counters_query = db.query(DoctorNotificationCounter)
+        if doctor_id is not None:
+            counters_query = counters_query.filter(DoctorNotificationCounter.doctor_id == doctor_id)
+        counters = {c.doctor_id: c for c in counters_query.all()}
+
+        fixed = 0
+        for target_id in set(actual) | set(counters):
+            expected = actual.get(target_id, {"total_count": 0, "unread_count": 0})
+            counter = counters.get(target_id)
+            if counter is None:
+                db.add(DoctorNotificationCounter(doctor_id=target_id, read_up_to_id=0, **expected))
+                fixed += 1
+            elif counter.total_count != expected["total_count"] or counter.unread_count != expected["unread_count"]:
+                counter.total_count = expected["total_count"]
+                counter.unread_count = expected["unread_count"]
+                fixed += 1
+        db.commit()
+        return fixed
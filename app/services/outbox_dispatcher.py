@@ -0,0 +1,161 @@
+"""
+Transactional outbox
+Endpoint menulis OutboxEvent dalam transaksi yang sama dengan perubahan data;
+dispatcher di background mengambil event secara batch, membuat notifikasi
+dan mem-push event ke broker SSE di luar request path.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.time_utils import get_local_naive_now
+from app.db.session import SessionLocal
+from app.models.medical import OutboxEvent, Notification, NotificationStatus, Patient
+from app.services.notification_broker import get_notification_broker, build_notification_event
+from app.services.notification_counter_service import NotificationCounterService
+
+logger = logging.getLogger("outbox_dispatcher")
+
+RECORD_SHARED = "record_shared"
+
+# (doctor_id, event) yang di-push ke broker setelah batch di-commit
+PendingPush = Tuple[int, Dict[str, Any]]
+
+
+def handle_record_shared(db: Session, payload: Dict[str, Any]) -> List[PendingPush]:
+    """Buat satu notifikasi per dokter tujuan"""
+    patient = db.query(Patient).filter(Patient.id == payload["patient_id"]).first()
+    patient_name = patient.name if patient else None
+    message = payload.get("message_template", "Monitoring result shared by {patient_name}").format(
+        patient_name=patient_name or "Patient"
+    )
+
+    notifications = []
+    for doctor_id in payload["doctor_ids"]:
+        notification = Notification(
+            from_patient_id=payload["patient_id"],
+            to_doctor_id=doctor_id,
+            record_id=payload["record_id"],
+            message=message,
+            status=NotificationStatus.unread
+        )
+        db.add(notification)
+        notifications.append(notification)
+    db.flush()
+
+    for doctor_id in payload["doctor_ids"]:
+        NotificationCounterService.increment(db, doctor_id)
+
+    return [(n.to_doctor_id, build_notification_event(n, patient_name)) for n in notifications]
+
+
+EVENT_HANDLERS: Dict[str, Callable[[Session, Dict[str, Any]], List[PendingPush]]] = {
+    RECORD_SHARED: handle_record_shared,
+}
+
+
+class OutboxDispatcher:
+    @staticmethod
+    def enqueue(db: Session, event_type: str, payload: Dict[str, Any]) -> OutboxEvent:
+        """Tambahkan event ke session tanpa commit; ikut transaksi pemanggil"""
+        event = OutboxEvent(event_type=event_type, payload=payload)
+        db.add(event)
+        return event
+
+    @staticmethod
+    def dispatch_batch(db: Session, batch_size: Optional[int] = None) -> int:
+        """Proses satu batch event yang belum diproses, return jumlah event yang diambil"""
+        batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        events = db.query(OutboxEvent).filter(
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.attempts < settings.OUTBOX_MAX_ATTEMPTS
+        ).order_by(OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        pushes: List[PendingPush] = []
+        for event in events:
+            handler = EVENT_HANDLERS.get(event.event_type)
+            if handler is None:
+                logger.error(f"No outbox handler for event_type={event.event_type} (id={event.id})")
+                event.attempts = settings.OUTBOX_MAX_ATTEMPTS
+                event.last_error = "unknown event type"
+                continue
+            try:
+                with db.begin_nested():
+                    event_pushes = handler(db, event.payload)
+                event.processed_at = get_local_naive_now()
+                pushes.extend(event_pushes)
+            except Exception as e:
+                logger.error(f"Outbox event id={event.id} failed: {e}")
+                event.attempts = (event.attempts or 0) + 1
+                event.last_error = str(e)
+
+        db.commit()
+
+        broker = get_notification_broker()
+        for doctor_id, payload in pushes:
+            broker.publish(doctor_id, payload)
+        return len(events)
+
+
+class OutboxWorker:
+    """Background task yang men-drain outbox secara periodik atau saat dibangunkan"""
+
+    def __init__(self, poll_interval: float, batch_size: int):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _drain_once(self) -> int:
+        db = SessionLocal()
+        try:
+            return OutboxDispatcher.dispatch_batch(db, self.batch_size)
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # Batch penuh berarti masih ada sisa, lanjut tanpa menunggu
+                while await run_in_threadpool(self._drain_once) >= self.batch_size:
+                    pass
+            except Exception as e:
+                logger.error(f"Outbox dispatch error: {e}")
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self.run())
+        logger.info("Outbox dispatcher started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Outbox dispatcher stopped")
+
+    def wake(self) -> None:
+        """Bangunkan dispatcher setelah commit; aman dipanggil dari thread manapun"""
+        if self._task is None or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass
+
+
+outbox_worker = OutboxWorker(settings.OUTBOX_POLL_INTERVAL_SECONDS, settings.OUTBOX_BATCH_SIZE)
@@ -0,0 +1,56 @@
+# Service layer untuk data profil pasien & dokter (ter-cache)
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.cache import cached, register_model_tags
+from app.models.medical import User, Patient
+
+register_model_tags(User, lambda user: [f"user:{user.id}"])
+register_model_tags(Patient, lambda patient: [f"patient:{patient.id}"])
+
+
+class ProfileService:
+    """
+    Argumen `version` (updated_at baris terkait, dari query versi ETag) ikut
+    menjadi bagian key sehingga entri basi dari worker lain tidak pernah dipakai;
+    tag hanya membebaskan entri lama lebih cepat. Versi ini butuh updated_at
+    berpresisi mikrodetik (DATETIME(6) di MySQL), bukan per detik.
+    """
+
+    @staticmethod
+    @cached("patient_profile", tags=lambda result, patient_id, **_: [f"patient:{patient_id}", f"user:{result['userId']}"])
+    def get_patient_profile(db: Session, patient_id: int, version: Tuple = ()) -> Optional[Dict[str, Any]]:
+        patient = db.query(Patient).filter(Patient.id == patient_id).first()
+        if not patient:
+            return None
+        user = patient.user
+        return {
+            "id": patient.id,
+            "userId": patient.user_id,
+            "name": patient.name,
+            "email": patient.email,
+            "hpht": patient.hpht.isoformat() if patient.hpht else None,
+            "birthDate": patient.birth_date.isoformat() if patient.birth_date else None,
+            "address": patient.address,
+            "medicalNote": patient.medical_note,
+            "profilePhotoUrl": f"https://dopply.my.id{user.photo_url}" if user and user.photo_url else None,
+            "createdAt": user.created_at.isoformat() if user else None,
+            "updatedAt": max(patient.updated_at, user.updated_at).isoformat() if user else patient.updated_at.isoformat()
+        }
+
+    @staticmethod
+    @cached("doctor_profile", tags=lambda result, doctor_id, **_: [f"user:{doctor_id}"])
+    def get_doctor_profile(db: Session, doctor_id: int, version: Tuple = ()) -> Optional[Dict[str, Any]]:
+        doctor = db.query(User).filter(User.id == doctor_id, User.role == "doctor").first()
+        if not doctor:
+            return None
+        return {
+            "id": doctor.id,
+            "userId": doctor.id,
+            "name": doctor.name,
+            "email": doctor.email,
+            "specialization": doctor.specialization,
+            "profilePhotoUrl": f"https://dopply.my.id{doctor.photo_url}" if doctor.photo_url else None,
+            "createdAt": doctor.created_at.isoformat() if doctor.created_at else None,
+            "updatedAt": doctor.updated_at.isoformat()
+        }
@@ -0,0 +1,220 @@
+# Rotasi refresh token per family dan filter pencabutan di memori
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy import exists, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import create_refresh_token
+from app.core.time_utils import get_local_naive_now
+from app.models.medical import RefreshTokenFamily, RevokedRefreshToken, User
+
+
+class RevocationFilter:
+    """
+    Bloom filter jti & family yang dicabut. Jawaban "tidak" berarti token
+    belum pernah dicabut di worker ini sejak load terakhir sehingga refresh
+    langsung lanjut ke rotasi tanpa query; "mungkin" dikonfirmasi ke DB.
+    Pencabutan dari worker lain tetap tertangkap saat rotasi (INSERT jti unik
+    dan cek family aktif) dan masuk filter saat reload berikutnya.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, error_rate: Optional[float] = None,
+                 reload_seconds: Optional[float] = None):
+        self.capacity = settings.REFRESH_REVOCATION_FILTER_CAPACITY if capacity is None else capacity
+        self.error_rate = settings.REFRESH_REVOCATION_FILTER_ERROR_RATE if error_rate is None else error_rate
+        self.reload_seconds = settings.REFRESH_REVOCATION_RELOAD_SECONDS if reload_seconds is None else reload_seconds
+        self._bloom: Optional[BloomFilter] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.positives = 0
+        self.false_positives = 0
+
+    def load(self, db: Session) -> BloomFilter:
+        # Token yang sudah lewat exp ditolak verifikasi JWT, tidak perlu masuk filter
+        jtis = [jti for jti, in db.query(RevokedRefreshToken.jti).filter(
+            RevokedRefreshToken.expires_at > datetime.utcnow()
+        )]
+        families = [family_id for family_id, in db.query(RefreshTokenFamily.id).filter(
+            RefreshTokenFamily.revoked_at > get_local_naive_now() - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        )]
+        bloom = BloomFilter(max(self.capacity, 2 * (len(jtis) + len(families))), self.error_rate)
+        for jti in jtis:
+            bloom.add(f"t:{jti}")
+        for family_id in families:
+            bloom.add(f"f:{family_id}")
+        with self._lock:
+            self._bloom = bloom
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        return bloom
+
+    def _current(self, db: Session) -> BloomFilter:
+        bloom = self._bloom
+        if bloom is None or time.monotonic() - self._loaded_at >= self.reload_seconds:
+            bloom = self.load(db)
+        return bloom
+
+    def might_be_revoked(self, db: Session, jti: str, family_id: str) -> bool:
+        bloom = self._current(db)
+        return f"t:{jti}" in bloom or f"f:{family_id}" in bloom
+
+    def add_token(self, jti: str) -> None:
+        if self._bloom is not None:
+            self._bloom.add(f"t:{jti}")
+
+    def add_family(self, family_id: str) -> None:
+        if self._bloom is not None:
+            self._bloom.add(f"f:{family_id}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._bloom = None
+
+    def describe(self) -> Dict[str, Any]:
+        bloom = self._bloom
+        return {
+            "entries": bloom.count if bloom else 0,
+            "size_bytes": bloom.size_bytes if bloom else 0,
+            "loads": self.loads,
+            "positives": self.positives,
+            "false_positives": self.false_positives
+        }
+
+
+revocation_filter = RevocationFilter()
+_last_purge = float("-inf")
+
+
+class RefreshTokenService:
+    @staticmethod
+    def _claims(user: User) -> Dict[str, Any]:
+        return {
+            "sub": user.email,
+            "id": user.id,
+            "user_id": user.id,
+            "email": user.email,
+            "role": user.role.value,
+            "epoch": user.token_epoch or 0
+        }
+
+    @staticmethod
+    def start_family(db: Session, user: User) -> str:
+        """Refresh token pertama dari login; family disimpan dalam transaksi pemanggil"""
+        family_id = uuid4().hex
+        db.add(RefreshTokenFamily(id=family_id, user_id=user.id))
+        return create_refresh_token({**RefreshTokenService._claims(user), "fid": family_id})
+
+    @staticmethod
+    def legacy_jti(token: str) -> str:
+        """Token dari sebelum rotasi tidak punya jti: pakai hash signature JWT-nya"""
+        return hashlib.sha256(token.rsplit(".", 1)[-1].encode("ascii")).hexdigest()[:32]
+
+    @staticmethod
+    def exchange_legacy(db: Session, user: User, token: str, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Tukar token lama tanpa family sekali saja: token dicatat terpakai (jti turunan)
+        di family baru. None jika token ini sudah pernah ditukar (replay).
+        """
+        family_id = uuid4().hex
+        try:
+            with db.begin_nested():
+                db.add(RefreshTokenFamily(id=family_id, user_id=user.id))
+                db.add(RevokedRefreshToken(
+                    jti=RefreshTokenService.legacy_jti(token),
+                    family_id=family_id,
+                    expires_at=datetime.utcfromtimestamp(payload["exp"])
+                ))
+        except IntegrityError:
+            return None
+        return create_refresh_token({**RefreshTokenService._claims(user), "fid": family_id})
+
+    @staticmethod
+    def is_revoked(db: Session, jti: str, family_id: str) -> bool:
+        """Cek filter di memori; DB hanya ditanya jika filter menjawab "mungkin" """
+        if not revocation_filter.might_be_revoked(db, jti, family_id):
+            return False
+        revocation_filter.positives += 1
+        token_revoked = db.query(exists().where(RevokedRefreshToken.jti == jti)).scalar()
+        family_revoked = db.query(exists().where(
+            RefreshTokenFamily.id == family_id,
+            RefreshTokenFamily.revoked_at.isnot(None)
+        )).scalar()
+        if not (token_revoked or family_revoked):
+            revocation_filter.false_positives += 1
+            return False
+        return True
+
+    @staticmethod
+    def rotate(db: Session, user: User, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Tandai token lama terpakai dan terbitkan penggantinya (commit oleh pemanggil).
+        Satu INSERT sekaligus memeriksa family masih aktif; None jika token sudah
+        pernah dipakai atau family sudah dicabut (indikasi token dicuri).
+        """
+        jti, family_id = payload["jti"], payload["fid"]
+        family_active = exists().where(
+            RefreshTokenFamily.id == family_id,
+            RefreshTokenFamily.revoked_at.is_(None)
+        )
+        stmt = insert(RevokedRefreshToken).from_select(
+            ["jti", "family_id", "expires_at", "revoked_at"],
+            select(
+                literal(jti),
+                literal(family_id),
+                literal(datetime.utcfromtimestamp(payload["exp"])),
+                literal(get_local_naive_now())
+            ).where(family_active)
+        )
+        try:
+            with db.begin_nested():
+                inserted = db.execute(stmt).rowcount
+        except IntegrityError:
+            # jti sudah ada: token yang sama dipakai dua kali (mungkin bersamaan)
+            return None
+        if not inserted:
+            return None
+        return create_refresh_token({**RefreshTokenService._claims(user), "fid": family_id})
+
+    @staticmethod
+    def revoke_family(db: Session, family_id: str) -> None:
+        """Cabut seluruh rantai (reuse terdeteksi / logout); commit oleh pemanggil"""
+        db.query(RefreshTokenFamily).filter(
+            RefreshTokenFamily.id == family_id,
+            RefreshTokenFamily.revoked_at.is_(None)
+        ).update({RefreshTokenFamily.revoked_at: get_local_naive_now()}, synchronize_session=False)
+
+    @staticmethod
+    def purge_expired(db: Session) -> None:
+        """Hapus baris yang tokennya sudah pasti kedaluwarsa; commit oleh pemanggil"""
+        db.query(RevokedRefreshToken).filter(
+            RevokedRefreshToken.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def purge_expired_if_due(db: Session) -> None:
+        """purge_expired paling sering sekali per interval reload filter per worker"""
+        global _last_purge
+        now = time.monotonic()
+        if now - _last_purge >= settings.REFRESH_REVOCATION_RELOAD_SECONDS:
+            _last_purge = now
+            RefreshTokenService.purge_expired(db)
+
+
+metrics.register_gauge(
+    "dopply_refresh_revocation_filter_entries", "Revoked refresh tokens/families in the in-memory filter",
+    lambda: revocation_filter.describe()["entries"]
+)
+metrics.register_gauge(
+    "dopply_refresh_revocation_filter_false_positives", "Filter hits not confirmed by the database",
+    lambda: revocation_filter.false_positives
+)
@@ -0,0 +1,223 @@
+"""
+Delta sync service
+Mengembalikan record, notifikasi, roster pasien dan profil yang berubah
+setelah change token tertentu, berdasarkan kolom updated_at yang ter-index.
+Halaman dipotong dengan keyset (updated_at, id) sehingga banyak baris dengan
+updated_at yang sama (mis. bulk mark-as-read) tetap bisa dipaging sampai habis.
+"""
+import base64
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.time_utils import get_local_naive_now, utc_to_local
+from app.models.medical import User, Patient, Record, Notification, DoctorPatientAssociation, NotificationStatus
+from app.utils.bpm_calculator import format_record_for_api
+
+TOKEN_VERSION = "v2"
+# v1: hanya timestamp (token klien lama tetap diterima)
+LEGACY_TOKEN_VERSIONS = ("v1",)
+EPOCH = datetime(1970, 1, 1)
+
+
+class SyncCursor(NamedTuple):
+    """Posisi sync: semua baris <= (since, id terakhir per stream) sudah dikirim"""
+    since: datetime
+    record_id: int = 0
+    notification_id: int = 0
+
+
+class SyncService:
+    @staticmethod
+    def encode_token(cursor: Union[SyncCursor, datetime]) -> str:
+        if isinstance(cursor, datetime):
+            cursor = SyncCursor(cursor)
+        value = f"{cursor.since.isoformat()}:{cursor.record_id}:{cursor.notification_id}"
+        raw = f"{TOKEN_VERSION}:{value}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_token(token: Optional[str]) -> SyncCursor:
+        """Token kosong berarti sinkronisasi penuh; token rusak -> ValueError"""
+        if not token:
+            return SyncCursor(EPOCH)
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            version, value = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split(":", 1)
+            if version == TOKEN_VERSION:
+                # isoformat mengandung ":", id dipisah dari kanan
+                value, record_id, notification_id = value.rsplit(":", 2)
+                ids = (int(record_id), int(notification_id))
+            elif version in LEGACY_TOKEN_VERSIONS:
+                ids = (0, 0)
+            else:
+                raise ValueError(f"Unsupported token version: {version}")
+            since = datetime.fromisoformat(value)
+        except Exception as e:
+            raise ValueError(f"Invalid sync token: {e}")
+        if since.tzinfo is not None:
+            # Kolom updated_at naive (waktu lokal): samakan agar perbandingan tidak TypeError
+            since = utc_to_local(since).replace(tzinfo=None)
+        return SyncCursor(since, *ids)
+
+    @staticmethod
+    def _window(query, column, id_column, since: datetime, after_id: int, until: datetime,
+                limit: int) -> Tuple[List[Any], bool]:
+        rows = query.filter(
+            or_(column > since, and_(column == since, id_column > after_id)),
+            column <= until
+        ).order_by(column, id_column).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    @staticmethod
+    def _after_id(rows: List[Any], boundary: datetime, cursor: SyncCursor, previous: int) -> int:
+        """Id terbesar yang sudah dikirim pada timestamp boundary"""
+        ids = [row.id for row in rows if row.updated_at == boundary]
+        if boundary == cursor.since:
+            ids.append(previous)
+        return max(ids, default=0)
+
+    @staticmethod
+    def _format_notification(notif: Notification) -> Dict[str, Any]:
+        return {
+            "id": notif.id,
+            "from_patient_name": notif.from_patient.name if notif.from_patient else "Unknown",
+            "record_id": notif.record_id,
+            "message": notif.message,
+            "created_at": notif.created_at,
+            "updated_at": notif.updated_at,
+            "is_read": notif.status == NotificationStatus.read
+        }
+
+    @staticmethod
+    def _format_profile(user: User, patient: Optional[Patient]) -> Dict[str, Any]:
+        profile = {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "role": user.role.value,
+            "specialization": user.specialization,
+            "profilePhotoUrl": f"https://dopply.my.id{user.photo_url}" if user.photo_url else None,
+            "updatedAt": user.updated_at.isoformat() if user.updated_at else None
+        }
+        if patient is not None:
+            profile.update({
+                "patientId": patient.id,
+                "hpht": patient.hpht.isoformat() if patient.hpht else None,
+                "birthDate": patient.birth_date.isoformat() if patient.birth_date else None,
+                "address": patient.address,
+                "medicalNote": patient.medical_note,
+                "updatedAt": max(user.updated_at, patient.updated_at).isoformat()
+            })
+        return profile
+
+    @staticmethod
+    def get_changes(db: Session, user_id: int, user_role: str, since: Union[SyncCursor, datetime],
+                    limit: Optional[int] = None) -> Dict[str, Any]:
+        """Ambil perubahan dalam jendela (cursor, now - settle]"""
+        cursor = since if isinstance(since, SyncCursor) else SyncCursor(since)
+        since = cursor.since
+        limit = limit or settings.SYNC_PAGE_SIZE
+        until = get_local_naive_now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+        user = db.query(User).filter(User.id == user_id).first()
+        patient = db.query(Patient).filter(Patient.user_id == user_id).first() if user_role == "patient" else None
+
+        record_query = db.query(Record).options(joinedload(Record.patient), joinedload(Record.doctor))
+        records: List[Record] = []
+        notifications: List[Notification] = []
+        patients: List[Tuple[Patient, datetime]] = []
+        truncated: List[datetime] = []
+
+        if user_role == "patient":
+            if patient is not None:
+                records, more = SyncService._window(
+                    record_query.filter(Record.patient_id == patient.id), Record.updated_at, Record.id,
+                    since, cursor.record_id, until, limit
+                )
+                if more:
+                    truncated.append(records[-1].updated_at)
+        elif user_role == "doctor":
+            assigned_ids = db.query(DoctorPatientAssociation.patient_id).filter(
+                DoctorPatientAssociation.doctor_id == user_id
+            )
+            records, more = SyncService._window(
+                record_query.filter(or_(
+                    Record.patient_id.in_(assigned_ids.scalar_subquery()),
+                    Record.created_by == user_id,
+                    Record.shared_with == user_id
+                )), Record.updated_at, Record.id, since, cursor.record_id, until, limit
+            )
+            if more:
+                truncated.append(records[-1].updated_at)
+
+            notifications, more = SyncService._window(
+                db.query(Notification).options(joinedload(Notification.from_patient)).filter(
+                    Notification.to_doctor_id == user_id
+                ), Notification.updated_at, Notification.id, since, cursor.notification_id, until, limit
+            )
+            if more:
+                truncated.append(notifications[-1].updated_at)
+
+            # Roster: pasien yang datanya berubah atau baru ditugaskan
+            patients = db.query(Patient, DoctorPatientAssociation.assigned_at).join(
+                DoctorPatientAssociation, DoctorPatientAssociation.patient_id == Patient.id
+            ).filter(
+                DoctorPatientAssociation.doctor_id == user_id,
+                or_(
+                    and_(Patient.updated_at > since, Patient.updated_at <= until),
+                    and_(DoctorPatientAssociation.assigned_at > since, DoctorPatientAssociation.assigned_at <= until)
+                )
+            ).all()
+
+        profile = None
+        profile_changed_at = None
+        if user is not None:
+            changed = [user.updated_at] + ([patient.updated_at] if patient is not None else [])
+            latest = max(ts for ts in changed if ts is not None)
+            if since < latest <= until:
+                profile = SyncService._format_profile(user, patient)
+                profile_changed_at = latest
+
+        if truncated:
+            # Roster & profil tidak dipaging: semua perubahan <= until sudah terkirim
+            boundary = min(truncated)
+        else:
+            seen = [r.updated_at for r in records] + [n.updated_at for n in notifications]
+            seen += [
+                max(ts for ts in (p.updated_at, assigned_at) if ts is not None and ts <= until)
+                for p, assigned_at in patients
+            ]
+            if profile_changed_at is not None:
+                seen.append(profile_changed_at)
+            boundary = max(seen + [since])
+        next_since = SyncCursor(
+            boundary,
+            SyncService._after_id(records, boundary, cursor, cursor.record_id),
+            SyncService._after_id(notifications, boundary, cursor, cursor.notification_id)
+        )
+
+        return {
+            "records": [
+                {**format_record_for_api(r, r.patient.name if r.patient else None),
+                 "updatedAt": r.updated_at.isoformat()}
+                for r in records
+            ],
+            "notifications": [SyncService._format_notification(n) for n in notifications],
+            "patients": [
+                {
+                    "id": p.id,
+                    "name": p.name,
+                    "email": p.email,
+                    "hpht": p.hpht.isoformat() if p.hpht else None,
+                    "updatedAt": p.updated_at.isoformat()
+                }
+                for p, _ in patients
+            ],
+            "profile": profile,
+            "next_since": next_since,
+            "has_more": bool(truncated)
+        }
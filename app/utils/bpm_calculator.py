@@ -8,6 +8,9 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from app.core.server_timing import timed
+
+@timed("logic")
 def calculate_bpm_statistics(bpm_data: Any) -> Dict[str, Any]:
     """
     Menghitung statistik BPM dari data yang tersimpan
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark import time worker (`python -X importtime`) dengan regression gate.
+Tiap sampel memakai interpreter baru dan mengukur:
+  - settings    : validasi Settings() (pydantic-settings, env/.env)
+  - app_import  : import app.main (router, schema Pydantic, model, middleware)
+  - openapi     : pembuatan schema OpenAPI (dibayar request /docs pertama)
+serta waktu import (self time) per kelompok modul. Modul di LAZY_MODULES
+(jose, passlib, argon2, numpy) tidak boleh ter-import saat boot.
+
+Usage:
+    python scripts/benchmarks/bench_imports.py                  # laporan
+    python scripts/benchmarks/bench_imports.py --check          # bandingkan dengan baseline, exit 1 jika regresi
+    python scripts/benchmarks/bench_imports.py --update         # tulis ulang baseline (di host CI)
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+BASELINE = Path(__file__).parent / "import_baseline.json"
+
+# Library berat yang hanya dibutuhkan saat request tertentu, bukan saat boot
+LAZY_MODULES = ("jose", "passlib", "argon2", "numpy")
+
+# Prefix modul -> kelompok; urutan penting (prefix paling spesifik dulu)
+GROUPS = (
+    ("app.api", "routers"),
+    ("app.schemas", "schemas"),
+    ("app.models", "models"),
+    ("app.core.config", "settings"),
+    ("app.core.security", "security"),
+    ("app.db", "db"),
+    ("app", "app_other"),
+    ("fastapi", "fastapi"),
+    ("starlette", "fastapi"),
+    ("pydantic_settings", "pydantic"),
+    ("pydantic_core", "pydantic"),
+    ("pydantic", "pydantic"),
+    ("sqlalchemy", "sqlalchemy"),
+    ("prometheus_client", "prometheus"),
+    ("jose", "jose"),
+    ("passlib", "passlib"),
+    ("argon2", "passlib"),
+)
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from app.core.config import Settings
+t1 = time.perf_counter()
+Settings()
+t2 = time.perf_counter()
+from app.main import app
+t3 = time.perf_counter()
+app.openapi()
+t4 = time.perf_counter()
+print(json.dumps({
+    "settings": t2 - t1, "app_import": t3 - t2, "openapi": t4 - t3,
+    "lazy_loaded": [m for m in sys.argv[1:] if m in sys.modules],
+}))
+"""
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def group_of(module):
+    for prefix, group in GROUPS:
+        if module == prefix or module.startswith(prefix + "."):
+            return group
+    return "other"
+
+
+def sample(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, *LAZY_MODULES],
+        cwd=project_root, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Import gagal:\n{result.stderr[-2000:]}")
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    lazy_loaded = phases.pop("lazy_loaded")
+    groups, modules = defaultdict(float), {}
+    for self_us, _, _, module in IMPORTTIME_RE.findall(result.stderr):
+        groups[group_of(module)] += int(self_us) / 1000
+        modules[module] = int(self_us) / 1000
+    return {k: v * 1000 for k, v in phases.items()}, dict(groups), modules, lazy_loaded
+
+
+def measure(iterations):
+    env = dict(os.environ, PYTHONPATH=str(project_root))
+    phases, groups, modules, lazy_loaded = defaultdict(list), defaultdict(list), defaultdict(list), set()
+    for _ in range(iterations):
+        sample_phases, sample_groups, sample_modules, loaded = sample(env)
+        for name, value in sample_phases.items():
+            phases[name].append(value)
+        for name, value in sample_groups.items():
+            groups[name].append(value)
+        for name, value in sample_modules.items():
+            modules[name].append(value)
+        lazy_loaded.update(loaded)
+    median = lambda values: {name: round(statistics.median(v), 2) for name, v in values.items()}
+    return median(phases), median(groups), median(modules), sorted(lazy_loaded)
+
+
+def regressions(phases, groups, lazy_loaded, baseline, tolerance, slack_ms):
+    """Daftar pesan regresi: median > baseline * (1 + tolerance) + slack_ms"""
+    problems = [f"{m} ter-import saat boot (harus lazy)" for m in lazy_loaded]
+    for section, current in (("phases_ms", phases), ("groups_ms", groups)):
+        for name, value in current.items():
+            limit = baseline.get(section, {}).get(name, 0.0) * (1 + tolerance) + slack_ms
+            if value > limit:
+                problems.append(f"{section}.{name}: {value:.1f} ms > batas {limit:.1f} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--iterations", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Jumlah modul terlambat yang ditampilkan")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--check", action="store_true", help="Exit 1 jika melewati baseline")
+    parser.add_argument("--update", action="store_true", help="Simpan hasil sebagai baseline baru")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Kenaikan relatif yang diizinkan (default 0.25)")
+    parser.add_argument("--slack-ms", type=float, default=15.0, help="Kenaikan absolut yang diizinkan (default 15 ms)")
+    args = parser.parse_args()
+
+    phases, groups, modules, lazy_loaded = measure(args.iterations)
+
+    print(f"Import benchmark: median {args.iterations} proses (python -X importtime)")
+    print(f"{'fase':<14}{'ms':>10}")
+    for name, value in phases.items():
+        print(f"{name:<14}{value:>10.1f}")
+    print()
+    print(f"{'kelompok':<14}{'self ms':>10}")
+    for name, value in sorted(groups.items(), key=lambda item: -item[1]):
+        print(f"{name:<14}{value:>10.1f}")
+    print()
+    print(f"{'modul':<50}{'self ms':>10}")
+    for name, value in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<50}{value:>10.1f}")
+    print()
+    print(f"lazy modules ter-import saat boot: {', '.join(lazy_loaded) or '-'}")
+
+    if args.update:
+        args.baseline.write_text(json.dumps({
+            "python": f"{sys.version_info.major}.{sys.version_info.minor}",
+            "phases_ms": phases,
+            "groups_ms": groups,
+        }, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline ditulis ke {args.baseline}")
+    if args.check:
+        baseline = json.loads(args.baseline.read_text())
+        problems = regressions(phases, groups, lazy_loaded, baseline, args.tolerance, args.slack_ms)
+        if problems:
+            print("REGRESI:")
+            for problem in problems:
+                print(f"  - {problem}")
+            sys.exit(1)
+        print("OK: tidak ada regresi terhadap baseline")
+
+
+if __name__ == "__main__":
+    main()
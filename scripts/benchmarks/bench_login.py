@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /api/v1/auth/login: memisahkan waktu DB dari waktu Argon2.
+Angka diambil dari header Server-Timing yang sama dengan produksi
+(password = verifikasi Argon2, db = total waktu query, total = seluruh request).
+
+Usage:
+    python scripts/benchmarks/bench_login.py                      # SQLite sementara
+    python scripts/benchmarks/bench_login.py --database-url postgresql://... -n 200
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints import auth
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.security import get_password_hash
+from app.db.base import Base
+from app.db.session import get_db, instrument_engine
+from app.models.medical import User, UserRole, Patient, RefreshTokenFamily
+
+PHASES = ("password", "db", "handler", "total")
+TIMING_RE = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def parse_server_timing(header):
+    timings, queries = {}, 0
+    for name, duration, query_count in TIMING_RE.findall(header):
+        timings[name] = float(duration)
+        if query_count:
+            queries = int(query_count)
+    return timings, queries
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(database_url, iterations, warmup):
+    engine = create_engine(database_url)
+    instrument_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    password = "bench-password"
+    db = Session()
+    user = User(name="Bench", email=email, password_hash=get_password_hash(password), role=UserRole.patient)
+    db.add(user)
+    db.flush()
+    db.add(Patient(user_id=user.id, name="Bench", email=email))
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    def bench_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    settings.RATE_LIMIT_ENABLED = False
+    api = FastAPI()
+    api.include_router(auth.router, prefix="/api/v1")
+    api.dependency_overrides[get_db] = bench_db
+    client = TestClient(MetricsMiddleware(api, registry=None, server_timing=True))
+
+    samples = {phase: [] for phase in PHASES}
+    queries = []
+    try:
+        for i in range(warmup + iterations):
+            response = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+            if response.status_code != 200:
+                raise SystemExit(f"Login gagal: {response.status_code} {response.text}")
+            if i < warmup:
+                continue
+            timings, query_count = parse_server_timing(response.headers.get("server-timing", ""))
+            for phase in PHASES:
+                samples[phase].append(timings.get(phase, 0.0))
+            queries.append(query_count)
+    finally:
+        db = Session()
+        db.query(RefreshTokenFamily).filter(RefreshTokenFamily.user_id == user_id).delete()
+        db.query(Patient).filter(Patient.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+        engine.dispose()
+
+    print(f"Login benchmark: {iterations} request, {database_url.split('@')[-1]}")
+    print(f"{'fase':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'share':>8}")
+    total_mean = statistics.mean(samples["total"]) or 1.0
+    for phase in PHASES:
+        values = samples[phase]
+        mean = statistics.mean(values)
+        print(f"{phase:<10}{mean:>10.2f}{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}"
+              f"{mean / total_mean:>8.0%}")
+    print(f"query per login: {statistics.mean(queries):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Default: file SQLite sementara")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.database_url:
+        run(args.database_url, args.iterations, args.warmup)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", args.iterations, args.warmup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark connection pool di bawah konkurensi.
+N thread masing-masing melakukan checkout, satu query, menahan koneksi selama
+--hold-ms (mensimulasikan kerja handler), lalu mengembalikannya. Dibandingkan
+per strategi pre-ping dan jumlah thread: throughput, waktu tunggu checkout,
+jumlah ping per checkout dan timeout.
+
+Usage:
+    python scripts/benchmarks/bench_pool.py                                   # SQLite sementara
+    python scripts/benchmarks/bench_pool.py --database-url postgresql://... --threads 8,32,64 --pool-size 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import exc, text
+
+from app.core.config import settings
+from app.db.pool import PRE_PING_STRATEGIES
+from app.db.session import create_app_engine
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def run_case(database_url, strategy, threads, iterations, hold):
+    settings.DB_POOL_PRE_PING = strategy
+    engine = create_app_engine(database_url, "bench")
+    pings = 0
+    real_ping = engine.dialect.do_ping
+
+    def counting_ping(dbapi_connection):
+        nonlocal pings
+        pings += 1
+        return real_ping(dbapi_connection)
+
+    engine.dialect.do_ping = counting_ping
+    waits, timeouts = [], 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal timeouts
+        local_waits, local_timeouts = [], 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    local_waits.append(time.perf_counter() - start)
+                    conn.execute(text("SELECT 1"))
+                    if hold:
+                        time.sleep(hold)
+            except exc.TimeoutError:
+                local_timeouts += 1
+        with lock:
+            waits.extend(local_waits)
+            timeouts += local_timeouts
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    pings = 0
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    checkouts = len(waits) or 1
+    print(f"{strategy:<8}{threads:>8}{len(waits) / elapsed:>10.0f}"
+          f"{percentile(waits, 50) * 1000:>10.2f}{percentile(waits, 95) * 1000:>10.2f}"
+          f"{max(waits, default=0.0) * 1000:>10.2f}{pings / checkouts:>8.2f}{timeouts:>9}")
+
+
+def run(database_url, strategies, thread_counts, iterations, hold):
+    print(f"Pool benchmark: {database_url.split('@')[-1]}, pool_size={settings.DB_POOL_SIZE}, "
+          f"max_overflow={settings.DB_POOL_MAX_OVERFLOW}, timeout={settings.DB_POOL_TIMEOUT_SECONDS}s, "
+          f"hold={hold * 1000:.0f} ms, idle ping >= {settings.DB_POOL_PRE_PING_IDLE_SECONDS}s")
+    print(f"{'pre-ping':<8}{'threads':>8}{'req/s':>10}{'wait p50':>10}{'wait p95':>10}{'wait max':>10}"
+          f"{'ping/co':>8}{'timeouts':>9}")
+    for strategy in strategies:
+        for threads in thread_counts:
+            run_case(database_url, strategy, threads, iterations, hold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Default: file SQLite sementara")
+    parser.add_argument("--strategies", default=",".join(PRE_PING_STRATEGIES))
+    parser.add_argument("--threads", default="1,8,32", help="Daftar jumlah thread, dipisah koma")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Checkout per thread")
+    parser.add_argument("--hold-ms", type=float, default=2.0, help="Lama koneksi ditahan per checkout")
+    parser.add_argument("--pool-size", type=int, help="Override DB_POOL_SIZE")
+    parser.add_argument("--max-overflow", type=int, help="Override DB_POOL_MAX_OVERFLOW")
+    parser.add_argument("--timeout", type=float, help="Override DB_POOL_TIMEOUT_SECONDS")
+    args = parser.parse_args()
+
+    if args.pool_size is not None:
+        settings.DB_POOL_SIZE = args.pool_size
+    if args.max_overflow is not None:
+        settings.DB_POOL_MAX_OVERFLOW = args.max_overflow
+    if args.timeout is not None:
+        settings.DB_POOL_TIMEOUT_SECONDS = args.timeout
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    thread_counts = [int(t) for t in args.threads.split(",")]
+
+    if args.database_url:
+        run(args.database_url, strategies, thread_counts, args.iterations, args.hold_ms / 1000)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", strategies, thread_counts, args.iterations,
+            args.hold_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
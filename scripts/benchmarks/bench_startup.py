@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark waktu boot satu worker: tiap sampel memakai interpreter baru.
+Fase: import library pihak ketiga, import app.main (pembuatan app + router),
+startup lifespan (cek head Alembic), lalu request pertama GET /health.
+--with-create-all ikut mengukur Base.metadata.create_all seperti startup lama.
+
+Usage:
+    python scripts/benchmarks/bench_startup.py                    # SQLite sementara
+    python scripts/benchmarks/bench_startup.py --database-url postgresql://... -n 10 --with-create-all
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import fastapi, pydantic, sqlalchemy, starlette
+from fastapi.testclient import TestClient
+t1 = time.perf_counter()
+from app.main import app
+t2 = time.perf_counter()
+create_all = 0.0
+if sys.argv[1] == "1":
+    from app.db.base import Base
+    from app.db.session import engine
+    start = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    create_all = time.perf_counter() - start
+t3 = time.perf_counter()
+with TestClient(app) as client:
+    t4 = time.perf_counter()
+    status = client.get("/health").status_code
+    t5 = time.perf_counter()
+print(json.dumps({
+    "third_party": t1 - t0, "app_import": t2 - t1, "create_all": create_all,
+    "lifespan": t4 - t3, "first_request": t5 - t4, "status": status,
+}))
+"""
+
+PHASES = ("third_party", "app_import", "create_all", "lifespan", "first_request", "process")
+
+
+def sample(env, with_create_all):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, "1" if with_create_all else "0"],
+        cwd=project_root, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"Worker gagal start:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    if timings.pop("status") != 200:
+        raise SystemExit("GET /health tidak mengembalikan 200")
+    timings["process"] = wall
+    return timings
+
+
+def run(database_url, iterations, with_create_all):
+    env = dict(os.environ, DATABASE_URL=database_url, OUTBOX_DISPATCHER_ENABLED="false",
+               PYTHONPATH=str(project_root))
+    samples = [sample(env, with_create_all) for _ in range(iterations)]
+
+    print(f"Startup benchmark: {iterations} proses, {database_url.split('@')[-1]}")
+    print(f"{'fase':<15}{'p50 ms':>10}{'min ms':>10}{'max ms':>10}")
+    for phase in PHASES:
+        if phase == "create_all" and not with_create_all:
+            continue
+        values = [s[phase] * 1000 for s in samples]
+        print(f"{phase:<15}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}")
+    print("(process = wall time termasuk start interpreter)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Default: file SQLite sementara")
+    parser.add_argument("-n", "--iterations", type=int, default=5)
+    parser.add_argument("--with-create-all", action="store_true", help="Ukur juga biaya create_all lama")
+    args = parser.parse_args()
+
+    if args.database_url:
+        run(args.database_url, args.iterations, args.with_create_all)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", args.iterations, args.with_create_all)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Kalibrasi parameter Argon2 untuk host ini.
+Mencari memory_cost, time_cost dan parallelism dengan latency hash terdekat
+(tanpa melewati) target, lalu mencetak baris .env untuk Settings. Hash lama
+otomatis di-rehash ke parameter baru saat user berhasil login.
+
+Usage:
+    python scripts/benchmarks/calibrate_argon2.py --target-ms 250 --concurrency 8
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from passlib.hash import argon2
+
+MIB = 1024  # memory_cost Argon2 dalam KiB
+
+
+def total_memory_kib():
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def measure(time_cost, memory_cost, parallelism, samples):
+    """Median latency (ms) dan CPU time (ms, semua lane) per hash"""
+    handler = argon2.using(rounds=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    handler.hash("warmup")
+    wall, cpu = [], []
+    for i in range(samples):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        handler.hash(f"calibration-{i}")
+        wall.append((time.perf_counter() - wall_start) * 1000)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+    return statistics.median(wall), statistics.median(cpu)
+
+
+def calibrate(target_ms, parallelism, max_memory_kib, min_memory_kib, samples):
+    """Memory sebesar mungkin, lalu time_cost sebanyak mungkin dalam budget latency"""
+    memory = max_memory_kib
+    while True:
+        latency, cpu = measure(1, memory, parallelism, samples)
+        print(f"  m={memory // MIB:>4} MiB t=1 p={parallelism}: {latency:7.1f} ms")
+        if latency <= target_ms or memory // 2 < min_memory_kib:
+            break
+        memory //= 2
+    if latency > target_ms:
+        print(f"Peringatan: parameter minimum sudah {latency:.0f} ms, di atas target {target_ms} ms")
+        return 1, memory, latency, cpu
+
+    time_cost = 1
+    while True:
+        next_latency, next_cpu = measure(time_cost + 1, memory, parallelism, samples)
+        print(f"  m={memory // MIB:>4} MiB t={time_cost + 1} p={parallelism}: {next_latency:7.1f} ms")
+        if next_latency > target_ms:
+            break
+        time_cost, latency, cpu = time_cost + 1, next_latency, next_cpu
+    return time_cost, memory, latency, cpu
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Budget latency satu hash (default 250)")
+    parser.add_argument("--concurrency", type=int, default=cpus,
+                        help="Login bersamaan yang harus muat di RAM (default: jumlah CPU)")
+    parser.add_argument("--parallelism", type=int, default=min(4, cpus), help="Lane Argon2 (default: min(4, CPU))")
+    parser.add_argument("--max-memory-mib", type=int, default=64)
+    parser.add_argument("--min-memory-mib", type=int, default=19, help="Batas bawah (rekomendasi OWASP: 19 MiB)")
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    max_memory = args.max_memory_mib * MIB
+    ram = total_memory_kib()
+    if ram:
+        # Sisakan RAM untuk aplikasi: hash bersamaan maksimal memakai 1/4 RAM
+        max_memory = max(args.min_memory_mib * MIB, min(max_memory, ram // 4 // max(1, args.concurrency)))
+    print(f"Host: {cpus} CPU, RAM {ram // MIB if ram else '?'} MiB; target {args.target_ms:.0f} ms, "
+          f"{args.concurrency} login bersamaan")
+
+    time_cost, memory, latency, cpu = calibrate(
+        args.target_ms, args.parallelism, max_memory, args.min_memory_mib * MIB, args.samples
+    )
+    throughput = cpus * 1000 / cpu if cpu else float("inf")
+    print()
+    print(f"Terpilih: t={time_cost}, m={memory // MIB} MiB, p={args.parallelism} -> {latency:.0f} ms/login, "
+          f"CPU {cpu:.0f} ms/login, kapasitas ~{throughput:.1f} login/detik untuk host ini, "
+          f"RAM puncak ~{memory * args.concurrency // MIB} MiB")
+    print()
+    print("# .env")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.db.session import SessionLocal
+from app.services.notification_counter_service import NotificationCounterService
+
+def reconcile_notification_counters(doctor_id=None):
+    db = SessionLocal()
+    try:
+        fixed = NotificationCounterService.reconcile(db, doctor_id)
+    finally:
+        db.close()
+    print(f"Rekonsiliasi selesai. {fixed} counter notifikasi dokter dikoreksi.")
+
+if __name__ == "__main__":
+    # Opsional: python scripts/database/reconcile_notification_counters.py <doctor_id>
+    reconcile_notification_counters(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -1,6 +1,29 @@
 import pytest
 from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+@pytest.fixture(scope="session", autouse=True)
+def app_schema():
+    """Skema di database aplikasi (DATABASE_URL); app.main tidak lagi menjalankan create_all"""
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.models import medical  # noqa: F401 - registrasi model
+    Base.metadata.create_all(bind=engine)
+    yield
 
 @pytest.fixture
 def mock_db():
     return MagicMock()
+
+@pytest.fixture
+def sqlite_db():
+    """Session ke database SQLite in-memory dengan skema lengkap"""
+    from app.db.base import Base
+    from app.models import medical  # noqa: F401 - registrasi model
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
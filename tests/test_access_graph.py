@@ -0,0 +1,97 @@
+from app.models.medical import User, UserRole, Patient, DoctorPatientAssociation
+from app.services.access_graph import AccessGraph, access_graph
+
+def seed(db):
+    doctor = User(name="Dr. A", email="a@x.com", password_hash="x", role=UserRole.doctor)
+    other_doctor = User(name="Dr. B", email="b@x.com", password_hash="x", role=UserRole.doctor)
+    patient_user = User(name="Pat", email="p@x.com", password_hash="x", role=UserRole.patient)
+    db.add_all([doctor, other_doctor, patient_user])
+    db.flush()
+    patient = Patient(user_id=patient_user.id, name="Pat", email="p@x.com")
+    db.add(patient)
+    db.flush()
+    db.add(DoctorPatientAssociation(doctor_id=doctor.id, patient_id=patient.id))
+    db.commit()
+    return doctor, other_doctor, patient_user, patient
+
+class QueryCounter:
+    def __init__(self, db):
+        self.count = 0
+        from sqlalchemy import event
+        event.listen(db.get_bind(), "before_cursor_execute", self)
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+def test_answers_from_memory_after_first_load(sqlite_db):
+    doctor, other_doctor, patient_user, patient = seed(sqlite_db)
+    doctor_id, user_id, patient_id = doctor.id, patient_user.id, patient.id
+    graph = AccessGraph(ttl_seconds=60)
+    assert graph.can_access_patient(sqlite_db, doctor_id, "doctor", patient_id)
+    counter = QueryCounter(sqlite_db)
+    assert graph.can_access_patient(sqlite_db, user_id, "patient", patient_id)
+    assert graph.can_access_patient(sqlite_db, 999, "admin", patient_id)
+    assert graph.patient_id_for_user(sqlite_db, user_id) == patient_id
+    assert graph.assigned_patient_ids(sqlite_db, doctor_id) == {patient_id}
+    assert counter.count == 0
+    assert graph.loads == 1
+
+def test_denials_are_rechecked_without_reloading(sqlite_db):
+    doctor, other_doctor, patient_user, patient = seed(sqlite_db)
+    graph = AccessGraph(ttl_seconds=60)
+    assert not graph.can_access_patient(sqlite_db, other_doctor.id, "doctor", patient.id)
+    assert not graph.can_access_patient(sqlite_db, other_doctor.id, "patient", patient.id)
+    assert graph.owner_of(sqlite_db, 12345) is None
+    assert graph.loads == 1
+
+def test_assignment_made_elsewhere_is_found_and_reloads(sqlite_db):
+    doctor, other_doctor, _, patient = seed(sqlite_db)
+    graph = AccessGraph(ttl_seconds=60)
+    graph.snapshot(sqlite_db)
+    # Simulasi worker lain: graf lokal tidak ikut di-invalidate
+    sqlite_db.add(DoctorPatientAssociation(doctor_id=other_doctor.id, patient_id=patient.id))
+    sqlite_db.commit()
+    assert graph.is_assigned(sqlite_db, other_doctor.id, patient.id)
+    assert graph.assigned_patient_ids(sqlite_db, other_doctor.id) == {patient.id}
+    assert graph.loads == 2
+
+def test_roster_of_unknown_doctor_falls_back_to_db(sqlite_db):
+    doctor, other_doctor, _, patient = seed(sqlite_db)
+    graph = AccessGraph(ttl_seconds=60)
+    graph.snapshot(sqlite_db)
+    assert graph.assigned_patient_ids(sqlite_db, other_doctor.id) == frozenset()
+    assert graph.loads == 1
+    # Assignment pertama dokter dibuat di worker lain
+    sqlite_db.add(DoctorPatientAssociation(doctor_id=other_doctor.id, patient_id=patient.id))
+    sqlite_db.commit()
+    assert graph.assigned_patient_ids(sqlite_db, other_doctor.id) == {patient.id}
+    assert graph.assigned_patient_ids(sqlite_db, other_doctor.id) == {patient.id}
+    assert graph.loads == 2
+
+def test_sparse_patient_ids_are_stored_by_key(sqlite_db):
+    doctor, _, patient_user, patient = seed(sqlite_db)
+    sparse = Patient(id=10_000_000, user_id=patient_user.id, name="Pat 2", email="p2@x.com")
+    sqlite_db.add(sparse)
+    sqlite_db.commit()
+    graph = AccessGraph(ttl_seconds=60)
+    snapshot = graph.snapshot(sqlite_db)
+    assert snapshot.patient_owner == {patient.id: patient_user.id, sparse.id: patient_user.id}
+    assert graph.owner_of(sqlite_db, sparse.id) == patient_user.id
+
+def test_commits_invalidate_shared_graph(sqlite_db):
+    doctor, other_doctor, _, patient = seed(sqlite_db)
+    assert access_graph.assigned_patient_ids(sqlite_db, other_doctor.id) == frozenset()
+    association = DoctorPatientAssociation(doctor_id=other_doctor.id, patient_id=patient.id)
+    sqlite_db.add(association)
+    sqlite_db.commit()
+    assert access_graph.assigned_patient_ids(sqlite_db, other_doctor.id) == {patient.id}
+    sqlite_db.delete(association)
+    sqlite_db.commit()
+    assert access_graph.assigned_patient_ids(sqlite_db, other_doctor.id) == frozenset()
+
+def test_profile_updates_do_not_reload_graph(sqlite_db):
+    _, _, _, patient = seed(sqlite_db)
+    snapshot = access_graph.snapshot(sqlite_db)
+    patient.address = "Jl. Mawar"
+    sqlite_db.commit()
+    assert access_graph.snapshot(sqlite_db) is snapshot
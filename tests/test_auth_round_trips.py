@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from passlib.context import CryptContext
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints import auth, user
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.medical import User, UserRole, Patient
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/v1")
+    app.include_router(user.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    yield TestClient(app), db, statements
+    db.close()
+    engine.dispose()
+
+def register(client, email, role="patient"):
+    return client.post("/api/v1/register", json={"name": "Pat", "email": email, "password": "rahasia", "role": role})
+
+def test_register_is_one_transaction_without_lookups(env):
+    client, db, statements = env
+    response = register(client, "p@example.com")
+    assert response.status_code == 201
+    assert response.json()["role"] == "patient"
+    assert [s.split()[0].upper() for s in statements] == ["INSERT", "INSERT"]
+    assert db.query(Patient).filter(Patient.user_id == response.json()["id"]).count() == 1
+
+    assert register(client, "p@example.com").status_code == 400
+    assert register(client, "x@example.com", role="nurse").status_code == 400
+    assert db.query(User).count() == 1
+
+def test_login_loads_user_and_patient_in_one_query(env):
+    client, _, statements = env
+    register(client, "p@example.com")
+    statements.clear()
+    response = client.post("/api/v1/auth/login", json={"email": "p@example.com", "password": "rahasia"})
+    assert response.status_code == 200
+    data = response.json()["data"]["user"]
+    assert data["email"] == "p@example.com" and data["role"] == "patient"
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 1 and "JOIN patients" in selects[0]
+
+    statements.clear()
+    assert client.post("/api/v1/auth/login", json={"email": "p@example.com", "password": "salah"}).status_code == 401
+    assert len(statements) == 1
+
+def test_login_rehashes_outdated_argon2_parameters(env):
+    client, db, _ = env
+    weak = CryptContext(schemes=["argon2"], argon2__rounds=1, argon2__memory_cost=8192, argon2__parallelism=1)
+    account = User(name="Dr", email="d@example.com", password_hash=weak.hash("rahasia"), role=UserRole.doctor)
+    db.add(account)
+    db.commit()
+    updated_at = account.updated_at
+    assert pwd_context.needs_update(account.password_hash)
+
+    assert client.post("/api/v1/auth/login", json={"email": "d@example.com", "password": "rahasia"}).status_code == 200
+    db.refresh(account)
+    assert not pwd_context.needs_update(account.password_hash)
+    assert pwd_context.verify("rahasia", account.password_hash)
+    assert account.updated_at == updated_at
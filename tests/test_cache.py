@@ -0,0 +1,179 @@
+import fnmatch
+
+import pytest
+
+from app.core.cache import MISSING, CacheBackend, MemoryCache, RedisCache, cached, get_cache, set_cache
+from app.models.medical import User, UserRole, Patient
+from app.services.profile_service import ProfileService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeRedis:
+    """Subset redis-py yang dipakai RedisCache; TTL diabaikan"""
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def sadd(self, key, member):
+        self.data.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def expire(self, key, seconds):
+        pass
+
+    def scan_iter(self, match="*"):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    backend = MemoryCache(max_entries=100) if request.param == "memory" else RedisCache(FakeRedis())
+    set_cache(backend)
+    yield backend
+    set_cache(None)
+
+def test_get_set_returns_copies(cache):
+    assert cache.get("k") is MISSING
+    value = {"a": [1, 2]}
+    cache.set("k", value)
+    value["a"].append(3)
+    cached_value = cache.get("k")
+    assert cached_value == {"a": [1, 2]}
+    cached_value["a"].append(4)
+    assert cache.get("k") == {"a": [1, 2]}
+    assert cache.stats.snapshot()["hits"] == 2
+
+def test_tag_invalidation(cache):
+    cache.set("p:1", 1, tags=["patient:1", "user:10"])
+    cache.set("p:2", 2, tags=["patient:2"])
+    assert cache.invalidate_tags(["user:10"]) == 1
+    assert cache.get("p:1") is MISSING
+    assert cache.get("p:2") == 2
+    cache.clear()
+    assert cache.get("p:2") is MISSING
+
+def test_memory_lru_ttl_and_size_accounting():
+    clock = FakeClock()
+    cache = MemoryCache(max_entries=2, max_bytes=1000, default_ttl=10, clock=clock)
+    cache.set("a", "x" * 10, tags=["t"])
+    cache.set("b", "y")
+    cache.get("a")
+    cache.set("c", "z")
+    assert cache.get("b") is MISSING  # LRU: b paling lama tidak dipakai
+    assert cache.size_bytes == len(b'"' + b"x" * 10 + b'"') + len(b'"z"')
+    clock.now = 11
+    assert cache.get("a") is MISSING
+    assert cache.get("c") is MISSING
+    assert cache.size_bytes == 0
+    assert cache.describe()["tags"] == 0
+    stats = cache.stats.snapshot()
+    assert stats["evictions"] == 1 and stats["expirations"] == 2
+
+def test_memory_evicts_by_bytes():
+    cache = MemoryCache(max_entries=100, max_bytes=50)
+    cache.set("a", "x" * 30)
+    cache.set("b", "y" * 30)
+    assert cache.get("a") is MISSING
+    assert cache.get("b") == "y" * 30
+    cache.set("huge", "z" * 100)  # lebih besar dari kapasitas: tidak disimpan
+    assert cache.get("huge") is MISSING and cache.get("b") == "y" * 30
+
+def test_cached_decorator_skips_db_and_none(cache):
+    calls = []
+
+    class Service:
+        @staticmethod
+        @cached("lookup", tags=lambda result, item_id, **_: [f"item:{item_id}"])
+        def lookup(db, item_id, flag=False):
+            calls.append(item_id)
+            return None if item_id < 0 else {"id": item_id, "flag": flag}
+
+    assert Service.lookup(object(), 1) == {"id": 1, "flag": False}
+    assert Service.lookup(object(), 1) == {"id": 1, "flag": False}
+    assert Service.lookup(object(), -1) is None
+    assert Service.lookup(object(), -1) is None
+    assert calls == [1, -1, -1]
+    Service.lookup.invalidate(item_id=1)
+    Service.lookup(object(), 1)
+    assert calls == [1, -1, -1, 1]
+
+def test_cache_errors_fall_back_to_function():
+    class BrokenCache(MemoryCache):
+        def get(self, key):
+            raise ConnectionError("redis down")
+
+    set_cache(BrokenCache())
+    try:
+        @cached("broken")
+        def compute(db, x):
+            return x * 2
+        assert compute(None, 2) == 4
+        assert get_cache().stats.snapshot()["errors"] == 1
+    finally:
+        set_cache(None)
+
+def test_commit_invalidates_profile_tags(sqlite_db):
+    set_cache(MemoryCache())
+    try:
+        user = User(name="Pat", email="p@x.com", password_hash="x", role=UserRole.patient)
+        sqlite_db.add(user)
+        sqlite_db.flush()
+        patient = Patient(user_id=user.id, name="Pat", email="p@x.com")
+        sqlite_db.add(patient)
+        sqlite_db.commit()
+
+        assert ProfileService.get_patient_profile(sqlite_db, patient.id)["profilePhotoUrl"] is None
+        assert get_cache().describe()["entries"] == 1
+        # Rollback tidak meng-invalidate
+        user.photo_url = "/static/user_photos/p.jpg"
+        sqlite_db.flush()
+        sqlite_db.rollback()
+        assert get_cache().describe()["entries"] == 1
+
+        user.photo_url = "/static/user_photos/p.jpg"
+        sqlite_db.commit()
+        assert get_cache().describe()["entries"] == 0
+        profile = ProfileService.get_patient_profile(sqlite_db, patient.id)
+        assert profile["profilePhotoUrl"] == "https://dopply.my.id/static/user_photos/p.jpg"
+    finally:
+        set_cache(None)
+
+def test_profile_key_distinguishes_updates_within_one_second(sqlite_db):
+    from sqlalchemy import update
+    set_cache(MemoryCache())
+    try:
+        doctor = User(name="Dr A", email="a@x.com", password_hash="x", role=UserRole.doctor)
+        sqlite_db.add(doctor)
+        sqlite_db.commit()
+        first = doctor.updated_at.replace(microsecond=100)
+        assert ProfileService.get_doctor_profile(sqlite_db, doctor.id, (first,))["name"] == "Dr A"
+        # Worker lain mengubah profil di detik yang sama (tanpa invalidasi tag lokal)
+        sqlite_db.execute(update(User).where(User.id == doctor.id).values(name="Dr B"))
+        sqlite_db.commit()
+        second = first.replace(microsecond=200)
+        assert ProfileService.get_doctor_profile(sqlite_db, doctor.id, (first,))["name"] == "Dr A"
+        assert ProfileService.get_doctor_profile(sqlite_db, doctor.id, (second,))["name"] == "Dr B"
+    finally:
+        set_cache(None)
+
+def test_backend_interface_requires_all_methods():
+    class GetOnlyCache(CacheBackend):
+        def get(self, key):
+            return MISSING
+
+    with pytest.raises(TypeError):
+        GetOnlyCache()
@@ -0,0 +1,92 @@
+import gzip
+import json
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, GzipEncoder, negotiate_encoding
+
+BPM = [{"t": i, "bpm": 140 + i % 7} for i in range(2000)]
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/history")
+    def history():
+        return {"status": "success", "data": BPM}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        def chunks():
+            for i in range(5):
+                yield json.dumps(BPM[i * 100:(i + 1) * 100]) + "\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: 1\n\n"] * 200), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500, content_types=["application/json", "text/plain"],
+                       levels={"gzip": 6}, encoders={"gzip": GzipEncoder})
+    return app
+
+def raw_get(client, path, accept="gzip"):
+    # Matikan dekompresi otomatis httpx agar byte di jaringan bisa diperiksa
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+def test_negotiation_respects_q_values_and_server_preference():
+    preferred = ["zstd", "br", "gzip"]
+    assert negotiate_encoding("gzip, br", preferred) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", preferred) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip", preferred) == "gzip"
+    assert negotiate_encoding("*", preferred) == "zstd"
+    assert negotiate_encoding("identity", preferred) is None
+
+def test_large_json_is_gzipped_with_length():
+    client = TestClient(build_app())
+    response, raw = raw_get(client, "/history")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    plain = gzip.decompress(raw)
+    assert json.loads(plain)["data"] == BPM
+    assert len(raw) * 5 < len(plain)
+
+def test_small_or_unaccepted_responses_are_untouched():
+    client = TestClient(build_app())
+    response, raw = raw_get(client, "/small")
+    assert "content-encoding" not in response.headers
+    assert json.loads(raw) == {"ok": True}
+    response, raw = raw_get(client, "/history", accept="identity")
+    assert "content-encoding" not in response.headers
+    assert json.loads(raw)["data"] == BPM
+
+def test_streaming_response_is_compressed_per_chunk():
+    client = TestClient(build_app())
+    response, raw = raw_get(client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = zlib.decompress(raw, 16 + zlib.MAX_WBITS).decode().splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[0]) == BPM[:100]
+
+def test_sync_flush_makes_each_chunk_decodable():
+    encoder = GzipEncoder(6)
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(encoder.compress(b"first chunk")) == b"first chunk"
+    assert decoder.decompress(encoder.compress(b"second")) == b"second"
+    decoder.decompress(encoder.finish())
+    assert decoder.eof
+
+def test_event_stream_is_not_compressed():
+    client = TestClient(build_app())
+    response, raw = raw_get(client, "/events")
+    assert "content-encoding" not in response.headers
+    assert raw.startswith(b"data: 1")
@@ -0,0 +1,119 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.concurrency_limiter import (
+    AdaptiveConcurrencyLimiter, ConcurrencyLimitMiddleware, classify_request
+)
+
+SHARES = {"critical": 1.0, "normal": 0.8, "low": 0.5}
+PRIORITIES = {
+    "/api/v1/monitoring/submit": "critical",
+    "/api/v1/monitoring/history": "low",
+    "/api/v1/monitoring/notifications/stream": "exempt",
+}
+
+def make_limiter(limit=10):
+    return AdaptiveConcurrencyLimiter(limit, 2, 100, latency_tolerance=2.0, backoff_ratio=0.5,
+                                      priority_shares=SHARES, decrease_cooldown=1.0)
+
+def scope(path, query=b""):
+    return {"type": "http", "path": path, "query_string": query}
+
+def test_classify_by_longest_prefix():
+    assert classify_request(scope("/api/v1/monitoring/submit"), PRIORITIES) == "critical"
+    assert classify_request(scope("/api/v1/monitoring/history"), PRIORITIES) == "low"
+    assert classify_request(scope("/api/v1/monitoring/notifications/stream"), PRIORITIES) == "exempt"
+    assert classify_request(scope("/api/v1/patients/1"), PRIORITIES) == "normal"
+    assert classify_request(scope("/api/v1/sync", b"since=x&wait=25"), PRIORITIES) == "exempt"
+    assert classify_request(scope("/api/v1/sync", b"wait=0"), PRIORITIES) == "normal"
+
+def test_low_priority_is_shed_first():
+    limiter = make_limiter(10)
+    for _ in range(5):
+        assert limiter.try_acquire("low")
+    assert not limiter.try_acquire("low")
+    for _ in range(3):
+        assert limiter.try_acquire("normal")
+    assert not limiter.try_acquire("normal")
+    assert limiter.try_acquire("critical")
+    assert limiter.try_acquire("critical")
+    assert not limiter.try_acquire("critical")
+    assert limiter.rejected == {"low": 1, "normal": 1, "critical": 1}
+
+def test_latency_spike_decreases_limit_once_per_cooldown():
+    limiter = make_limiter(10)
+    limiter.inflight = 3
+    limiter.release("/r", 0.01, now=10.0)  # baseline
+    limiter.release("/r", 0.5, now=10.0)
+    assert limiter.limit == 5.0
+    limiter.release("/r", 0.5, now=10.5)
+    assert limiter.limit == 5.0  # masih cooldown
+    limiter.inflight = 1
+    limiter.release("/r", 0.5, now=11.5)
+    assert limiter.limit == 2.5
+    limiter.inflight = 1
+    limiter.release("/r", 0.5, now=13.0)
+    assert limiter.limit == 2.0  # tidak di bawah min_limit
+
+def test_healthy_latency_grows_limit_additively_when_utilized():
+    limiter = make_limiter(10)
+    limiter.inflight = 8
+    limiter.release("/r", 0.01)
+    limiter.release("/r", 0.01)
+    assert 10.0 < limiter.limit < 10.2
+    limiter.inflight = 1
+    before = limiter.limit
+    limiter.release("/r", 0.01)
+    assert limiter.limit == before  # utilisasi rendah: limit tidak naik
+
+def test_fast_first_sample_does_not_collapse_limit():
+    limiter = make_limiter(20)
+    now = 10.0
+    limiter.inflight = 1
+    limiter.release("/r", 0.001, now=now)  # mis. 401 cepat yang lolos sebagai sampel pertama
+    for _ in range(500):
+        now += 0.01  # ~100 request/detik, latency stabil lebih lambat
+        limiter.inflight = 1
+        limiter.release("/r", 0.05, now=now)
+    assert limiter.limit == 10.0  # satu penurunan, lalu baseline menyesuaikan
+    assert limiter._routes["/r"].baseline > 0.025
+
+def test_middleware_samples_only_successful_responses():
+    app = FastAPI()
+
+    @app.get("/api/v1/patients/me")
+    def me(ok: bool = False):
+        if not ok:
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    limiter = make_limiter(4)
+    app.add_middleware(ConcurrencyLimitMiddleware, limiter=limiter, priorities=PRIORITIES)
+    client = TestClient(app)
+
+    assert client.get("/api/v1/patients/me").status_code == 401
+    assert limiter._routes == {} and limiter.inflight == 0
+    assert client.get("/api/v1/patients/me?ok=1").status_code == 200
+    assert list(limiter._routes) == ["/api/v1/patients/me"]
+
+def test_middleware_returns_503_with_retry_after():
+    app = FastAPI()
+
+    @app.get("/api/v1/monitoring/history")
+    def history():
+        return {"ok": True}
+
+    limiter = make_limiter(4)
+    app.add_middleware(ConcurrencyLimitMiddleware, limiter=limiter, priorities=PRIORITIES, retry_after=3)
+    client = TestClient(app)
+
+    assert client.get("/api/v1/monitoring/history").status_code == 200
+    assert limiter.inflight == 0
+
+    limiter.inflight = 2  # porsi low (0.5 x 4) sudah penuh
+    response = client.get("/api/v1/monitoring/history")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+    body = response.json()
+    assert body["error_code"] == "service_unavailable"
+    assert body["status"] == "error"
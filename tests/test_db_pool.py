@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import exc, text
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.pool import TimedQueuePool, pool_options
+from app.db.session import create_app_engine
+
+@pytest.fixture
+def pooled(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_POOL_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT_SECONDS", 0.1)
+    engines = []
+
+    def make(label="test", **overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        engine = create_app_engine(f"sqlite:///{tmp_path / 'pool.db'}", label)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+def test_pool_options_follow_settings(monkeypatch):
+    assert pool_options("sqlite://") == {}
+    options = pool_options("postgresql://u:p@db/dopply")
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_recycle"] == settings.DB_POOL_RECYCLE_SECONDS
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", "always")
+    assert pool_options("postgresql://u:p@db/dopply")["pool_pre_ping"] is True
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", "sometimes")
+    with pytest.raises(ValueError):
+        pool_options("postgresql://u:p@db/dopply")
+
+def test_checkout_wait_and_timeouts_are_recorded(pooled):
+    engine = pooled(DB_POOL_PRE_PING="off")
+    before = metrics.pool_checkout_wait.snapshot().get(("test",), ([], 0.0, 0))[2]
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert engine.pool.timeouts == 1
+    assert metrics.pool_checkout_wait.snapshot()[("test",)][2] == before + 2
+
+    engine.dispose()
+    assert engine.pool.label == "test" and engine.pool.timeouts == 1
+
+def test_idle_pre_ping_replaces_dead_connections(pooled, monkeypatch):
+    engine = pooled(DB_POOL_PRE_PING="idle", DB_POOL_PRE_PING_IDLE_SECONDS=0.0)
+    pings = []
+    monkeypatch.setattr(engine.dialect, "do_ping", lambda dbapi_connection: pings.append(dbapi_connection) or False)
+
+    with engine.connect() as conn:
+        first = conn.connection.dbapi_connection
+    assert pings == []  # Koneksi baru tidak di-ping
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        second = conn.connection.dbapi_connection
+    assert pings[0] is first and second is not first
+
+def test_idle_pre_ping_skips_recently_used_connections(pooled, monkeypatch):
+    engine = pooled(DB_POOL_PRE_PING="idle", DB_POOL_PRE_PING_IDLE_SECONDS=60.0)
+    monkeypatch.setattr(engine.dialect, "do_ping", lambda dbapi_connection: pytest.fail("unexpected ping"))
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
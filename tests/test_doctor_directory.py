@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints import user
+from app.core.dependencies import get_current_principal, get_read_db
+from app.core.principal import Principal
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.medical import User, UserRole
+from app.services.doctor_directory import DoctorDirectory, doctor_directory
+
+def add_doctor(db, name, specialization=None):
+    doctor = User(name=name, email=f"{name.lower().replace(' ', '.')}@x.com", password_hash="x",
+                  role=UserRole.doctor, specialization=specialization)
+    db.add(doctor)
+    db.commit()
+    return doctor
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    patient = User(name="Pat", email="p@x.com", password_hash="x", role=UserRole.patient)
+    db.add(patient)
+    db.commit()
+    add_doctor(db, "Dr Budi", "Obgyn")
+    add_doctor(db, "Dr Sari", "Anak")
+    add_doctor(db, "Dr Bima", "obgyn")
+
+    app = FastAPI()
+    app.include_router(user.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    principal = Principal(patient.id, patient.email, patient.role)
+    app.dependency_overrides[get_current_principal] = lambda: principal
+    yield TestClient(app), db
+    db.close()
+    engine.dispose()
+
+def test_directory_is_loaded_once_until_invalidated(sqlite_db):
+    add_doctor(sqlite_db, "Dr Budi")
+    directory = DoctorDirectory(ttl_seconds=60)
+    first = directory.get(sqlite_db)
+    assert directory.get(sqlite_db) is first
+    assert directory.loads == 1
+    directory.invalidate()
+    assert directory.get(sqlite_db) is not first
+    assert directory.loads == 2
+
+def test_expired_ttl_only_rechecks_version(sqlite_db):
+    add_doctor(sqlite_db, "Dr Budi")
+    directory = DoctorDirectory(ttl_seconds=0)
+    first = directory.get(sqlite_db)
+    assert directory.get(sqlite_db) is first
+    assert directory.loads == 1
+    add_doctor(sqlite_db, "Dr Sari")
+    assert [d["name"] for d in directory.get(sqlite_db).entries] == ["Dr Budi", "Dr Sari"]
+    assert directory.loads == 2
+
+def test_doctor_commit_invalidates_shared_directory(sqlite_db):
+    doctor = add_doctor(sqlite_db, "Dr Budi")
+    snapshot = doctor_directory.get(sqlite_db)
+    assert doctor_directory.get(sqlite_db) is snapshot
+    doctor.photo_url = "/static/user_photos/b.jpg"
+    sqlite_db.commit()
+    entry = doctor_directory.get(sqlite_db).entries[0]
+    assert entry["profilePhotoUrl"] == "https://dopply.my.id/static/user_photos/b.jpg"
+
+def test_patient_commit_keeps_directory(sqlite_db):
+    add_doctor(sqlite_db, "Dr Budi")
+    snapshot = doctor_directory.get(sqlite_db)
+    sqlite_db.add(User(name="Pat", email="p@x.com", password_hash="x", role=UserRole.patient))
+    sqlite_db.commit()
+    assert doctor_directory.get(sqlite_db) is snapshot
+
+def test_endpoint_serves_full_list_with_etag(env):
+    client, _ = env
+    response = client.get("/api/v1/user/all-doctors")
+    assert response.status_code == 200
+    body = response.json()
+    assert [d["name"] for d in body] == ["Dr Budi", "Dr Sari", "Dr Bima"]
+    assert set(body[0]) == {"id", "userId", "name", "email", "specialization",
+                            "profilePhotoUrl", "createdAt", "updatedAt"}
+    revalidated = client.get("/api/v1/user/all-doctors", headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+def test_endpoint_filters_and_paginates(env):
+    client, _ = env
+    response = client.get("/api/v1/user/all-doctors", params={"specialization": "OBGYN", "limit": 1})
+    assert [d["name"] for d in response.json()] == ["Dr Budi"]
+    assert response.headers["x-total-count"] == "2"
+    response = client.get("/api/v1/user/all-doctors", params={"q": "bi", "skip": 0})
+    assert [d["name"] for d in response.json()] == ["Dr Bima"]
+    full = client.get("/api/v1/user/all-doctors")
+    assert response.headers["etag"] != full.headers["etag"]
+    assert client.get("/api/v1/user/all-doctors", params={"limit": 0}).status_code == 422
+
+def test_register_doctor_changes_etag(env):
+    client, db = env
+    etag = client.get("/api/v1/user/all-doctors").headers["etag"]
+    add_doctor(db, "Dr Nanda")
+    response = client.get("/api/v1/user/all-doctors", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert json.loads(response.content)[-1]["name"] == "Dr Nanda"
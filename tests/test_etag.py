@@ -0,0 +1,109 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints import doctor as doctor_endpoints, monitoring, patient as patient_endpoints, user
+from app.core.dependencies import get_current_user, get_current_principal, get_read_db
+from app.core.principal import Principal
+from app.core.etag import etag_matches, make_etag
+from app.core.time_utils import get_local_naive_now
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.medical import User, UserRole, Patient, Record, DoctorPatientAssociation, Notification
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    doctor = User(name="Dr. A", email="a@example.com", password_hash="x", role=UserRole.doctor)
+    patient_user = User(name="Pat", email="p@example.com", password_hash="x", role=UserRole.patient)
+    db.add_all([doctor, patient_user])
+    db.flush()
+    patient = Patient(user_id=patient_user.id, name="Pat", email="p@example.com")
+    db.add(patient)
+    db.flush()
+    db.add(DoctorPatientAssociation(doctor_id=doctor.id, patient_id=patient.id))
+    db.add(Record(patient_id=patient.id, start_time=get_local_naive_now(), created_by=patient_user.id, bpm_data=[140]))
+    db.commit()
+
+    app = FastAPI()
+    for router in (doctor_endpoints.router, patient_endpoints.router, monitoring.router, user.router):
+        app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: doctor
+    principal = Principal(doctor.id, doctor.email, doctor.role)
+    app.dependency_overrides[get_current_principal] = lambda: principal
+    yield TestClient(app), db, doctor, patient
+    db.close()
+    engine.dispose()
+
+def revalidate(client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    second = client.get(path, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+    return etag
+
+def test_etag_is_stable_and_weak_comparison_matches():
+    assert make_etag("doctor", 1, "2025-01-01") == make_etag("doctor", 1, "2025-01-01")
+    assert make_etag("doctor", 1, "2025-01-01") != make_etag("doctor", 2, "2025-01-01")
+    etag = make_etag("x")
+    assert etag.startswith('W/"')
+    assert etag_matches('"other", ' + etag[2:], etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/user/all-doctors",
+    "/api/v1/monitoring/history",
+    "/api/v1/monitoring/doctor-history",
+])
+def test_list_endpoints_answer_304_on_match(env, path):
+    client, *_ = env
+    revalidate(client, path)
+
+def test_doctor_etag_changes_after_update(env):
+    client, db, doctor, _ = env
+    path = f"/api/v1/doctors/{doctor.id}"
+    etag = revalidate(client, path)
+    body = client.get(path).json()
+    assert body["data"]["updatedAt"] == doctor.updated_at.isoformat()
+
+    doctor.specialization = "Obgyn"
+    db.commit()
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["data"]["specialization"] == "Obgyn"
+
+def test_patient_etag_tracks_patient_and_user_rows(env):
+    client, db, _, patient = env
+    path = f"/api/v1/patients/{patient.id}"
+    etag = revalidate(client, path)
+    patient.user.photo_url = "/static/user_photos/p.jpg"
+    db.commit()
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 200
+
+def test_history_etag_changes_when_record_is_updated(env):
+    client, db, _, patient = env
+    etag = revalidate(client, "/api/v1/monitoring/history")
+    record = db.query(Record).filter(Record.patient_id == patient.id).first()
+    record.doctor_notes = "checked"
+    db.commit()
+    assert client.get("/api/v1/monitoring/history", headers={"If-None-Match": etag}).status_code == 200
+
+def test_version_columns_keep_microseconds_on_mysql():
+    from sqlalchemy.dialects import mysql
+    from sqlalchemy.schema import CreateTable
+    # ETag & cache key profil berubah untuk update dalam detik yang sama
+    for model in (User, Patient, Record, Notification):
+        ddl = str(CreateTable(model.__table__).compile(dialect=mysql.dialect()))
+        assert "updated_at DATETIME(6) NOT NULL" in ddl
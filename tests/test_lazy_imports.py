@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.core import security
+
+LAZY_MODULES = ("jose", "passlib", "argon2", "numpy")
+
+def test_boot_does_not_import_heavy_libraries():
+    code = f"import sys, app.main; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).parent.parent,
+        env=dict(os.environ), capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+def test_password_context_is_built_once_on_first_use():
+    assert security.pwd_context is security.get_pwd_context()
+    assert security.verify_password("rahasia", security.get_password_hash("rahasia"))
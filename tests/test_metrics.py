@@ -0,0 +1,77 @@
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import Histogram, MetricsRegistry, MetricsMiddleware
+from app.core.request_context import begin_request, end_request, get_request_stats
+from app.db.session import instrument_engine
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h", "test", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(("/a",), value)
+    cumulative, total, count = histogram.snapshot()[("/a",)]
+    assert cumulative == [2, 3, 4]
+    assert count == 4
+    assert total == 5.65
+
+def test_histogram_merges_thread_shards():
+    histogram = Histogram("h", "test", ("route",), (1.0,))
+    threads = [threading.Thread(target=lambda: [histogram.observe(("/a",), 0.5) for _ in range(100)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert histogram.snapshot()[("/a",)][2] == 400
+
+def test_render_prometheus_text():
+    histogram = Histogram("dopply_test_seconds", "test", ("route",), (0.5,))
+    histogram.observe(('/x/"y"',), 0.25)
+    lines = histogram.render()
+    assert lines[0] == "# HELP dopply_test_seconds test"
+    assert lines[1] == "# TYPE dopply_test_seconds histogram"
+    assert 'dopply_test_seconds_bucket{route="/x/\\"y\\"",le="0.5"} 1' in lines
+    assert 'dopply_test_seconds_bucket{route="/x/\\"y\\"",le="+Inf"} 1' in lines
+    assert 'dopply_test_seconds_count{route="/x/\\"y\\""} 1' in lines
+
+def test_engine_hooks_count_queries_for_active_request():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    token = begin_request()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        stats = get_request_stats()
+        assert stats.query_count == 2
+        assert stats.db_time > 0
+    finally:
+        end_request(token)
+    assert get_request_stats() is None
+
+def test_middleware_records_route_template_and_stats():
+    registry = MetricsRegistry()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        # Endpoint sync berjalan di thread pool; statistik tetap milik request ini
+        get_request_stats().record_query(0.002)
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    client = TestClient(app)
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    latency = registry.request_latency.snapshot()
+    assert latency[("GET", "/items/{item_id}", "200")][2] == 2
+    assert latency[("GET", "unmatched", "404")][2] == 1
+    cumulative, _, _ = registry.request_queries.snapshot()[("GET", "/items/{item_id}")]
+    assert cumulative[0] == 0  # tidak ada request dengan 0 query
+    assert cumulative[1] == 2
+    assert registry.response_bytes.snapshot()[("GET", "/items/{item_id}")][1] == len(b'{"id":1}') * 2
+    assert "dopply_http_request_duration_seconds_count" in registry.render()
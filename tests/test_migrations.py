@@ -0,0 +1,68 @@
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db.migrations import PROJECT_ROOT, SchemaOutOfDate, alembic_heads, verify_schema
+
+@pytest.fixture
+def migrated(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'schema.db'}"
+    # env.py membaca URL dari settings; Config tanpa file agar logging pytest tidak diubah
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    config = Config()
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    engine = create_engine(url)
+    yield config, engine
+    engine.dispose()
+
+def test_migrations_have_a_single_head():
+    assert len(alembic_heads()) == 1
+
+def test_verify_schema_tracks_alembic_revision(migrated):
+    config, engine = migrated
+    with pytest.raises(SchemaOutOfDate):
+        verify_schema(engine, "strict")
+    assert not verify_schema(engine, "warn").up_to_date
+    assert verify_schema(engine, "off") is None
+
+    command.upgrade(config, "head")
+    assert verify_schema(engine, "strict").current == alembic_heads()
+
+    command.downgrade(config, "-1")
+    with pytest.raises(SchemaOutOfDate):
+        verify_schema(engine, "strict")
+    with pytest.raises(ValueError):
+        verify_schema(engine, "sometimes")
+
+def test_updated_at_backfill_uses_existing_timestamps(migrated):
+    config, engine = migrated
+    command.upgrade(config, "52865625f382")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO users (id, name, email, password_hash, role, created_at) "
+            "VALUES (1, 'Pat', 'p@x.com', 'x', 'patient', '2024-03-01 08:00:00')"
+        ))
+        connection.execute(text("INSERT INTO patients (id, user_id, name, email) VALUES (1, 1, 'Pat', 'p@x.com')"))
+    command.upgrade(config, "6c0632ddc9eb")
+    with engine.connect() as connection:
+        patient_updated_at = connection.execute(text("SELECT updated_at FROM patients WHERE id = 1")).scalar()
+        user_updated_at = connection.execute(text("SELECT updated_at FROM users WHERE id = 1")).scalar()
+    # Bukan waktu migrasi: delta sync & ETag pertama setelah deploy tidak menganggap semua pasien berubah
+    assert str(patient_updated_at).startswith("2024-03-01 08:00:00")
+    assert str(user_updated_at).startswith("2024-03-01 08:00:00")
+
+def test_lifespan_checks_schema_instead_of_creating_it(monkeypatch):
+    from app.main import app
+    monkeypatch.setattr(settings, "OUTBOX_DISPATCHER_ENABLED", False)
+    monkeypatch.setattr(settings, "SCHEMA_CHECK_MODE", "warn")
+    with TestClient(app) as client:
+        assert client.get("/health").json() == {"status": "ok"}
+        assert app.state.schema_status.heads == alembic_heads()
+    # Database test dibuat dengan create_all (tanpa alembic_version): strict menolak start
+    monkeypatch.setattr(settings, "SCHEMA_CHECK_MODE", "strict")
+    with pytest.raises(SchemaOutOfDate):
+        with TestClient(app):
+            pass
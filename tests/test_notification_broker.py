@@ -0,0 +1,80 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from datetime import datetime
+
+import pytest
+
+from app.services.notification_broker import (
+    InMemoryNotificationBroker, NotificationBroker, format_sse_event, stream_notifications, build_notification_event
+)
+
+def test_publish_delivers_to_doctor_subscribers_only():
+    async def scenario():
+        broker = InMemoryNotificationBroker()
+        sub_a = broker.subscribe(1)
+        sub_b = broker.subscribe(2)
+        broker.publish(1, {"id": 10})
+        assert await sub_a.get(timeout=0.1) == {"id": 10}
+        assert await sub_b.get(timeout=0.05) is None
+        broker.unsubscribe(sub_a)
+        broker.unsubscribe(sub_b)
+        assert broker.subscriber_count() == 0
+    asyncio.run(scenario())
+
+def test_publish_from_worker_thread():
+    async def scenario():
+        broker = InMemoryNotificationBroker()
+        sub = broker.subscribe(5)
+        thread = threading.Thread(target=broker.publish, args=(5, {"id": 1}))
+        thread.start()
+        thread.join()
+        assert await sub.get(timeout=1) == {"id": 1}
+    asyncio.run(scenario())
+
+def test_slow_subscriber_drops_oldest_event():
+    async def scenario():
+        broker = InMemoryNotificationBroker(max_queue_size=2)
+        sub = broker.subscribe(1)
+        for i in range(3):
+            broker.publish(1, {"id": i})
+        assert (await sub.get(timeout=0.1))["id"] == 1
+        assert (await sub.get(timeout=0.1))["id"] == 2
+    asyncio.run(scenario())
+
+def test_format_sse_event():
+    payload = format_sse_event({"id": 7, "message": "hi"})
+    assert payload.startswith("id: 7\nevent: notification\ndata: ")
+    assert payload.endswith("\n\n")
+    data_line = payload.splitlines()[2]
+    assert json.loads(data_line[len("data: "):])["message"] == "hi"
+
+def test_stream_sends_heartbeat_and_events():
+    async def scenario():
+        broker = InMemoryNotificationBroker()
+        stream = stream_notifications(broker, 3, heartbeat_seconds=0.01)
+        assert await stream.__anext__() == ": connected\n\n"
+        assert await stream.__anext__() == ": keepalive\n\n"
+        broker.publish(3, {"id": 99})
+        assert (await stream.__anext__()).startswith("id: 99")
+        await stream.aclose()
+        assert broker.subscriber_count(3) == 0
+    asyncio.run(scenario())
+
+def test_build_notification_event():
+    notification = SimpleNamespace(id=1, record_id=2, message="m", created_at=datetime(2025, 1, 1, 8, 0))
+    event = build_notification_event(notification, None)
+    assert event["from_patient_name"] == "Unknown"
+    assert event["created_at"] == "2025-01-01T08:00:00"
+    assert event["is_read"] is False
+
+def test_broker_interface_requires_all_methods():
+    class PublishOnlyBroker(NotificationBroker):
+        def publish(self, doctor_id, event):
+            pass
+
+    with pytest.raises(TypeError):
+        PublishOnlyBroker()
+    with pytest.raises(TypeError):
+        NotificationBroker()
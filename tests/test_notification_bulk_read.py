@@ -0,0 +1,57 @@
+import pytest
+from datetime import timedelta
+
+from app.models.medical import Notification, NotificationStatus
+from app.services.monitoring_simple import MonitoringService
+from tests.test_notification_counter_service import seed_doctor_with_notifications
+
+def test_bulk_read_by_ids(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=3, read=0)
+    ids = [n.id for n in sqlite_db.query(Notification).order_by(Notification.id).all()]
+    result = MonitoringService.mark_notifications_read_bulk(sqlite_db, doctor.id, notification_ids=ids[:2])
+    assert result["updated_count"] == 2
+    assert result["unread_count"] == 1
+    assert result["read_up_to_id"] == 0
+
+def test_bulk_read_by_watermark(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=3, read=1)
+    ids = [n.id for n in sqlite_db.query(Notification).order_by(Notification.id).all()]
+    result = MonitoringService.mark_notifications_read_bulk(sqlite_db, doctor.id, up_to_id=ids[1])
+    assert result["updated_count"] == 2
+    assert result["unread_count"] == 1
+    assert result["read_up_to_id"] == ids[1]
+
+    unread = MonitoringService.get_doctor_notifications(sqlite_db, doctor.id, unread_only=True)
+    assert [n["id"] for n in unread["notifications"]] == [ids[2]]
+
+    # Watermark tidak pernah mundur
+    result = MonitoringService.mark_notifications_read_bulk(sqlite_db, doctor.id, up_to_id=ids[0])
+    assert result["read_up_to_id"] == ids[1]
+
+def test_bulk_read_by_created_at(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=2, read=0)
+    latest = sqlite_db.query(Notification).order_by(Notification.id.desc()).first()
+    result = MonitoringService.mark_notifications_read_bulk(
+        sqlite_db, doctor.id, up_to_created_at=latest.created_at + timedelta(seconds=1)
+    )
+    assert result["updated_count"] == 2
+    assert result["read_up_to_id"] == latest.id
+    assert sqlite_db.query(Notification).filter(Notification.status == NotificationStatus.unread).count() == 0
+
+def test_bulk_read_ignores_other_doctors_notifications(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=1, read=0)
+    notification = sqlite_db.query(Notification).first()
+    result = MonitoringService.mark_notifications_read_bulk(sqlite_db, doctor.id + 100, notification_ids=[notification.id])
+    assert result["updated_count"] == 0
+
+def test_bulk_read_requires_ids_or_watermark(sqlite_db):
+    with pytest.raises(ValueError):
+        MonitoringService.mark_notifications_read_bulk(sqlite_db, 1)
+    with pytest.raises(ValueError):
+        MonitoringService.mark_notifications_read_bulk(sqlite_db, 1, notification_ids=[1], up_to_id=5)
+
+def test_watermark_is_capped_to_existing_notifications(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=1, read=0)
+    latest = sqlite_db.query(Notification).order_by(Notification.id.desc()).first()
+    result = MonitoringService.mark_notifications_read_bulk(sqlite_db, doctor.id, up_to_id=latest.id + 50)
+    assert result["read_up_to_id"] == latest.id
@@ -0,0 +1,158 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints import monitoring
+from app.core.dependencies import get_current_principal, get_read_db
+from app.core.principal import Principal
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.medical import (
+    User, UserRole, Patient, Record, Notification, NotificationStatus, DoctorNotificationCounter
+)
+from app.services.notification_counter_service import NotificationCounterService
+from app.services.monitoring_simple import MonitoringService
+from app.core.time_utils import get_local_naive_now
+
+def seed_doctor_with_notifications(db, unread=2, read=1):
+    doctor = User(name="Dr. A", email="a@example.com", password_hash="x", role=UserRole.doctor)
+    patient_user = User(name="Pat", email="p@example.com", password_hash="x", role=UserRole.patient)
+    db.add_all([doctor, patient_user])
+    db.flush()
+    patient = Patient(user_id=patient_user.id, name="Pat", email="p@example.com")
+    db.add(patient)
+    db.flush()
+    record = Record(patient_id=patient.id, start_time=get_local_naive_now(), created_by=patient_user.id)
+    db.add(record)
+    db.flush()
+    statuses = [NotificationStatus.unread] * unread + [NotificationStatus.read] * read
+    for status in statuses:
+        db.add(Notification(from_patient_id=patient.id, to_doctor_id=doctor.id, record_id=record.id,
+                            message="m", status=status))
+    db.commit()
+    return doctor
+
+def test_get_counts_seeds_missing_counter(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db)
+    assert NotificationCounterService.get_counts(sqlite_db, doctor.id) == {"total_count": 3, "unread_count": 2, "read_up_to_id": 0}
+    assert sqlite_db.get(DoctorNotificationCounter, doctor.id) is not None
+
+def test_increment_and_decrement(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db)
+    NotificationCounterService.get_counts(sqlite_db, doctor.id)
+    NotificationCounterService.increment(sqlite_db, doctor.id)
+    NotificationCounterService.decrement_unread(sqlite_db, doctor.id, 10)
+    sqlite_db.commit()
+    sqlite_db.expire_all()
+    assert NotificationCounterService.get_counts(sqlite_db, doctor.id) == {"total_count": 4, "unread_count": 0, "read_up_to_id": 0}
+
+def test_mark_notification_read_updates_counter_once(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=1, read=0)
+    NotificationCounterService.get_counts(sqlite_db, doctor.id)
+    notification = sqlite_db.query(Notification).first()
+    MonitoringService.mark_notification_read(sqlite_db, notification.id, doctor.id)
+    MonitoringService.mark_notification_read(sqlite_db, notification.id, doctor.id)
+    sqlite_db.expire_all()
+    assert NotificationCounterService.get_counts(sqlite_db, doctor.id)["unread_count"] == 0
+
+def test_concurrent_mark_read_decrements_counter_once(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=2, read=0)
+    NotificationCounterService.get_counts(sqlite_db, doctor.id)
+    sqlite_db.commit()
+    notification = sqlite_db.query(Notification).first()
+    assert notification.status == NotificationStatus.unread
+    # Request lain menandai notifikasi yang sama setelah sesi ini membacanya
+    other = sessionmaker(bind=sqlite_db.get_bind(), autoflush=False)()
+    MonitoringService.mark_notification_read(other, notification.id, doctor.id)
+    other.close()
+    MonitoringService.mark_notification_read(sqlite_db, notification.id, doctor.id)
+    sqlite_db.expire_all()
+    assert NotificationCounterService.get_counts(sqlite_db, doctor.id)["unread_count"] == 1
+
+def test_mark_notification_read_rejects_other_doctors_notification(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db, unread=1, read=0)
+    notification = sqlite_db.query(Notification).first()
+    try:
+        MonitoringService.mark_notification_read(sqlite_db, notification.id, doctor.id + 100)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    sqlite_db.expire_all()
+    assert notification.status == NotificationStatus.unread
+
+def test_notification_endpoints_require_doctor():
+    # Endpoint async berjalan di thread event loop TestClient: koneksi dibagi lewat StaticPool
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    sqlite_db = sessionmaker(bind=engine, autoflush=False)()
+    doctor = seed_doctor_with_notifications(sqlite_db)
+    patient_user = sqlite_db.query(User).filter(User.role == UserRole.patient).first()
+    app = FastAPI()
+    app.include_router(monitoring.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: sqlite_db
+    app.dependency_overrides[get_read_db] = lambda: sqlite_db
+    principal = {"value": Principal(patient_user.id, patient_user.email, patient_user.role)}
+    app.dependency_overrides[get_current_principal] = lambda: principal["value"]
+    client = TestClient(app)
+
+    assert client.get("/api/v1/monitoring/notifications/count").status_code == 403
+    assert sqlite_db.get(DoctorNotificationCounter, patient_user.id) is None
+
+    assert client.get("/api/v1/monitoring/notifications").status_code == 403
+    assert sqlite_db.get(DoctorNotificationCounter, patient_user.id) is None
+
+    principal["value"] = Principal(doctor.id, doctor.email, doctor.role)
+    response = client.get("/api/v1/monitoring/notifications/count")
+    assert response.status_code == 200
+    assert response.json()["data"]["unread_count"] == 2
+    sqlite_db.close()
+    engine.dispose()
+
+def test_notification_list_on_read_session_does_not_seed_counter(monkeypatch):
+    from app.db import session as db_session
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    # get_read_db asli (flag READ_ONLY), diarahkan ke database test
+    monkeypatch.setattr(db_session, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    setup = db_session.SessionLocal()
+    doctor = seed_doctor_with_notifications(setup, unread=2, read=1)
+    new_doctor = User(name="Dr. B", email="b@example.com", password_hash="x", role=UserRole.doctor)
+    setup.add(new_doctor)
+    setup.commit()
+    doctor_id, new_doctor_id = doctor.id, new_doctor.id
+    app = FastAPI()
+    app.include_router(monitoring.router, prefix="/api/v1")
+    principal = {"value": Principal(doctor_id, "a@example.com", UserRole.doctor)}
+    app.dependency_overrides[get_current_principal] = lambda: principal["value"]
+    client = TestClient(app)
+
+    response = client.get("/api/v1/monitoring/notifications")
+    assert response.status_code == 200
+    assert (response.json()["unread_count"], response.json()["total_count"]) == (2, 3)
+    assert len(response.json()["notifications"]) == 3
+    # Dokter tanpa notifikasi sama sekali
+    principal["value"] = Principal(new_doctor_id, "b@example.com", UserRole.doctor)
+    response = client.get("/api/v1/monitoring/notifications", params={"unread_only": True})
+    assert response.status_code == 200
+    assert response.json()["total_count"] == 0
+    assert setup.query(DoctorNotificationCounter).count() == 0
+    setup.close()
+    engine.dispose()
+
+def test_reconcile_fixes_drift(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db)
+    sqlite_db.add(DoctorNotificationCounter(doctor_id=doctor.id, total_count=99, unread_count=42))
+    sqlite_db.commit()
+    assert NotificationCounterService.reconcile(sqlite_db) == 1
+    sqlite_db.expire_all()
+    assert NotificationCounterService.get_counts(sqlite_db, doctor.id) == {"total_count": 3, "unread_count": 2, "read_up_to_id": 0}
+    assert NotificationCounterService.reconcile(sqlite_db) == 0
+
+def test_get_doctor_notifications_uses_counters(sqlite_db):
+    doctor = seed_doctor_with_notifications(sqlite_db)
+    result = MonitoringService.get_doctor_notifications(sqlite_db, doctor.id)
+    assert result["unread_count"] == 2
+    assert result["total_count"] == 3
+    assert len(result["notifications"]) == 3
@@ -0,0 +1,81 @@
+import pytest
+
+from app.models.medical import User, UserRole, Patient, Record, Notification, OutboxEvent
+from app.services.outbox_dispatcher import OutboxDispatcher, RECORD_SHARED
+from app.services.notification_broker import set_notification_broker, get_notification_broker
+from app.core.time_utils import get_local_naive_now
+
+class RecordingBroker:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, doctor_id, event):
+        self.published.append((doctor_id, event))
+
+@pytest.fixture
+def db(sqlite_db):
+    return sqlite_db
+
+@pytest.fixture
+def broker():
+    previous = get_notification_broker()
+    recording = RecordingBroker()
+    set_notification_broker(recording)
+    yield recording
+    set_notification_broker(previous)
+
+def seed_share(db):
+    doctor = User(name="Dr. A", email="a@example.com", password_hash="x", role=UserRole.doctor)
+    patient_user = User(name="Pat", email="p@example.com", password_hash="x", role=UserRole.patient)
+    db.add_all([doctor, patient_user])
+    db.flush()
+    patient = Patient(user_id=patient_user.id, name="Pat", email="p@example.com")
+    db.add(patient)
+    db.flush()
+    record = Record(patient_id=patient.id, start_time=get_local_naive_now(), created_by=patient_user.id)
+    db.add(record)
+    db.flush()
+    return doctor, patient, record
+
+def test_enqueue_does_not_create_notification_until_dispatch(db, broker):
+    doctor, patient, record = seed_share(db)
+    OutboxDispatcher.enqueue(db, RECORD_SHARED, {
+        "record_id": record.id, "patient_id": patient.id, "doctor_ids": [doctor.id]
+    })
+    db.commit()
+    assert db.query(Notification).count() == 0
+
+    assert OutboxDispatcher.dispatch_batch(db) == 1
+    notification = db.query(Notification).one()
+    assert notification.to_doctor_id == doctor.id
+    assert notification.message == "Monitoring result shared by Pat"
+    assert db.query(OutboxEvent).one().processed_at is not None
+    assert broker.published[0][0] == doctor.id
+    assert broker.published[0][1]["id"] == notification.id
+
+    # Event yang sudah diproses tidak diambil lagi
+    assert OutboxDispatcher.dispatch_batch(db) == 0
+
+def test_fan_out_to_several_doctors(db, broker):
+    doctor, patient, record = seed_share(db)
+    other = User(name="Dr. B", email="b@example.com", password_hash="x", role=UserRole.doctor)
+    db.add(other)
+    db.flush()
+    OutboxDispatcher.enqueue(db, RECORD_SHARED, {
+        "record_id": record.id, "patient_id": patient.id, "doctor_ids": [doctor.id, other.id],
+        "message_template": "Dibagikan oleh {patient_name}"
+    })
+    db.commit()
+    OutboxDispatcher.dispatch_batch(db)
+    assert db.query(Notification).count() == 2
+    assert {doctor_id for doctor_id, _ in broker.published} == {doctor.id, other.id}
+
+def test_failed_event_is_retried_then_skipped(db, broker):
+    OutboxDispatcher.enqueue(db, RECORD_SHARED, {"patient_id": 1})  # payload tidak lengkap
+    db.commit()
+    OutboxDispatcher.dispatch_batch(db)
+    event = db.query(OutboxEvent).one()
+    assert event.processed_at is None
+    assert event.attempts == 1
+    assert event.last_error
+    assert broker.published == []
@@ -0,0 +1,105 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import dependencies
+from app.core.dependencies import get_current_principal
+from app.core.principal import AuthStateCache, Principal, auth_state, revoke_user_tokens
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.models.medical import User, UserRole
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def env(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(dependencies, "SessionLocal", Session)
+    db = Session()
+    user = User(name="Dr. A", email="a@example.com", password_hash="x", role=UserRole.doctor)
+    db.add(user)
+    db.commit()
+    auth_state.invalidate()
+
+    app = FastAPI()
+
+    @app.get("/me")
+    def me(principal: Principal = Depends(get_current_principal)):
+        return {"id": principal.id, "role": principal.role.value}
+
+    token = create_access_token({"sub": user.email, "role": "doctor", "user_id": user.id, "epoch": 0})
+    yield TestClient(app), db, user, {"Authorization": f"Bearer {token}"}
+    auth_state.invalidate()
+    db.close()
+    engine.dispose()
+
+def test_from_claims_accepts_login_and_refresh_tokens():
+    principal = Principal.from_claims({"sub": "a@x.com", "role": "patient", "user_id": 3})
+    assert (principal.id, principal.role, principal.epoch) == (3, UserRole.patient, 0)
+    assert Principal.from_claims({"sub": "a@x.com", "role": "doctor", "id": 4, "epoch": 2}).epoch == 2
+    with pytest.raises(ValueError):
+        Principal.from_claims({"sub": "a@x.com", "role": "doctor"})
+    with pytest.raises(ValueError):
+        Principal.from_claims({"sub": "a@x.com", "role": "nurse", "user_id": 1})
+    assert not hasattr(principal, "__dict__")
+
+def test_auth_state_cache_ttl_and_lru():
+    clock = FakeClock()
+    loads = []
+    cache = AuthStateCache(ttl_seconds=5, max_entries=2, clock=clock)
+    load = lambda user_id: loads.append(user_id) or (UserRole.doctor, 0)
+    cache.get(1, load)
+    cache.get(1, load)
+    assert loads == [1]
+    clock.now = 6
+    cache.get(1, load)
+    cache.get(2, load)
+    cache.get(1, load)
+    cache.get(3, load)  # 2 paling lama tidak dipakai: tergusur
+    cache.get(1, load)
+    assert loads == [1, 1, 2, 3]
+    cache.get(2, load)
+    assert loads == [1, 1, 2, 3, 2]
+
+def test_principal_requests_reuse_cached_auth_state(env):
+    client, _, user, headers = env
+    misses, hits = auth_state.misses, auth_state.hits
+    assert client.get("/me", headers=headers).json() == {"id": user.id, "role": "doctor"}
+    assert client.get("/me", headers=headers).status_code == 200
+    assert (auth_state.misses - misses, auth_state.hits - hits) == (1, 1)
+    assert client.get("/me", headers={"Authorization": "Bearer garbage"}).status_code == 401
+
+def test_revocation_and_role_change_reject_old_tokens(env):
+    client, db, user, headers = env
+    assert client.get("/me", headers=headers).status_code == 200
+    # Commit di worker yang sama meng-invalidate cache tanpa menunggu TTL
+    revoke_user_tokens(user)
+    db.commit()
+    response = client.get("/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+    token = create_access_token({"sub": user.email, "role": "doctor", "user_id": user.id, "epoch": 1})
+    fresh = {"Authorization": f"Bearer {token}"}
+    assert client.get("/me", headers=fresh).status_code == 200
+    user.role = UserRole.admin
+    db.commit()
+    # Ganti role menaikkan token_epoch (lihat _revoke_on_credential_change)
+    assert client.get("/me", headers=fresh).json()["detail"] == "Token has been revoked"
+    stale_role = create_access_token({"sub": user.email, "role": "doctor", "user_id": user.id, "epoch": 2})
+    assert client.get("/me", headers={"Authorization": f"Bearer {stale_role}"}).json()["detail"] \
+        == "Token role is outdated"
+
+    db.delete(user)
+    db.commit()
+    assert client.get("/me", headers=fresh).json()["detail"] == "User not found"
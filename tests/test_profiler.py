@@ -0,0 +1,120 @@
+import cProfile
+import os
+import pstats
+import stat
+
+import pytest
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import dependencies
+from app.core.metrics import MetricsMiddleware
+from app.core.principal import auth_state
+from app.core.profiler import ProfileStore, ProfilerMiddleware, _profile_requested
+from app.core.query_stats import QueryStatsCollector
+from app.core.security import create_access_token
+from app.core.server_timing import TimedRoute
+from app.models.medical import UserRole
+
+@pytest.fixture(autouse=True)
+def admin_state(monkeypatch):
+    # User id 1 adalah admin dengan epoch 0 (tanpa database)
+    state = {"value": (UserRole.admin, 0)}
+    monkeypatch.setattr(dependencies, "_load_auth_state", lambda user_id: state["value"])
+    auth_state.invalidate()
+    yield state
+    auth_state.invalidate()
+
+def slow_sum():
+    return sum(i * i for i in range(20000))
+
+def build_app(store):
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/work")
+    def work():
+        return {"value": slow_sum()}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ProfilerMiddleware, store=store)
+    app.add_middleware(MetricsMiddleware, registry=None, collector=QueryStatsCollector())
+    return app
+
+def auth(role, epoch=0):
+    token = create_access_token({"sub": f"{role}@x.com", "role": role, "user_id": 1, "epoch": epoch})
+    return {"Authorization": f"Bearer {token}"}
+
+def make_stats():
+    profile = cProfile.Profile()
+    profile.runcall(slow_sum)
+    return pstats.Stats(profile)
+
+def test_profile_flag_detection():
+    assert _profile_requested({"headers": [(b"x-profile", b"1")], "query_string": b""})
+    assert not _profile_requested({"headers": [(b"x-profile", b"0")], "query_string": b""})
+    assert _profile_requested({"headers": [], "query_string": b"limit=5&_profile=1"})
+    assert not _profile_requested({"headers": [], "query_string": b"limit=5"})
+
+def test_store_is_a_bounded_ring_buffer(tmp_path):
+    store = ProfileStore(str(tmp_path), max_entries=2)
+    for i, request_id in enumerate(("a1", "b2", "c3")):
+        store.save(request_id, make_stats(), {"created_at": f"2025-01-01T00:00:0{i}"})
+        os.utime(tmp_path / f"{request_id}.json", (i, i))
+    assert [m["request_id"] for m in store.list()] == ["c3", "b2"]
+    assert store.pstats_path("a1") is None
+    assert "slow_sum" in store.render_text("c3")
+    assert store.pstats_path("../etc/passwd") is None
+
+def test_admin_request_is_profiled_including_threadpool(tmp_path):
+    store = ProfileStore(str(tmp_path), max_entries=5)
+    client = TestClient(build_app(store))
+    response = client.get("/work", headers={**auth("admin"), "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert profile_id == response.headers["x-request-id"]
+    meta = store.list()[0]
+    assert meta["route"] == "/work"
+    assert meta["status"] == 200
+    # Endpoint sync di thread pool ikut terekam
+    assert "slow_sum" in store.render_text(profile_id, "cumulative", 100)
+
+def test_non_admin_or_unflagged_requests_are_not_profiled(tmp_path):
+    store = ProfileStore(str(tmp_path), max_entries=5)
+    client = TestClient(build_app(store))
+    assert "x-profile-id" not in client.get("/work", headers={**auth("doctor"), "X-Profile": "1"}).headers
+    assert "x-profile-id" not in client.get("/work", headers=auth("admin")).headers
+    assert store.list() == []
+
+def test_revoked_or_demoted_admin_token_is_not_profiled(tmp_path, admin_state):
+    store = ProfileStore(str(tmp_path), max_entries=5)
+    client = TestClient(build_app(store))
+    admin_state["value"] = (UserRole.admin, 1)
+    assert "x-profile-id" not in client.get("/work", headers={**auth("admin"), "X-Profile": "1"}).headers
+    auth_state.invalidate()
+    admin_state["value"] = (UserRole.doctor, 0)
+    assert "x-profile-id" not in client.get("/work", headers={**auth("admin"), "X-Profile": "1"}).headers
+    auth_state.invalidate()
+    admin_state["value"] = None
+    assert "x-profile-id" not in client.get("/work", headers={**auth("admin"), "X-Profile": "1"}).headers
+    assert store.list() == []
+
+def test_profile_directory_is_private(tmp_path):
+    directory = tmp_path / "profiles"
+    store = ProfileStore(str(directory), max_entries=5)
+    store.save("a1", make_stats(), {"created_at": "2025-01-01T00:00:00"})
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    # Direktori yang sudah ada dengan izin longgar dipersempit
+    os.chmod(directory, 0o777)
+    store.save("b2", make_stats(), {"created_at": "2025-01-01T00:00:01"})
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+def test_symlinked_profile_directory_is_refused(tmp_path):
+    target = tmp_path / "elsewhere"
+    target.mkdir()
+    link = tmp_path / "profiles"
+    link.symlink_to(target)
+    store = ProfileStore(str(link), max_entries=5)
+    with pytest.raises(PermissionError):
+        store.save("a1", make_stats(), {"created_at": "2025-01-01T00:00:00"})
@@ -0,0 +1,67 @@
+from sqlalchemy import create_engine, text
+
+from app.core.query_stats import QueryStatsCollector, fingerprint, explain_statement
+from app.core.request_context import RequestStats
+
+def test_fingerprint_normalizes_literals_and_params():
+    fid_a, text_a = fingerprint("SELECT * FROM users WHERE email = 'a@x.com' AND id IN (1, 2, 3)")
+    fid_b, text_b = fingerprint("SELECT *  FROM users\n WHERE email = %(email_1)s AND id IN (?, ?)")
+    assert text_a == "SELECT * FROM users WHERE email = ? AND id IN (?)"
+    assert fid_a == fid_b
+    # Identifier dengan angka dan cast postgres tidak ikut dinormalisasi
+    assert fingerprint("SELECT users_1.id::text FROM users AS users_1")[1] == "SELECT users_1.id::text FROM users AS users_1"
+
+def test_slow_query_capture_and_top():
+    collector = QueryStatsCollector(slow_threshold_ms=100, max_fingerprints=10, slow_log_size=5, n_plus_one_threshold=3)
+    stats = RequestStats(request_id="req-1")
+    collector.record("SELECT 1 FROM a WHERE id = ?", (1,), 0.01, stats)
+    collector.record("SELECT 1 FROM a WHERE id = ?", (2,), 0.2, stats)
+    collector.record("SELECT 1 FROM b", (), 0.05, stats)
+
+    by_total = collector.top("total_time", 10)
+    assert by_total[0]["count"] == 2
+    assert by_total[0]["slow_count"] == 1
+    assert by_total[0]["explainable"] is True
+    assert collector.top("count", 1)[0]["fingerprint"] == "SELECT ? FROM a WHERE id = ?"
+
+    slow = collector.slow_queries()
+    assert len(slow) == 1
+    assert slow[0]["request_id"] == "req-1"
+    assert slow[0]["route"] == "unmatched"
+    assert "parameters" not in slow[0]
+    assert collector.get_sample(by_total[0]["fingerprint_id"]) == ("SELECT 1 FROM a WHERE id = ?", (2,))
+
+def test_fingerprint_limit_is_bounded():
+    collector = QueryStatsCollector(slow_threshold_ms=1000, max_fingerprints=2)
+    for table in ("a", "b", "c"):
+        collector.record(f"SELECT x FROM {table}", (), 0.001)
+    assert len(collector.top("count", 10)) == 2
+    assert collector.dropped == 1
+
+def test_n_plus_one_detection():
+    collector = QueryStatsCollector(slow_threshold_ms=1000, n_plus_one_threshold=3)
+    stats = RequestStats(scope={"method": "GET"}, request_id="req-2")
+    for patient_id in range(5):
+        fid = collector.record(f"SELECT * FROM records WHERE patient_id = {patient_id}", (), 0.001, stats)
+        stats.record_query(0.001, fid)
+    fid_once = collector.record("SELECT * FROM patients", (), 0.001, stats)
+    stats.record_query(0.001, fid_once)
+    collector.finish_request(stats)
+
+    suspects = collector.n_plus_one()
+    assert len(suspects) == 1
+    assert suspects[0]["fingerprint"] == "SELECT * FROM records WHERE patient_id = ?"
+    assert suspects[0]["max_per_request"] == 5
+    assert suspects[0]["last_request_id"] == "req-2"
+
+def test_explain_only_select():
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)"))
+        plan = explain_statement(conn, "SELECT * FROM t WHERE id = ?", (1,))
+        assert plan
+        try:
+            explain_statement(conn, "DELETE FROM t", ())
+            assert False, "DELETE must not be explained"
+        except ValueError:
+            pass
@@ -0,0 +1,130 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend, RateLimitBackend, RedisRateLimitBackend, parse_rate, rate_limit, set_rate_limit_backend
+)
+from app.core.security import create_access_token
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def backend(monkeypatch):
+    clock = FakeClock()
+    memory = InMemoryRateLimitBackend(max_keys=100, clock=clock)
+    set_rate_limit_backend(memory)
+    monkeypatch.setattr(settings, "RATE_LIMITS", {"login": "2/minute", "submit": "3/second"})
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    yield memory, clock
+    set_rate_limit_backend(None)
+
+def build_app():
+    from app.main import http_exception_handler
+    from fastapi import HTTPException
+    app = FastAPI()
+    app.add_exception_handler(HTTPException, http_exception_handler)
+
+    @app.post("/login", dependencies=[Depends(rate_limit("login"))])
+    def login():
+        return {"ok": True}
+
+    @app.post("/submit", dependencies=[Depends(rate_limit("submit", key="device"))])
+    def submit():
+        return {"ok": True}
+
+    return app
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 10 / 60)
+    assert parse_rate("5/seconds") == (5, 5.0)
+    with pytest.raises(ValueError):
+        parse_rate("ten/minute")
+    with pytest.raises(ValueError):
+        parse_rate("10/fortnight")
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    memory = InMemoryRateLimitBackend(max_keys=10, clock=clock)
+    assert memory.consume("k", 2, 1.0)[0]
+    assert memory.consume("k", 2, 1.0)[0]
+    allowed, retry_after, _ = memory.consume("k", 2, 1.0)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+    clock.now = 1.0
+    assert memory.consume("k", 2, 1.0)[0]
+
+def test_bucket_keys_are_bounded():
+    memory = InMemoryRateLimitBackend(max_keys=2, clock=FakeClock())
+    for key in ("a", "b", "c"):
+        memory.consume(key, 1, 1.0)
+    assert list(memory._buckets) == ["b", "c"]
+
+def test_login_is_limited_per_ip_with_retry_after(backend):
+    client = TestClient(build_app())
+    assert client.post("/login").status_code == 200
+    assert client.post("/login").status_code == 200
+    response = client.post("/login")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+    assert response.json()["error_code"] == "too_many_requests"
+
+def test_device_budgets_are_independent_within_user(backend):
+    client = TestClient(build_app())
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "p@x.com", "role": "patient", "user_id": 7})}
+    for _ in range(3):
+        assert client.post("/submit", headers={**headers, "X-Device-ID": "esp-1"}).status_code == 200
+    assert client.post("/submit", headers={**headers, "X-Device-ID": "esp-1"}).status_code == 429
+    assert client.post("/submit", headers={**headers, "X-Device-ID": "esp-2"}).status_code == 200
+    memory, _ = backend
+    assert "submit:user:7:device:esp-1" in memory._buckets
+
+def test_rotating_device_ids_share_the_user_budget(backend, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_DEVICES_PER_USER", 2)
+    client = TestClient(build_app())
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "p@x.com", "role": "patient", "user_id": 7})}
+    # Budget agregat user = 2 x 3/second
+    statuses = [client.post("/submit", headers={**headers, "X-Device-ID": f"esp-{i}"}).status_code for i in range(8)]
+    assert statuses == [200] * 6 + [429] * 2
+    # User lain tidak terpengaruh
+    other = {"Authorization": "Bearer " + create_access_token({"sub": "q@x.com", "role": "patient", "user_id": 8})}
+    assert client.post("/submit", headers={**other, "X-Device-ID": "esp-0"}).status_code == 200
+    memory, _ = backend
+    assert "submit:user:7" in memory._buckets
+
+def test_backend_failure_does_not_block_requests(monkeypatch):
+    class BrokenBackend:
+        def consume(self, *args, **kwargs):
+            raise ConnectionError("redis down")
+    set_rate_limit_backend(BrokenBackend())
+    monkeypatch.setattr(settings, "RATE_LIMITS", {"login": "1/minute"})
+    try:
+        client = TestClient(build_app())
+        assert client.post("/login").status_code == 200
+        assert client.post("/login").status_code == 200
+    finally:
+        set_rate_limit_backend(None)
+
+def test_redis_backend_uses_atomic_script():
+    class FakeRedis:
+        def __init__(self):
+            self.calls = []
+
+        def eval(self, script, numkeys, *args):
+            self.calls.append((numkeys, args))
+            return [0, "2.5", "0.0"]
+
+    client = FakeRedis()
+    allowed, retry_after, remaining = RedisRateLimitBackend(client).consume("login:ip:1.2.3.4", 10, 0.5)
+    assert (allowed, retry_after, remaining) == (False, 2.5, 0.0)
+    assert client.calls == [(1, ("dopply:ratelimit:login:ip:1.2.3.4", 10, 0.5, 1.0))]
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
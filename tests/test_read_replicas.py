@@ -0,0 +1,166 @@
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.cache import MemoryCache, set_cache
+from app.core.config import settings
+from app.core.dependencies import get_current_principal, get_read_db
+from app.core.metrics import MetricsMiddleware
+from app.core.principal import auth_state
+from app.core.security import create_access_token
+from app.db import session as db_session
+from app.db.base import Base
+from app.db.replicas import ReplicaSet, probe_lag
+from app.db.session import SessionLocal, create_app_engine, get_db, get_read_session
+from app.models.medical import User, UserRole
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    # Primary = database test aplikasi, replica = file SQLite kedua
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", [replica_url])
+    replica_engine = create_app_engine(replica_url, "replica1")
+    Base.metadata.create_all(bind=replica_engine)
+
+    clock = FakeClock()
+    probe = {"lag": 0.0, "error": None}
+
+    def lag_probe(connection):
+        if probe["error"]:
+            raise probe["error"]
+        return probe["lag"]
+
+    replicas = ReplicaSet([replica_engine], max_lag_seconds=5.0, check_interval_seconds=10.0,
+                          lag_probe=lag_probe, clock=clock)
+    monkeypatch.setattr(db_session, "read_replicas", replicas)
+    set_cache(MemoryCache(clock=clock))
+
+    db = SessionLocal()
+    account = User(name="Dr", email=f"{uuid.uuid4().hex[:8]}@replica.test", password_hash="x", role=UserRole.doctor)
+    db.add(account)
+    db.commit()
+    token = create_access_token({"sub": account.email, "role": "doctor", "user_id": account.id, "epoch": 0})
+
+    app = FastAPI()
+
+    @app.get("/source")
+    def source(db: Session = Depends(get_read_db)):
+        return {"database": Path(db.get_bind().url.database).name}
+
+    @app.post("/touch")
+    def touch(principal=Depends(get_current_principal), db: Session = Depends(get_db)):
+        db.get(User, principal.id).name = "Dr Touched"
+        db.commit()
+        return {}
+
+    client = TestClient(MetricsMiddleware(app, registry=None))
+    client.headers["Authorization"] = f"Bearer {token}"
+    yield client, replicas, clock, probe
+
+    db.delete(account)
+    db.commit()
+    db.close()
+    auth_state.invalidate()
+    set_cache(None)
+    replica_engine.dispose()
+
+def read_source(client):
+    return client.get("/source").json()["database"]
+
+def test_reads_go_to_replica_until_the_user_writes(env):
+    client, _, clock, _ = env
+    primary = Path(db_session.engine.url.database).name
+    assert read_source(client) == "replica.db"
+
+    assert client.post("/touch").status_code == 200
+    assert read_source(client) == primary
+
+    clock.now += settings.REPLICA_STICKY_SECONDS + 1
+    assert read_source(client) == "replica.db"
+
+def test_lagging_or_unreachable_replica_falls_back_to_primary(env):
+    client, replicas, clock, probe = env
+    primary = Path(db_session.engine.url.database).name
+    assert read_source(client) == "replica.db"
+
+    probe["lag"] = 30.0
+    assert read_source(client) == "replica.db"  # Lag dicek ulang per interval
+    clock.now += 11
+    assert read_source(client) == primary
+    assert replicas.fallbacks == 1
+
+    probe["lag"], probe["error"] = 0.0, ConnectionError("replica down")
+    clock.now += 11
+    assert read_source(client) == primary
+    assert replicas.describe()[0]["healthy"] is False
+
+    probe["error"] = None
+    clock.now += 11
+    assert read_source(client) == "replica.db"
+
+def test_read_sessions_reject_writes(env):
+    db = get_read_session()
+    try:
+        db.add(User(name="X", email="x@replica.test", password_hash="x", role=UserRole.patient))
+        with pytest.raises(RuntimeError):
+            db.flush()
+    finally:
+        db.close()
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def mappings(self):
+        return self
+
+    def first(self):
+        return self.row
+
+class FakeConnection:
+    def __init__(self, dialect, rows):
+        self.dialect = type("Dialect", (), {"name": dialect})()
+        self.rows = rows
+        self.statements = []
+
+    def exec_driver_sql(self, statement):
+        self.statements.append(statement)
+        row = self.rows[statement]
+        if isinstance(row, Exception):
+            raise row
+        return FakeResult(row)
+
+def test_probe_lag_reads_mysql_replica_status():
+    assert probe_lag(FakeConnection("mysql", {"SHOW REPLICA STATUS": {"Seconds_Behind_Source": 3}})) == 3.0
+    # Replication thread berhenti: lag tidak diketahui
+    assert probe_lag(FakeConnection("mysql", {"SHOW REPLICA STATUS": {"Seconds_Behind_Source": None}})) is None
+    # Server tanpa channel replikasi
+    assert probe_lag(FakeConnection("mysql", {"SHOW REPLICA STATUS": None})) == 0.0
+
+def test_probe_lag_falls_back_to_slave_status_on_old_mysql():
+    from sqlalchemy.exc import ProgrammingError
+    connection = FakeConnection("mysql", {
+        "SHOW REPLICA STATUS": ProgrammingError("SHOW REPLICA STATUS", {}, Exception("syntax")),
+        "SHOW SLAVE STATUS": {"Seconds_Behind_Master": 7},
+    })
+    assert probe_lag(connection) == 7.0
+    assert connection.statements == ["SHOW REPLICA STATUS", "SHOW SLAVE STATUS"]
+
+def test_unmeasurable_dialect_is_lagging_unless_opted_in(tmp_path, monkeypatch):
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'replica.db'}", "replica1")
+    with engine.connect() as connection:
+        assert probe_lag(connection) is None
+        monkeypatch.setattr(settings, "REPLICA_ASSUME_UNMEASURED_FRESH", True)
+        assert probe_lag(connection) == 0.0
+    engine.dispose()
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints import auth, refresh, user
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core import dependencies
+from app.core.principal import auth_state, revoke_user_tokens
+from app.core.security import get_password_hash
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.medical import User, UserRole, RefreshTokenFamily, RevokedRefreshToken
+from app.services.refresh_token_service import revocation_filter
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    account = User(name="Pat", email="p@example.com", password_hash=get_password_hash("rahasia"), role=UserRole.patient)
+    db.add(account)
+    db.commit()
+    revocation_filter.reset()
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/v1")
+    app.include_router(refresh.router, prefix="/api/v1/auth")
+    app.include_router(user.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app), db, account, engine
+    revocation_filter.reset()
+    db.close()
+    engine.dispose()
+
+def login(client):
+    response = client.post("/api/v1/auth/login", json={"email": "p@example.com", "password": "rahasia"})
+    assert response.status_code == 200
+    return response.json()["data"]["refreshToken"]
+
+def do_refresh(client, token):
+    return client.post("/api/v1/auth/refresh", json={"refresh_token": token})
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"t:{i}")
+    assert all(f"t:{i}" in bloom for i in range(1000))
+    false_positives = sum(f"x:{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    with pytest.raises(ValueError):
+        BloomFilter(0)
+
+def test_refresh_rotates_and_reuse_revokes_family(env):
+    client, db, _, _ = env
+    first = login(client)
+    response = do_refresh(client, first)
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+
+    # Token lama dipakai lagi: seluruh family dicabut, termasuk token terbaru
+    assert do_refresh(client, first).status_code == 401
+    assert do_refresh(client, second).status_code == 401
+    assert db.query(RefreshTokenFamily).one().revoked_at is not None
+
+def test_not_revoked_path_only_writes(env):
+    client, db, _, engine = env
+    token = login(client)
+    revocation_filter.load(db)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert do_refresh(client, token).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    lookups = [s for s in statements if s.lstrip().upper().startswith("SELECT")
+               and ("revoked_refresh_tokens" in s or "refresh_token_families" in s)]
+    assert lookups == []
+    assert db.query(RevokedRefreshToken).count() == 1
+
+def test_reuse_is_caught_without_filter_entry(env, monkeypatch):
+    client, db, _, _ = env
+    first = login(client)
+    assert do_refresh(client, first).status_code == 200
+    # Worker lain: filter lokal belum tahu token ini sudah dirotasi
+    monkeypatch.setattr(revocation_filter, "might_be_revoked", lambda *args: False)
+    assert do_refresh(client, first).status_code == 401
+    assert db.query(RefreshTokenFamily).one().revoked_at is not None
+
+def test_logout_and_epoch_revoke_refresh_tokens(env):
+    client, db, account, _ = env
+    token = login(client)
+    assert client.post("/api/v1/auth/logout", json={"refresh_token": token}).status_code == 200
+    assert do_refresh(client, token).status_code == 401
+
+    token = login(client)
+    revoke_user_tokens(account)
+    db.commit()
+    assert do_refresh(client, token).status_code == 401
+
+def test_legacy_token_is_exchanged_once(env):
+    client, db, account, _ = env
+    # Format refresh token sebelum rotasi: tanpa jti / fid / epoch
+    legacy = jwt.encode({
+        "sub": account.email, "id": account.id, "email": account.email, "role": "patient",
+        "exp": datetime.utcnow() + timedelta(days=7), "type": "refresh"
+    }, settings.refresh_secret_key, algorithm=settings.ALGORITHM)
+    response = do_refresh(client, legacy)
+    assert response.status_code == 200
+    assert db.query(RefreshTokenFamily).count() == 1
+    rotated = response.json()["refresh_token"]
+
+    assert do_refresh(client, legacy).status_code == 401
+    # Replay dianggap pencurian: family hasil penukaran pertama ikut dicabut
+    assert do_refresh(client, rotated).status_code == 401
+    assert db.query(RefreshTokenFamily).count() == 1
+
+def test_credential_changes_revoke_access_and_refresh_tokens(env, monkeypatch):
+    client, db, _, engine = env
+    monkeypatch.setattr(dependencies, "SessionLocal", sessionmaker(bind=engine))
+    auth_state.invalidate()
+    doctor = User(name="Dr", email="d@example.com", password_hash=get_password_hash("rahasia"), role=UserRole.doctor)
+    db.add(doctor)
+    db.commit()
+
+    def login_doctor(email):
+        data = client.post("/api/v1/auth/login", json={"email": email, "password": "rahasia"}).json()["data"]
+        return {"Authorization": f"Bearer {data['token']}"}, data["refreshToken"]
+
+    headers, refresh_token = login_doctor("d@example.com")
+    assert client.get("/api/v1/user/all-doctors", headers=headers).status_code == 200
+    response = client.put("/api/v1/doctor/profile", json={"email": "d2@example.com"}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/api/v1/doctor/profile", headers=headers).status_code == 401
+    assert client.get("/api/v1/user/all-doctors", headers=headers).status_code == 401
+    assert do_refresh(client, refresh_token).status_code == 401
+
+    # Ganti password (admin / script) lewat ORM juga mencabut token
+    headers, refresh_token = login_doctor("d2@example.com")
+    doctor.password_hash = get_password_hash("rahasia")
+    db.commit()
+    assert client.get("/api/v1/doctor/profile", headers=headers).status_code == 401
+    assert client.get("/api/v1/user/all-doctors", headers=headers).status_code == 401
+    assert do_refresh(client, refresh_token).status_code == 401
+
+    # Update tanpa perubahan kredensial tidak mencabut apa pun
+    headers, refresh_token = login_doctor("d2@example.com")
+    doctor.name = "Dr. Baru"
+    doctor.email = doctor.email
+    db.commit()
+    assert client.get("/api/v1/doctor/profile", headers=headers).status_code == 200
+    assert do_refresh(client, refresh_token).status_code == 200
+    auth_state.invalidate()
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsMiddleware
+from app.core.query_stats import QueryStatsCollector
+from app.core.request_context import RequestStats
+from app.core.server_timing import TimedRoute, format_server_timing, server_timing, timed
+
+@timed("logic")
+def classify(values):
+    return "normal" if sum(values) / len(values) < 160 else "takikardia"
+
+def fake_auth():
+    with server_timing("auth"):
+        return {"id": 1}
+
+def build_app():
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/history")
+    def history(user=Depends(fake_auth)):
+        return {"user": user["id"], "classification": classify([120, 130, 140]), "bpm": list(range(500))}
+
+    @router.get("/async/{item_id}")
+    async def async_item(item_id: int):
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(MetricsMiddleware, registry=None, collector=QueryStatsCollector(), server_timing=True)
+    return app
+
+def parse(header):
+    return {entry.split(";")[0]: entry for entry in header.split(", ")}
+
+def test_server_timing_header_breakdown():
+    client = TestClient(build_app())
+    response = client.get("/history")
+    assert response.status_code == 200
+    assert response.headers["x-request-id"]
+    entries = parse(response.headers["server-timing"])
+    assert set(entries) == {"auth", "logic", "handler", "serialization", "total"}
+    assert entries["auth"].startswith("auth;dur=")
+
+def test_timed_route_keeps_signature_for_async_endpoints():
+    client = TestClient(build_app())
+    response = client.get("/async/7")
+    assert response.json() == {"id": 7}
+    assert "handler" in parse(response.headers["server-timing"])
+    assert client.get("/async/not-a-number").status_code == 422
+
+def test_format_includes_db_query_count():
+    stats = RequestStats()
+    stats.record_query(0.0015)
+    stats.record_query(0.0015)
+    stats.add_timing("auth", 0.001)
+    assert format_server_timing(stats, 0.01) == 'auth;dur=1.00, db;dur=3.00;desc="2 queries", total;dur=10.00'
+
+def test_timers_are_noop_outside_request():
+    with server_timing("logic"):
+        pass
+    assert classify([100]) == "normal"
+
+def test_included_routes_are_wrapped_once():
+    app = build_app()
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/async/{item_id}")
+    assert route.endpoint._server_timing_wrapped
+    assert not getattr(route.endpoint.__wrapped__, "_server_timing_wrapped", False)
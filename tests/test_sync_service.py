@@ -0,0 +1,165 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.models.medical import User, UserRole, Patient, Record, Notification, NotificationStatus, DoctorPatientAssociation
+from app.services.sync_service import SyncCursor, SyncService, EPOCH
+from app.services.monitoring_simple import MonitoringService
+from app.core.time_utils import get_local_naive_now
+
+@pytest.fixture(autouse=True)
+def no_settle_window(monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 0)
+
+def seed(db):
+    doctor = User(name="Dr. A", email="a@example.com", password_hash="x", role=UserRole.doctor)
+    patient_user = User(name="Pat", email="p@example.com", password_hash="x", role=UserRole.patient)
+    db.add_all([doctor, patient_user])
+    db.flush()
+    patient = Patient(user_id=patient_user.id, name="Pat", email="p@example.com")
+    db.add(patient)
+    db.flush()
+    db.add(DoctorPatientAssociation(doctor_id=doctor.id, patient_id=patient.id))
+    record = Record(patient_id=patient.id, start_time=get_local_naive_now(), created_by=patient_user.id, bpm_data=[140, 142])
+    db.add(record)
+    db.flush()
+    db.add(Notification(from_patient_id=patient.id, to_doctor_id=doctor.id, record_id=record.id, message="m"))
+    db.commit()
+    return doctor, patient_user, patient, record
+
+def test_token_roundtrip():
+    now = get_local_naive_now()
+    assert SyncService.decode_token(SyncService.encode_token(now)) == SyncCursor(now)
+    cursor = SyncCursor(now, 12, 34)
+    assert SyncService.decode_token(SyncService.encode_token(cursor)) == cursor
+    assert SyncService.decode_token(None) == SyncCursor(EPOCH)
+    # Token v1 (hanya timestamp) dari klien lama
+    legacy = base64.urlsafe_b64encode(f"v1:{now.isoformat()}".encode()).decode("ascii").rstrip("=")
+    assert SyncService.decode_token(legacy) == SyncCursor(now)
+    with pytest.raises(ValueError):
+        SyncService.decode_token("not-a-token")
+
+def test_offset_aware_token_is_normalized_to_local_naive():
+    raw = base64.urlsafe_b64encode(b"v1:2025-01-01T00:00:00+00:00").decode("ascii").rstrip("=")
+    since = SyncService.decode_token(raw).since
+    # 00:00 UTC = 07:00 WIB, dapat dibandingkan dengan kolom naive
+    assert since.tzinfo is None
+    assert since == datetime(2025, 1, 1, 7, 0)
+    assert since > EPOCH
+
+def test_initial_sync_then_empty_delta(sqlite_db):
+    doctor, _, _, record = seed(sqlite_db)
+    first = SyncService.get_changes(sqlite_db, doctor.id, "doctor", EPOCH)
+    assert [r["id"] for r in first["records"]] == [record.id]
+    assert len(first["notifications"]) == 1
+    assert len(first["patients"]) == 1
+    assert first["profile"]["id"] == doctor.id
+    assert first["has_more"] is False
+
+    second = SyncService.get_changes(sqlite_db, doctor.id, "doctor", first["next_since"])
+    assert second["records"] == [] and second["notifications"] == []
+    assert second["patients"] == [] and second["profile"] is None
+    assert second["next_since"] == first["next_since"]
+
+def test_delta_contains_only_modified_rows(sqlite_db):
+    doctor, patient_user, _, record = seed(sqlite_db)
+    token = SyncService.get_changes(sqlite_db, patient_user.id, "patient", EPOCH)["next_since"]
+
+    record.doctor_notes = "checked"
+    sqlite_db.commit()
+    delta = SyncService.get_changes(sqlite_db, patient_user.id, "patient", token)
+    assert [r["id"] for r in delta["records"]] == [record.id]
+    assert delta["profile"] is None
+    assert delta["notifications"] == []
+
+def test_bulk_read_bumps_notification_updated_at(sqlite_db):
+    doctor, _, _, _ = seed(sqlite_db)
+    token = SyncService.get_changes(sqlite_db, doctor.id, "doctor", EPOCH)["next_since"]
+    notification = sqlite_db.query(Notification).one()
+    MonitoringService.mark_notifications_read_bulk(sqlite_db, doctor.id, notification_ids=[notification.id])
+    delta = SyncService.get_changes(sqlite_db, doctor.id, "doctor", token)
+    assert [n["is_read"] for n in delta["notifications"]] == [True]
+
+def test_truncated_page_sets_has_more(sqlite_db):
+    doctor, patient_user, patient, _ = seed(sqlite_db)
+    for _ in range(3):
+        sqlite_db.add(Record(patient_id=patient.id, start_time=get_local_naive_now(), created_by=patient_user.id))
+    sqlite_db.commit()
+    page = SyncService.get_changes(sqlite_db, patient_user.id, "patient", EPOCH, limit=2)
+    assert page["has_more"] is True
+    seen = {r["id"] for r in page["records"]}
+    while page["has_more"]:
+        page = SyncService.get_changes(sqlite_db, patient_user.id, "patient", page["next_since"], limit=2)
+        seen |= {r["id"] for r in page["records"]}
+    assert len(seen) == 4
+
+def test_rows_sharing_one_timestamp_are_paged_to_the_end(sqlite_db):
+    doctor, _, patient, record = seed(sqlite_db)
+    for _ in range(4):
+        sqlite_db.add(Notification(from_patient_id=patient.id, to_doctor_id=doctor.id, record_id=record.id, message="m"))
+    sqlite_db.commit()
+    token = SyncService.get_changes(sqlite_db, doctor.id, "doctor", EPOCH)["next_since"]
+    # Satu UPDATE: kelima notifikasi mendapat updated_at yang sama
+    MonitoringService.mark_notifications_read_bulk(sqlite_db, doctor.id, up_to_id=10**9)
+    assert len({n.updated_at for n in sqlite_db.query(Notification)}) == 1
+
+    seen, pages = [], 0
+    page = {"next_since": token, "has_more": True}
+    while page["has_more"]:
+        page = SyncService.get_changes(sqlite_db, doctor.id, "doctor", page["next_since"], limit=2)
+        seen += [n["id"] for n in page["notifications"]]
+        pages += 1
+        assert pages <= 3
+    assert sorted(seen) == sorted(n.id for n in sqlite_db.query(Notification))
+    assert len(seen) == 5
+    # Token lewat encode/decode tetap melanjutkan dari posisi yang sama
+    again = SyncService.get_changes(sqlite_db, doctor.id, "doctor",
+                                    SyncService.decode_token(SyncService.encode_token(page["next_since"])))
+    assert again["notifications"] == []
+
+def test_long_poll_queries_run_off_the_event_loop(monkeypatch):
+    import threading
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.v1.endpoints import sync
+    from app.core.dependencies import get_current_principal
+    from app.core.principal import Principal
+    from app.db.session import get_db
+
+    class FakeSession:
+        rollbacks = 0
+
+        def rollback(self):
+            self.rollbacks += 1
+
+    calls = []
+
+    def get_changes(db, user_id, user_role, since, limit):
+        calls.append((threading.current_thread(), since))
+        return {"records": [], "notifications": [], "patients": [], "profile": None,
+                "next_since": since, "has_more": False}
+
+    monkeypatch.setattr(SyncService, "get_changes", staticmethod(get_changes))
+    monkeypatch.setattr(settings, "SYNC_POLL_INTERVAL_SECONDS", 0.01)
+    session = FakeSession()
+    app = FastAPI()
+    app.include_router(sync.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_current_principal] = lambda: Principal(1, "a@example.com", UserRole.doctor)
+    loop_threads = []
+
+    @app.get("/loop-thread")
+    async def loop_thread():
+        loop_threads.append(threading.current_thread())
+
+    client = TestClient(app)
+    client.get("/loop-thread")
+    aware = base64.urlsafe_b64encode(b"v1:2025-01-01T00:00:00+00:00").decode("ascii").rstrip("=")
+    response = client.get("/api/v1/sync", params={"since": aware, "wait": 1})
+    assert response.status_code == 200
+    assert len(calls) >= 2
+    assert all(thread is not loop_threads[0] for thread, _ in calls)
+    assert calls[0][1] == SyncCursor(datetime(2025, 1, 1, 7, 0))
+    assert session.rollbacks == len(calls)
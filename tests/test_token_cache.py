@@ -0,0 +1,90 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from jose import jwt
+
+from app.core.security import create_access_token, create_refresh_token, verify_access_token
+from app.core.token_cache import VerifiedTokenCache, verified_tokens
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    verified_tokens.clear()
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    yield calls
+    verified_tokens.clear()
+
+def test_verified_token_is_decoded_once(decode_calls):
+    token = create_access_token({"sub": "a@x.com", "role": "doctor", "user_id": 1})
+    first = verify_access_token(token)
+    first["role"] = "admin"  # salinan; cache tidak ikut berubah
+    assert verify_access_token(token)["role"] == "doctor"
+    assert len(decode_calls) == 1
+
+def test_invalid_tokens_are_not_cached_or_logged(decode_calls, caplog):
+    refresh = create_refresh_token({"sub": "a@x.com", "user_id": 1})
+    for token in ("garbage", refresh):
+        for _ in range(2):
+            with pytest.raises(Exception):
+                verify_access_token(token)
+    assert len(decode_calls) == 4
+    assert len(verified_tokens) == 0
+    assert "garbage" not in caplog.text and refresh not in caplog.text
+
+def test_entries_expire_with_token():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_entries=10, clock=clock)
+    cache.put("t", {"sub": "a", "exp": 1010})
+    cache.put("no-exp", {"sub": "a"})
+    cache.put("expired", {"sub": "a", "exp": 999})
+    assert cache.get("t") == {"sub": "a", "exp": 1010}
+    assert len(cache) == 1
+    clock.now = 1010
+    assert cache.get("t") is None
+    assert (cache.hits, cache.misses, cache.expirations, len(cache)) == (1, 1, 1, 0)
+
+def test_lru_eviction_keeps_recently_used():
+    cache = VerifiedTokenCache(max_entries=2, clock=FakeClock())
+    for token in ("a", "b"):
+        cache.put(token, {"exp": 2000})
+    cache.get("a")
+    cache.put("c", {"exp": 2000})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1
+
+def test_concurrent_access_stays_bounded():
+    cache = VerifiedTokenCache(max_entries=50, clock=FakeClock())
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(500):
+                token = f"t{(offset * 37 + i) % 120}"
+                if cache.get(token) is None:
+                    cache.put(token, {"exp": 2000, "n": token})
+        except Exception as e:  # pragma: no cover - hanya jika tidak thread-safe
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(cache) <= 50
+    assert cache.hits + cache.misses == 8 * 500